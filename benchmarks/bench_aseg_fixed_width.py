@@ -0,0 +1,54 @@
+"""
+Benchmark the fixed width ASEG-GDF2 decoder against pandas.read_fwf
+
+Usage: python bench_aseg_fixed_width.py [data_file.dat] [repeats]
+"""
+import sys
+import warnings
+from os.path import dirname, join
+from timeit import repeat
+
+import numpy as np
+from pandas import read_fwf, DataFrame
+from pandas.errors import PerformanceWarning
+
+from gspy.file_handlers.aseg_gdf_handler import aseg_gdf2_handler
+
+default_file = join(dirname(__file__), '..', 'examples', 'data_files', 'tempest_aseg', 'data', 'Tempest.dat')
+
+def read_with_read_fwf(filename):
+    """The previous fixed_format path, read_fwf followed by a typed copy of every column.
+
+    Repeated entries e.g. 15f12.6 are given one width per column so that read_fwf matches the DFN columns.
+    """
+    handler = aseg_gdf2_handler.read(filename, metadata={}, chunksize=1)
+
+    first = handler._dfn['layout'][0][1]
+    widths = [first] if first > 0 else []
+    for _, _, width, count, _, _ in handler._dfn['layout']:
+        widths += [width] * count
+
+    test = read_fwf(filename, widths=widths, header=None)
+    test.columns = (['-'] if first > 0 else []) + handler.columns
+
+    formats = {}
+    for key, _, _, count, dtype, _ in handler._dfn['layout']:
+        formats.update({key: dtype} if count == 1 else {f"{key}[{i}]": dtype for i in range(count)})
+
+    tmp = DataFrame()
+    for col in handler.columns:
+        tmp[col] = np.asarray(test[col], dtype=formats[col])
+    return tmp
+
+def read_with_decoder(filename):
+    return aseg_gdf2_handler.read(filename, metadata={}, fixed_format=True).df
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore', PerformanceWarning)
+
+    filename = sys.argv[1] if len(sys.argv) > 1 else default_file
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    for name, func in [('read_fwf', read_with_read_fwf), ('fixed width decoder', read_with_decoder)]:
+        times = repeat(lambda: func(filename), number=1, repeat=repeats)
+        print(f"{name:>20s}: best {min(times):.4f} s, mean {np.mean(times):.4f} s")
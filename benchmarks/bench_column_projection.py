@@ -0,0 +1,32 @@
+"""
+Benchmark reading only the columns referenced by the metadata against reading every column
+
+Usage: python bench_column_projection.py [n_records] [n_columns] [n_used]
+"""
+import sys
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from gspy.file_handlers.csv_handler import csv_handler
+
+if __name__ == '__main__':
+    n_records = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    n_columns = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    n_used = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+
+    with TemporaryDirectory() as directory:
+        filename = join(directory, 'data.csv')
+        rng = np.random.default_rng(0)
+        pd.DataFrame(rng.normal(size=(n_records, n_columns)), columns=[f'col_{i}' for i in range(n_columns)]).to_csv(filename, index=False)
+
+        usecols = {f'col_{i}' for i in range(n_used)}
+
+        for label, kwargs in (('every column', {}), (f'{n_used} columns', {'usecols': usecols})):
+            t0 = perf_counter()
+            handler = csv_handler.read(filename, metadata={}, **kwargs)
+            elapsed = perf_counter() - t0
+            print(f"{label:>14s} {elapsed:.3f} s  {handler.df.shape}  {handler.df.memory_usage().sum() / 2**20:.0f} MiB")
@@ -0,0 +1,31 @@
+"""
+Benchmark threaded csv parsing over byte ranges against a single pandas.read_csv
+
+Usage: python bench_csv_threads.py [n_records] [n_columns]
+"""
+import sys
+from os import cpu_count
+from os.path import join, getsize
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from gspy.file_handlers.csv_handler import csv_handler
+
+if __name__ == '__main__':
+    n_records = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    n_columns = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    with TemporaryDirectory() as directory:
+        filename = join(directory, 'data.csv')
+        rng = np.random.default_rng(0)
+        pd.DataFrame(rng.normal(size=(n_records, n_columns)), columns=[f'col_{i}' for i in range(n_columns)]).to_csv(filename, index=False)
+        print(f"{getsize(filename) / 2**20:.0f} MiB, {cpu_count()} cpus")
+
+        for n_threads in sorted({1, 2, 4, cpu_count() or 1}):
+            t0 = perf_counter()
+            handler = csv_handler.read(filename, metadata={}, n_threads=n_threads)
+            elapsed = perf_counter() - t0
+            print(f"n_threads {n_threads:>3d} {elapsed:.3f} s  {handler.df.shape}")
@@ -0,0 +1,56 @@
+"""
+Benchmark the csv_handler column type resolution against the previous per cell type() check
+
+Usage: python bench_csv_types.py [n_records] [n_columns]
+"""
+import sys
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from gspy.file_handlers.csv_handler import csv_handler
+
+def make_file(directory, n_records, n_columns):
+    """Numeric columns, one column of numbers mixed with '*' entries, and one string column"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(n_records, n_columns)), columns=[f'col_{i}' for i in range(n_columns)])
+    mixed = rng.normal(size=n_records).astype(str).astype(object)
+    mixed[::100] = '*'
+    df['mixed'] = mixed
+    df['name'] = 'L' + pd.Series(np.arange(n_records) // 1000).astype(str)
+    filename = join(directory, 'data.csv')
+    df.to_csv(filename, index=False)
+    return filename
+
+def per_cell_type(df):
+    """The previous check, a python type() call per cell"""
+    weird = (df.map(type) != df.iloc[0].apply(type)).any(axis=0)
+    for w in weird.keys():
+        if weird[w]:
+            df[w] = pd.to_numeric(df[w], errors='coerce')
+    return df
+
+if __name__ == '__main__':
+    n_records = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    n_columns = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with TemporaryDirectory() as directory:
+        filename = make_file(directory, n_records, n_columns)
+
+        t0 = perf_counter()
+        df = pd.read_csv(filename, na_values=['NaN'])
+        t1 = perf_counter()
+        per_cell_type(df.copy())
+        t2 = perf_counter()
+        handler = csv_handler()
+        handler.df = df.copy()
+        handler.coerce_mixed_columns({'mixed': {'null_value': '*'}})
+        t3 = perf_counter()
+
+        print(f"read_csv                   {t1 - t0:.3f} s")
+        print(f"per cell type() check      {t2 - t1:.3f} s")
+        print(f"coerce_mixed_columns       {t3 - t2:.3f} s")
+        print(f"mixed column dtype {handler.df['mixed'].dtype}, string column dtype {handler.df['name'].dtype}")
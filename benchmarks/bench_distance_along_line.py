@@ -0,0 +1,48 @@
+"""
+Benchmark per-line cumulative along-track distance of geographic records, a loop over lines vs add_distance_along_line of Dataset
+
+Usage: python bench_distance_along_line.py [n_lines] [n_records_per_line]
+"""
+import sys
+from time import perf_counter
+
+import numpy as np
+import xarray as xr
+
+import gspy
+from gspy.utilities.maths import haversine_distance
+
+def make_dataset(n_lines, n_records):
+    rng = np.random.default_rng(0)
+    lon = np.tile(np.linspace(-105.0, -104.0, n_records), n_lines) + rng.normal(0.0, 1e-5, n_lines * n_records)
+    lat = np.repeat(40.0 + 0.001 * np.arange(n_lines), n_records)
+    ds = xr.Dataset({'line': ('index', np.repeat(np.arange(n_lines) + 1000, n_records))},
+                    coords={'x': ('index', lon), 'y': ('index', lat)})
+    ds['spatial_ref'] = xr.DataArray(0, attrs={'grid_mapping_name': 'lattitude longitude', 'crs_wkt': ''})
+    return ds
+
+def per_line(ds):
+    """Loop over lines, selecting each with where and summing haversine steps"""
+    out = []
+    for number in np.unique(ds['line'].values):
+        line = ds.where(ds['line'] == number, drop=True)
+        x, y = line['x'].values, line['y'].values
+        out.append(np.r_[0.0, np.cumsum(haversine_distance(x[:-1], y[:-1], x[1:], y[1:]))])
+    return np.concatenate(out)
+
+if __name__ == '__main__':
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n_records = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    ds = make_dataset(n_lines, n_records)
+
+    t0 = perf_counter()
+    looped = per_line(ds)
+    print(f"loop over lines         {perf_counter() - t0:.3f} s")
+
+    t0 = perf_counter()
+    ds = ds.gs.add_distance_along_line()
+    print(f"add_distance_along_line {perf_counter() - t0:.3f} s")
+
+    # Geodesic on the WGS84 ellipsoid vs haversine on a sphere
+    print(f"max relative difference {np.nanmax(np.abs(ds['distance'].values - looped) / np.maximum(looped, 1.0)):.2e}")
@@ -0,0 +1,31 @@
+"""
+Benchmark the cold start time of import gspy, each repeat in a fresh interpreter
+
+Usage: python bench_import.py [n_repeats]
+"""
+import subprocess
+import sys
+
+# Optional and handler specific dependencies that import gspy should not load
+lazy = ('matplotlib.pyplot', 'rioxarray', 'pyproj', 'gspy.file_handlers.csv_handler')
+
+script = f"""
+import sys
+from time import perf_counter
+t0 = perf_counter()
+import gspy
+print(perf_counter() - t0)
+print(','.join(m for m in {lazy!r} if m in sys.modules))
+"""
+
+if __name__ == '__main__':
+    n_repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    times = []
+    for i in range(n_repeats):
+        out = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout.splitlines()
+        times.append(float(out[0]))
+        loaded = out[1] if len(out) > 1 else ''
+
+    print(f"import gspy  min {min(times):.3f} s  median {sorted(times)[n_repeats // 2]:.3f} s  over {n_repeats} runs")
+    print(f"lazy dependencies loaded at import: {loaded if loaded else 'none'}")
@@ -0,0 +1,52 @@
+"""
+Benchmark extracting every line of a tabular dataset, where(line == n, drop=True) vs the line index of Dataset
+
+Usage: python bench_line_index.py [n_lines] [n_records_per_line] [n_gates]
+"""
+import sys
+from time import perf_counter
+
+import numpy as np
+import xarray as xr
+
+import gspy
+
+def make_dataset(n_lines, n_records, n_gates):
+    rng = np.random.default_rng(0)
+    n = n_lines * n_records
+    return xr.Dataset({'line': ('index', np.repeat(np.arange(n_lines) * 10 + 1000, n_records)),
+                       'x': ('index', rng.random(n)),
+                       'y': ('index', rng.random(n)),
+                       'data': (('index', 'gate'), rng.random((n, n_gates), dtype=np.float32))})
+
+if __name__ == '__main__':
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n_records = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    n_gates = int(sys.argv[3]) if len(sys.argv) > 3 else 40
+
+    ds = make_dataset(n_lines, n_records, n_gates)
+    numbers = np.unique(ds['line'].values)
+
+    t0 = perf_counter()
+    total = 0.0
+    for number in numbers:
+        total += float(ds.where(ds.line == number, drop=True)['data'][-1, -1])
+    print(f"where, drop=True       {perf_counter() - t0:.3f} s")
+
+    t0 = perf_counter()
+    ds = ds.gs.build_line_index()
+    print(f"build line index       {perf_counter() - t0:.3f} s")
+
+    t0 = perf_counter()
+    check = 0.0
+    for number in numbers:
+        check += float(ds.gs.line(number)['data'][-1, -1])
+    print(f"line(n)                {perf_counter() - t0:.3f} s")
+    assert np.isclose(total, check)
+
+    t0 = perf_counter()
+    check = 0.0
+    for number, line in ds.gs.iter_lines():
+        check += float(line['data'][-1, -1])
+    print(f"iter_lines             {perf_counter() - t0:.3f} s")
+    assert np.isclose(total, check)
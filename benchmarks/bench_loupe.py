@@ -0,0 +1,43 @@
+"""
+Benchmark the Loupe reader on a synthetic data file
+
+Usage: python bench_loupe.py [n_lines] [n_soundings_per_line] [n_components] [n_channels]
+"""
+import sys
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+
+from gspy.file_handlers.loupe_handler import loupe_handler
+
+def make_file(filename, n_lines, n_soundings, components, n_channels):
+    rng = np.random.default_rng(0)
+    header = "FID C NCH TIME EAST NORTH HEIGHT " + " ".join(f"CH{i+1}" for i in range(n_channels))
+    fid = 0
+    with open(filename, 'w') as f:
+        f.write("/ synthetic loupe data\n/ exported by bench_loupe.py\n" + header + "\n")
+        for line in range(n_lines):
+            f.write(f"LINE:{line + 1}\n")
+            channels = rng.normal(size=(n_soundings * len(components), n_channels))
+            positions = rng.normal(size=(n_soundings, 4))
+            for i in range(n_soundings):
+                fid += 1
+                common = " ".join(f"{v:.3f}" for v in positions[i])
+                for j, c in enumerate(components):
+                    f.write(f"{fid} {c} {n_channels} {common} " + " ".join(f"{v:.5f}" for v in channels[i * len(components) + j]) + "\n")
+
+if __name__ == '__main__':
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    n_soundings = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    n_components = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    n_channels = int(sys.argv[4]) if len(sys.argv) > 4 else 30
+
+    with TemporaryDirectory() as directory:
+        filename = join(directory, 'data.dat')
+        make_file(filename, n_lines, n_soundings, 'XYZABCDEFG'[:n_components], n_channels)
+
+        t0 = perf_counter()
+        handler = loupe_handler.read(filename, metadata={})
+        print(f"loupe_handler.read {perf_counter() - t0:.3f} s  {handler.df.shape}")
@@ -0,0 +1,54 @@
+"""
+Benchmark nodata handling of integer GeoTIFF files, masking as float64 vs keeping the integer dtype with a _FillValue
+
+Usage: python bench_raster_nodata.py [n_files] [n_rows] [n_columns]
+"""
+import sys
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+import xarray as xr
+from xarray.core import indexing
+
+from gspy.gs_dataset.Raster import tif_stack_array
+
+def make_files(directory, n_files, n_rows, n_columns):
+    rng = np.random.default_rng(0)
+    filenames = []
+    for i in range(n_files):
+        filename = join(directory, f"class_{i}.tif")
+        values = rng.integers(0, 1000, size=(n_rows, n_columns), dtype=np.int16)
+        values[:, :10] = -32768
+        with rasterio.open(filename, 'w', driver='GTiff', height=n_rows, width=n_columns, count=1, dtype='int16', nodata=-32768,
+                           crs='EPSG:32615', transform=from_origin(500000.0, 4000000.0, 10.0, 10.0), tiled=True, compress='deflate') as dst:
+            dst.write(values, 1)
+        filenames.append(filename)
+    return filenames
+
+def stack(filenames, shape, dtype, fill):
+    return xr.DataArray(indexing.LazilyIndexedArray(tif_stack_array(filenames, shape, dtype, nodata=-32768, fill=fill)), dims=('z', 'y', 'x'))
+
+if __name__ == '__main__':
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    n_columns = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+
+    with TemporaryDirectory() as directory:
+        filenames = make_files(directory, n_files, n_rows, n_columns)
+        shape = (n_rows, n_columns)
+
+        t0 = perf_counter()
+        masked = stack(filenames, shape, 'float64', np.nan).values
+        print(f"keep_integer=False, float64 NaN  {perf_counter() - t0:.3f} s  {masked.nbytes / 2**20:.0f} MiB")
+
+        t0 = perf_counter()
+        kept = stack(filenames, shape, 'int16', np.int16(-32768)).values
+        print(f"keep_integer=True, int16         {perf_counter() - t0:.3f} s  {kept.nbytes / 2**20:.0f} MiB")
+
+        # CF decoding of the integer stack with its _FillValue gives the masked values
+        decoded = xr.decode_cf(xr.Dataset({'v': xr.DataArray(kept, dims=('z', 'y', 'x'), attrs={'_FillValue': np.int16(-32768)})}))['v']
+        assert np.array_equal(decoded.values, masked, equal_nan=True)
@@ -0,0 +1,53 @@
+"""
+Benchmark writing overview levels of a raster and reading a zoomed out level instead of the full resolution
+
+Usage: python bench_raster_overviews.py [n_slices] [n_rows] [n_columns] [n_levels]
+"""
+import sys
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+import xarray as xr
+
+import gspy
+
+def make_file(filename, n_slices, n_rows, n_columns):
+    rng = np.random.default_rng(0)
+    transform = [500000.0, 10.0, 0.0, 4000000.0, 0.0, -10.0]
+    ds = xr.Dataset({'resistivity': (('z', 'y', 'x'), rng.random((n_slices, n_rows, n_columns), dtype=np.float32))},
+                    coords={'z': np.arange(n_slices) * 5.0,
+                            'y': 4000000.0 - 10.0 * (np.arange(n_rows) + 0.5),
+                            'x': 500000.0 + 10.0 * (np.arange(n_columns) + 0.5),
+                            'spatial_ref': xr.DataArray(0.0, attrs={'GeoTransform': transform})})
+    ds.to_netcdf(filename, engine='h5netcdf')
+
+if __name__ == '__main__':
+    n_slices = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    n_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    n_columns = int(sys.argv[3]) if len(sys.argv) > 3 else 4000
+    n_levels = int(sys.argv[4]) if len(sys.argv) > 4 else 4
+
+    with TemporaryDirectory() as directory:
+        source, filename = join(directory, 'source.nc'), join(directory, 'raster.nc')
+        make_file(source, n_slices, n_rows, n_columns)
+
+        with gspy.open_dataset(source) as ds:
+            t0 = perf_counter()
+            ds.gs.to_netcdf(filename, group='raster')
+            print(f"to_netcdf, no overviews        {perf_counter() - t0:.3f} s")
+
+        with gspy.open_dataset(source) as ds:
+            t0 = perf_counter()
+            ds.gs.to_netcdf(filename, group='raster', overviews=n_levels)
+            print(f"to_netcdf, {n_levels} overview levels   {perf_counter() - t0:.3f} s")
+
+        with gspy.open_dataset(filename, group='raster') as ds:
+            t0 = perf_counter()
+            values = ds['resistivity'].values
+            print(f"read full resolution           {perf_counter() - t0:.3f} s  {values.shape}")
+
+            t0 = perf_counter()
+            values = ds.gs.overview(n_levels)['resistivity'].values
+            print(f"read overview level {n_levels}          {perf_counter() - t0:.3f} s  {values.shape}")
@@ -0,0 +1,68 @@
+"""
+Benchmark reprojecting a stack of GeoTIFF files onto the survey CRS, eager rioxarray reprojection of every file
+vs the warp planned once and applied to windows by tif_stack_array
+
+Usage: python bench_raster_reproject.py [n_files] [n_rows] [n_columns]
+"""
+import sys
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+import rasterio
+import rioxarray
+from rasterio.crs import CRS
+from rasterio.enums import Resampling
+from rasterio.transform import from_origin
+import xarray as xr
+from xarray.core import indexing
+
+from gspy.gs_dataset.Raster import tif_stack_array, _warp_grid
+
+def make_files(directory, n_files, n_rows, n_columns):
+    rng = np.random.default_rng(0)
+    filenames = []
+    for i in range(n_files):
+        filename = join(directory, f"layer_{i}.tif")
+        values = rng.random((n_rows, n_columns), dtype=np.float32)
+        with rasterio.open(filename, 'w', driver='GTiff', height=n_rows, width=n_columns, count=1, dtype='float32', nodata=np.nan,
+                           crs='EPSG:4326', transform=from_origin(-105.0, 40.0, 0.001, 0.001), tiled=True, compress='deflate') as dst:
+            dst.write(values, 1)
+        filenames.append(filename)
+    return filenames
+
+def eager(filenames, crs):
+    """Every file loaded and reprojected on its own"""
+    return np.stack([rioxarray.open_rasterio(filename).rio.reproject(crs).squeeze().values for filename in filenames])
+
+if __name__ == '__main__':
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    n_columns = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+
+    survey_crs = CRS.from_epsg(32613)
+
+    with TemporaryDirectory() as directory:
+        filenames = make_files(directory, n_files, n_rows, n_columns)
+
+        t0 = perf_counter()
+        values = eager(filenames, survey_crs)
+        print(f"eager reproject      {perf_counter() - t0:.3f} s  {values.shape}")
+
+        t0 = perf_counter()
+        with rasterio.open(filenames[0]) as src:
+            transform, shape = _warp_grid(src.crs, survey_crs, src.transform, src.width, src.height)
+            warp = dict(src_crs=src.crs, crs=survey_crs, transform=transform, width=shape[1], height=shape[0],
+                        resampling=Resampling.nearest, src_nodata=np.nan, nodata=np.nan)
+        stack = xr.DataArray(indexing.LazilyIndexedArray(tif_stack_array(filenames, shape, 'float32', nodata=np.nan, warp=[warp] * n_files)), dims=('z', 'y', 'x'))
+        print(f"plan warp            {perf_counter() - t0:.3f} s  {stack.shape}")
+
+        t0 = perf_counter()
+        lazy = stack.values
+        print(f"lazy warp, all       {perf_counter() - t0:.3f} s")
+        print(f"max difference       {np.nanmax(np.abs(lazy - values)) if lazy.shape == values.shape else 'grids differ'}")
+
+        t0 = perf_counter()
+        window = stack.isel(y=slice(shape[0] // 4, shape[0] // 2), x=slice(shape[1] // 4, shape[1] // 2)).values
+        print(f"lazy warp, window    {perf_counter() - t0:.3f} s  {window.shape}")
@@ -0,0 +1,66 @@
+"""
+Benchmark stacking GeoTIFF files, eager float64 stacking vs the lazy tif_stack_array used by Raster
+
+Usage: python bench_raster_stack.py [n_files] [n_rows] [n_columns] [n_threads]
+"""
+import sys
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+import rasterio
+import rioxarray
+from rasterio.transform import from_origin
+import xarray as xr
+from xarray.core import indexing
+
+from gspy.gs_dataset.Raster import tif_stack_array
+
+def make_files(directory, n_files, n_rows, n_columns):
+    rng = np.random.default_rng(0)
+    filenames = []
+    for i in range(n_files):
+        filename = join(directory, f"layer_{i}.tif")
+        values = rng.random((n_rows, n_columns), dtype=np.float32)
+        values[:, :10] = 9999.0
+        with rasterio.open(filename, 'w', driver='GTiff', height=n_rows, width=n_columns, count=1, dtype='float32', nodata=9999.0,
+                           crs='EPSG:32615', transform=from_origin(500000.0, 4000000.0, 10.0, 10.0), tiled=True, compress='deflate') as dst:
+            dst.write(values, 1)
+        filenames.append(filename)
+    return filenames
+
+def eager(filenames):
+    """Previous approach, every file loaded and copied into a float64 stack"""
+    values = None
+    for i, filename in enumerate(filenames):
+        ds = rioxarray.open_rasterio(filename).squeeze().drop_vars('band')
+        ds.values[ds.values == ds.attrs['_FillValue']] = np.nan
+        if values is None:
+            values = np.empty((len(filenames), *ds.shape))
+        values[i, :, :] = ds.values
+    return values
+
+if __name__ == '__main__':
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    n_columns = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    n_threads = int(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    with TemporaryDirectory() as directory:
+        filenames = make_files(directory, n_files, n_rows, n_columns)
+
+        t0 = perf_counter()
+        values = eager(filenames)
+        print(f"eager float64 stack   {perf_counter() - t0:.3f} s  {values.nbytes / 2**20:.0f} MiB")
+
+        stack = xr.DataArray(indexing.LazilyIndexedArray(tif_stack_array(filenames, (n_rows, n_columns), 'float32', nodata=9999.0, fill=np.nan, n_threads=n_threads)), dims=('z', 'y', 'x'))
+
+        t0 = perf_counter()
+        lazy = stack.values
+        print(f"lazy stack, all       {perf_counter() - t0:.3f} s  {lazy.nbytes / 2**20:.0f} MiB")
+        assert np.array_equal(values, lazy, equal_nan=True)
+
+        t0 = perf_counter()
+        window = stack.isel(y=slice(n_rows // 4, n_rows // 2), x=slice(n_columns // 4, n_columns // 2)).values
+        print(f"lazy stack, window    {perf_counter() - t0:.3f} s  {window.nbytes / 2**20:.0f} MiB")
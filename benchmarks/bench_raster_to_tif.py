@@ -0,0 +1,46 @@
+"""
+Benchmark exporting a lazily opened NetCDF raster stack to Cloud-Optimized GeoTIFF files with Raster.to_tif
+
+Usage: python bench_raster_to_tif.py [n_slices] [n_rows] [n_columns] [n_workers]
+"""
+import sys
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+import rasterio
+import xarray as xr
+from rasterio.crs import CRS
+
+from gspy.gs_dataset.Raster import Raster
+
+def make_file(filename, n_slices, n_rows, n_columns):
+    rng = np.random.default_rng(0)
+    spatial_ref = xr.DataArray(0.0, attrs={'crs_wkt': CRS.from_epsg(32615).to_wkt()})
+    ds = xr.Dataset({'resistivity': (('z', 'y', 'x'), rng.random((n_slices, n_rows, n_columns), dtype=np.float32)),
+                     'magnetic_tmi': (('y', 'x'), rng.random((n_rows, n_columns), dtype=np.float32))},
+                    coords={'z': np.arange(n_slices) * 5.0,
+                            'y': 4000000.0 - 10.0 * (np.arange(n_rows) + 0.5),
+                            'x': 500000.0 + 10.0 * (np.arange(n_columns) + 0.5),
+                            'spatial_ref': spatial_ref})
+    ds.to_netcdf(filename)
+
+if __name__ == '__main__':
+    n_slices = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    n_columns = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    n_workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    with TemporaryDirectory() as directory:
+        filename = join(directory, 'raster.nc')
+        make_file(filename, n_slices, n_rows, n_columns)
+
+        for workers in (1, n_workers):
+            with xr.open_dataset(filename) as ds:
+                t0 = perf_counter()
+                files = Raster(ds).to_tif(directory, n_workers=workers)
+                print(f"to_tif n_workers={workers}  {perf_counter() - t0:.3f} s  {len(files)} files")
+
+        with rasterio.open(files[0]) as src:
+            print(f"layout {src.tags(ns='IMAGE_STRUCTURE').get('LAYOUT')}  blocks {src.block_shapes[0]}  overviews {src.overviews(1)}")
@@ -0,0 +1,61 @@
+"""
+Benchmark bounding box and nearest neighbour queries of tabular points, full scans vs the spatial index of Dataset
+
+Usage: python bench_spatial_index.py [n_points] [n_queries]
+"""
+import sys
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+import xarray as xr
+
+import gspy
+
+def make_dataset(n_points):
+    """Points along east-west flight lines 100 m apart"""
+    rng = np.random.default_rng(0)
+    n_lines = max(int(np.sqrt(n_points / 10)), 1)
+    x = np.tile(np.linspace(0.0, 10.0 * n_points / n_lines, n_points // n_lines), n_lines)
+    y = np.repeat(100.0 * np.arange(n_lines), n_points // n_lines) + rng.normal(0.0, 5.0, x.size)
+    return xr.Dataset({'data': ('index', rng.random(x.size))}, coords={'x': ('index', x), 'y': ('index', y)})
+
+if __name__ == '__main__':
+    n_points = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    ds = make_dataset(n_points)
+    rng = np.random.default_rng(1)
+    x0 = rng.uniform(ds.x.min().values, ds.x.max().values, n_queries)
+    y0 = rng.uniform(ds.y.min().values, ds.y.max().values, n_queries)
+    points = np.c_[x0, y0]
+
+    t0 = perf_counter()
+    scan = [np.flatnonzero(((ds.x >= x) & (ds.x <= x + 500.0) & (ds.y >= y) & (ds.y <= y + 500.0)).values) for x, y in points]
+    print(f"bbox, full scan        {perf_counter() - t0:.3f} s")
+
+    t0 = perf_counter()
+    ds = ds.gs.build_spatial_index()
+    print(f"build spatial index    {perf_counter() - t0:.3f} s")
+
+    with TemporaryDirectory() as directory:
+        filename = join(directory, 'points.nc')
+        ds.to_netcdf(filename)
+        reopened = xr.open_dataset(filename).load()
+
+        t0 = perf_counter()
+        indexed = [reopened.gs.query_bbox(x, x + 500.0, y, y + 500.0) for x, y in points]
+        print(f"bbox, reopened index   {perf_counter() - t0:.3f} s")
+        assert all(np.array_equal(a, b) for a, b in zip(scan, indexed))
+
+        px, py = ds.x.values, ds.y.values
+        t0 = perf_counter()
+        scan = np.asarray([np.argmin((px - x)**2 + (py - y)**2) for x, y in points])
+        print(f"nearest, full scan     {perf_counter() - t0:.3f} s")
+
+        t0 = perf_counter()
+        _, indexed = reopened.gs.nearest(points)
+        print(f"nearest, index         {perf_counter() - t0:.3f} s")
+        assert np.array_equal(scan, indexed)
+        reopened.close()
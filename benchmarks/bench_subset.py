@@ -0,0 +1,48 @@
+"""
+Benchmark selecting records of a tabular dataset with 2D gate arrays, the previous where() subset vs the isel subset of Dataset
+
+Usage: python bench_subset.py [n_records] [n_gates] [n_repeats]
+"""
+import sys
+from time import perf_counter
+
+import numpy as np
+import xarray as xr
+
+import gspy
+
+def make_dataset(n_records, n_gates):
+    rng = np.random.default_rng(0)
+    return xr.Dataset({'line': ('index', np.repeat(np.arange(100) * 10 + 1000, n_records // 100)),
+                       'height': ('index', rng.uniform(20.0, 80.0, n_records)),
+                       'data': (('index', 'gate'), rng.random((n_records, n_gates), dtype=np.float32)),
+                       'std': (('index', 'gate'), rng.random((n_records, n_gates), dtype=np.float32))})
+
+if __name__ == '__main__':
+    n_records = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    n_gates = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    n_repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    ds = make_dataset(n_records, n_gates)
+
+    t0 = perf_counter()
+    for _ in range(n_repeats):
+        old = ds.where(ds['line'] == 1500)
+    print(f"where, line            {(perf_counter() - t0) / n_repeats:.4f} s  {old.nbytes / 2**20:.0f} MiB  data {old['data'].dtype}")
+
+    t0 = perf_counter()
+    for _ in range(n_repeats):
+        new = ds.gs.subset('line', 1500)
+    print(f"subset, line           {(perf_counter() - t0) / n_repeats:.4f} s  {new.nbytes / 2**20:.0f} MiB  data {new['data'].dtype}")
+    assert np.array_equal(new['data'].values, old['data'].dropna('index', how='all').values)
+
+    t0 = perf_counter()
+    for _ in range(n_repeats):
+        old = ds.where((ds['line'] >= 1200) & (ds['line'] <= 1400) & (ds['height'] <= 50.0), drop=True)['data']
+    print(f"where, compound        {(perf_counter() - t0) / n_repeats:.4f} s")
+
+    t0 = perf_counter()
+    for _ in range(n_repeats):
+        new = ds.gs.subset(line=(1200, 1400), height=(None, 50.0), variables=['data'])['data']
+    print(f"subset, compound       {(perf_counter() - t0) / n_repeats:.4f} s")
+    assert np.array_equal(new.values, old.values)
@@ -0,0 +1,48 @@
+"""
+Benchmark assembling a survey from a manifest of datasets with Container.build and different executors
+
+Usage: python bench_survey_build.py [n_datasets] [n_records] [n_workers]
+"""
+import sys
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+import gspy
+
+survey_metadata = dict(dataset_attrs=dict(title='benchmark', institution='', source='', history='', references='', comment='', conventions='CF-1.8'),
+                       spatial_ref=dict(wkid='EPSG:32615'))
+
+def make_file(directory, i, n_records, n_columns=50):
+    """Write a csv with x, y, z and n_columns variables and its metadata"""
+    rng = np.random.default_rng(i)
+    data = {'x': np.arange(n_records, dtype=np.float64), 'y': np.arange(n_records, dtype=np.float64), 'z': np.zeros(n_records)}
+    data.update({f"var{j}": rng.random(n_records) for j in range(n_columns)})
+
+    filename = join(directory, f"dataset_{i}.csv")
+    pd.DataFrame(data).to_csv(filename, index=False)
+
+    variables = {key: dict(standard_name=key, long_name=key, units='not_defined', null_value='not_defined') for key in data}
+    variables['z'].update(positive='up', datum='not_defined')
+
+    metadata = dict(dataset_attrs=dict(content='benchmark'),
+                    coordinates=dict(x='x', y='y', z='z'),
+                    variables=variables)
+    return dict(container=f"container_{i % 3}", key=f"dataset_{i}", data_filename=filename, metadata_file=metadata)
+
+if __name__ == '__main__':
+    n_datasets = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    n_records = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    n_workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    with TemporaryDirectory() as directory:
+        manifest = [make_file(directory, i, n_records) for i in range(n_datasets)]
+
+        for executor in (None, 'thread', 'process'):
+            survey = gspy.Survey.from_dict(dict(survey_metadata))
+            t0 = perf_counter()
+            survey.gs.build(manifest, executor=executor, n_workers=n_workers)
+            print(f"executor={executor}  {perf_counter() - t0:.3f} s  {len(manifest)} datasets")
@@ -0,0 +1,78 @@
+"""
+Benchmark how Tabular.read scales with the number of columns in a file
+
+Compares the single Dataset constructor used by Tabular.read against adding the same variables one at a time,
+along with the total time for Tabular.read.
+
+Usage: python bench_tabular_columns.py [number of records]
+"""
+import sys
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from gspy.gs_dataset.Tabular import Tabular
+
+spatial_ref = {'wkid': 'EPSG:32615'}
+
+def make_file(directory, n_records, n_columns):
+    """Write a csv with x, y, z and n_columns variables and its metadata"""
+    rng = np.random.default_rng(0)
+    data = {'x': np.arange(n_records, dtype=np.float64), 'y': np.arange(n_records, dtype=np.float64), 'z': np.zeros(n_records)}
+    data.update({f"var{i}": rng.random(n_records) for i in range(n_columns)})
+
+    filename = join(directory, f"columns_{n_columns}.csv")
+    pd.DataFrame(data).to_csv(filename, index=False)
+
+    variables = {key: dict(standard_name=key, long_name=key, units='not_defined', null_value='not_defined') for key in data}
+    variables['z'].update(positive='up', datum='not_defined')
+
+    metadata = dict(dataset_attrs=dict(content='benchmark'),
+                    coordinates=dict(x='x', y='y', z='z'),
+                    variables=variables)
+    return filename, metadata
+
+def index_dataset(n_records):
+    ds = xr.Dataset().gs.set_spatial_ref(spatial_ref)
+    return ds.gs.add_coordinate_from_values('index', values=np.arange(n_records, dtype=np.int32), discrete=True, is_dimension=True,
+                                            standard_name='index', long_name='index', units='not_defined', null_value='not_defined')
+
+def add_one_at_a_time(df, metadata):
+    """Add every column with its own Dataset insertion"""
+    ds = index_dataset(df.shape[0])
+    for key in df.columns:
+        ds = ds.gs.add_variable_from_dict(key, values=df[key].values, dimensions=['index'], **metadata['variables'][key])
+    return ds
+
+def add_all_at_once(df, metadata):
+    """Create every variable first and then the Dataset with one constructor, as in Tabular.read"""
+    ds = index_dataset(df.shape[0])
+    variables = {}
+    for key in df.columns:
+        variables.update(ds.gs.variables_from_dict(key, values=df[key].values, dimensions=['index'], **metadata['variables'][key]))
+    return xr.Dataset(data_vars={**ds.data_vars, **variables}, coords=ds.coords, attrs=ds.attrs)
+
+def tabular_read(filename, metadata):
+    return Tabular.read(filename, metadata_file=dict(metadata, variables=dict(metadata['variables'])), spatial_ref=spatial_ref)
+
+def timed(func, *args):
+    t0 = perf_counter()
+    func(*args)
+    return perf_counter() - t0
+
+if __name__ == '__main__':
+    n_records = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    print(f"{'columns':>8s} {'one at a time (s)':>18s} {'all at once (s)':>18s} {'Tabular.read (s)':>18s}")
+    with TemporaryDirectory() as directory:
+        for n_columns in (10, 50, 100, 200, 400, 800):
+            filename, metadata = make_file(directory, n_records, n_columns)
+            df = pd.read_csv(filename)
+
+            times = (timed(add_one_at_a_time, df, metadata), timed(add_all_at_once, df, metadata), timed(tabular_read, filename, metadata))
+
+            print(f"{n_columns:>8d} {times[0]:>18.3f} {times[1]:>18.3f} {times[2]:>18.3f}")
@@ -0,0 +1,42 @@
+"""
+Benchmark the null aware min_max reduction used by DataArray.valid_range against a masked copy followed by nanmin and nanmax
+
+Usage: python bench_valid_range.py [n_records] [n_gates]
+"""
+import sys
+from time import perf_counter
+from tracemalloc import start, stop, get_traced_memory, reset_peak
+
+import numpy as np
+
+from gspy.utilities.maths import min_max
+
+null_value = -9999.0
+
+def masked_copy(values):
+    """The previous valid_range, a boolean masked copy followed by separate nanmin and nanmax passes"""
+    tmp = values[values != null_value]
+    return np.nanmin(tmp), np.nanmax(tmp)
+
+def timed(func, values):
+    reset_peak()
+    t0 = perf_counter()
+    out = func(values)
+    elapsed = perf_counter() - t0
+    return out, elapsed, get_traced_memory()[1] / 2**20
+
+if __name__ == '__main__':
+    n_records = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    n_gates = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(n_records, n_gates))
+    values[rng.random(n_records) < 0.1, :] = null_value
+    values[rng.random(values.shape) < 0.01] = np.nan
+
+    start()
+    print(f"{'method':>12s} {'time (s)':>10s} {'peak (MiB)':>12s}  range")
+    for name, func in (('masked copy', masked_copy), ('min_max', lambda v: min_max(v, null_value=null_value))):
+        out, elapsed, peak = timed(func, values)
+        print(f"{name:>12s} {elapsed:>10.3f} {peak:>12.1f}  {out}")
+    stop()
@@ -0,0 +1,49 @@
+"""
+Benchmark reading Workbench model inv/dat/syn files into one DataFrame
+
+Usage: python bench_workbench_model.py [n_records] [n_gates]
+"""
+import sys
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+
+from gspy.file_handlers.workbench_handler import workbench_model_handler
+
+def write(filename, header, values):
+    with open(filename, 'w') as f:
+        f.write("/ synthetic workbench model\n/ " + "  ".join(header) + "\n")
+        np.savetxt(f, values, fmt='%.6g', delimiter='  ')
+
+def make_files(stem, n_records, n_gates):
+    rng = np.random.default_rng(0)
+    records = np.arange(n_records) + 1
+    lines = 100 + records // 1000
+
+    # Dual moment, the low moment fills the first n_gates DATA columns and the high moment the rest
+    gates = np.full((2 * n_records, 2 * n_gates), 9999.0)
+    gates[0::2, :n_gates] = rng.uniform(size=(n_records, n_gates))
+    gates[1::2, n_gates:] = rng.uniform(size=(n_records, n_gates))
+    std = np.where(gates == 9999.0, 9999.0, 0.05)
+    segments = np.column_stack([np.repeat(lines, 2), np.repeat(records, 2), np.tile([1, 2], n_records)])
+
+    data_columns = [f"DATA_{i+1}" for i in range(2 * n_gates)]
+    write(f"{stem}_inv.xyz", ['LINE_NO', 'RECORD', 'UTMX', 'UTMY', 'ELEVATION'] + [f"RHO_{i+1}" for i in range(30)],
+          np.column_stack([lines, records, rng.uniform(size=(n_records, 3)), rng.uniform(size=(n_records, 30))]))
+    write(f"{stem}_dat.xyz", ['LINE_NO', 'RECORD', 'SEGMENTS'] + data_columns + [f"DATASTD_{i+1}" for i in range(2 * n_gates)],
+          np.column_stack([segments, gates, std]))
+    write(f"{stem}_syn.xyz", ['LINE_NO', 'RECORD', 'SEGMENTS'] + data_columns, np.column_stack([segments, gates]))
+
+if __name__ == '__main__':
+    n_records = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n_gates = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    with TemporaryDirectory() as directory:
+        stem = join(directory, 'model')
+        make_files(stem, n_records, n_gates)
+
+        t0 = perf_counter()
+        df = workbench_model_handler().read_data(f"{stem}_inv.xyz", mapping={1: 'lm_z', 2: 'hm_z'})
+        print(f"workbench_model_handler.read_data {perf_counter() - t0:.3f} s  {df.shape}")
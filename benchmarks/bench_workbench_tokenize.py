@@ -0,0 +1,42 @@
+"""
+Benchmark tokenizing a Workbench style .xyz file, pandas python engine vs xyz_handler.read_table
+
+Usage: python bench_workbench_tokenize.py [n_rows] [n_gates]
+"""
+import sys
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+from pandas import read_csv
+
+from gspy.file_handlers.xyz_handler import xyz_handler
+
+def make_file(filename, n_rows, n_gates):
+    rng = np.random.default_rng(0)
+    columns = ['DATE', 'TIME', 'LINE_NO', 'UTMX', 'UTMY', 'ELEVATION', 'CHANNEL_NO'] + [f'DBDT_Ch1GT{i+1}' for i in range(n_gates)]
+    values = rng.normal(size=(n_rows, n_gates))
+    with open(filename, 'w') as f:
+        f.write("/ " + ",   ".join(columns) + "\n")
+        for i in range(n_rows):
+            f.write(f"2024-01-01,  {i * 0.1:.1f},  {100 + i // 1000},  {500000 + i:.2f},  {6000000 + i:.2f},  {rng.normal():.3f},  {1 + i % 2},  ")
+            f.write(",  ".join(f"{v:.6e}" for v in values[i]) + "\n")
+
+if __name__ == '__main__':
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n_gates = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    with TemporaryDirectory() as directory:
+        filename = join(directory, 'data.xyz')
+        make_file(filename, n_rows, n_gates)
+
+        t0 = perf_counter()
+        python = read_csv(filename, sep=r',\s+', engine='python')
+        print(f"python engine     {perf_counter() - t0:.3f} s  {python.shape}")
+
+        t0 = perf_counter()
+        c = xyz_handler.read_table(filename, 0, r',\s+', ',', skipinitialspace=True)
+        print(f"read_table        {perf_counter() - t0:.3f} s  {c.shape}")
+
+        print(f"identical: {python.equals(c)}")
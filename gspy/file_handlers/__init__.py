@@ -1,25 +1,57 @@
+import sys
+from importlib import import_module
 from os.path import isfile, splitext
-from .aseg_gdf_handler import aseg_gdf2_handler
-from .csv_handler import csv_handler
-from .loupe_handler import loupe_handler
+from types import ModuleType
 
-from .xyz_handler import xyz_handler
-from .workbench_handler import workbench_handler, workbench_model_handler
+# Handlers are only imported when first used, keyed by file type.
+_registry = {'aseg' : ('.aseg_gdf_handler', 'aseg_gdf2_handler'),
+             'csv' : ('.csv_handler', 'csv_handler'),
+             'loupe' : ('.loupe_handler', 'loupe_handler'),
+             'xyz' : ('.xyz_handler', 'xyz_handler'),
+             'workbench' : ('.workbench_handler', 'workbench_handler'),
+             'workbench_model' : ('.workbench_handler', 'workbench_model_handler')}
+
+class _package(ModuleType):
+    """This package, where a handler class is found before the submodule of the same name"""
+    def __setattr__(self, name, value):
+        # Importing a submodule binds it on the package. Skipping that binding, rather than undoing it later,
+        # leaves nothing for other threads to see between the import and __getattr__ returning the class.
+        if isinstance(value, ModuleType) and any(name == handler for _, handler in _registry.values()):
+            return
+        super().__setattr__(name, value)
+
+sys.modules[__name__].__class__ = _package
+
+def get_handler(file_type):
+    """Import and return the handler class registered for a file type
+
+    Parameters
+    ----------
+    file_type : str
+        One of 'aseg', 'csv', 'loupe', 'xyz', 'workbench', 'workbench_model'
+
+    Returns
+    -------
+    gspy.file_handlers.file_handler_abc.file_handler subclass
+
+    """
+    assert file_type in _registry, ValueError(f"file_type {file_type} must be one of {list(_registry.keys())}")
+    module, name = _registry[file_type]
+    return getattr(import_module(module, __name__), name)
+
+def __getattr__(name):
+    # Keep "from gspy.file_handlers import csv_handler" working without importing every handler up front
+    for file_type, (module, handler) in _registry.items():
+        if handler == name:
+            return get_handler(file_type)
+    raise AttributeError(f"module {__name__} has no attribute {name}")
 
 def file_handler(filename, **kwargs):
 
     if "file_type" in kwargs:
-        match kwargs['file_type'].lower():
-            case 'loupe':
-                return loupe_handler
-            case 'csv':
-                return csv_handler
-            case 'aseg':
-                return aseg_gdf2_handler
-            case 'xyz':
-                return xyz_handler
-            case 'workbench':
-                return workbench_handler
+        file_type = kwargs['file_type'].lower()
+        if file_type in ('loupe', 'csv', 'aseg', 'xyz', 'workbench'):
+            return get_handler(file_type)
 
     file_name, file_extension = splitext(filename)
     file_extension = file_extension.lower()
@@ -31,17 +63,18 @@ def file_handler(filename, **kwargs):
 
     wb_handle = None
     if file_extension == '.xyz':
+        xyz_handler = get_handler('xyz')
 
         if xyz_handler.is_workbench_model(filename):
-            return workbench_model_handler
+            return get_handler('workbench_model')
         elif xyz_handler.is_workbench(filename):
-            return workbench_handler
+            return get_handler('workbench')
 
     elif file_extension == '.dat':
         if isfile(file_name+'.dfn'):
-            return aseg_gdf2_handler
+            return get_handler('aseg')
         elif isfile(file_name+file_extension+'.desc'):
-            return loupe_handler
+            return get_handler('loupe')
 
     # Catch all others as a csv i.e. .xyz, .csv, .txt etc.
-    return csv_handler
\ No newline at end of file
+    return get_handler('csv')
@@ -1,9 +1,94 @@
 import re
+import json
+from hashlib import sha256
+from itertools import islice
+from os import environ, makedirs
+from os.path import abspath, dirname, expanduser, getmtime, isfile, join
 import numpy as np
-import chardet
-from pandas import read_csv, read_fwf, DataFrame
+from pandas import read_csv, DataFrame
+from xarray.backends import BackendArray
+from xarray.core import indexing
 from .file_handler_abc import file_handler
 from ..metadata.Metadata import Metadata
+from .._version import __version__
+
+# Part of the key of cached DFN files, change it when the cached contents change
+_DFN_CACHE_SCHEMA = 1
+
+
+def decode_fixed_width(records, width, dtype, kind):
+    """Decode the bytes of a fixed width field into typed values.
+
+    Parameters
+    ----------
+    records : numpy.ndarray of uint8
+        Bytes of the field with shape (..., number of entries * width).
+    width : int
+        Width of a single entry.
+    dtype : dtype
+        Numpy dtype of the entries.
+    kind : str
+        Fortran type of the entries, one of (i, f, e, es, g, d, a).
+
+    Returns
+    -------
+    numpy.ndarray
+        Values with shape (..., number of entries)
+
+    """
+    field = np.ascontiguousarray(records).view(f'S{width}')
+
+    if kind == 'a':
+        return np.char.strip(field.astype(str))
+
+    if kind == 'd':
+        field = np.char.replace(np.char.upper(field), b'D', b'E')
+    return field.astype(dtype)
+
+
+class aseg_memmap_array(BackendArray):
+    """Lazily decoded column of a memory mapped fixed width ASEG-GDF2 data file.
+
+    Only the records that are indexed are decoded. Wrap in xarray.core.indexing.LazilyIndexedArray to
+    use as the values of an xarray.DataArray.
+
+    Parameters
+    ----------
+    memmap : numpy.memmap
+        Bytes of the data file.
+    record_length : int
+        Number of bytes in each record, including the line ending.
+    nrecords : int
+        Number of records in the file.
+    offset : int
+        Byte offset of the field in each record.
+    width : int
+        Width of a single entry.
+    count : int
+        Number of entries. Fields with more than one entry are 2D.
+    dtype : dtype
+        Numpy dtype of the entries.
+    kind : str
+        Fortran type of the entries.
+
+    """
+    def __init__(self, memmap, record_length, nrecords, offset, width, count, dtype, kind):
+        self.width = width
+        self.kind = kind
+        self.shape = (nrecords,) if count == 1 else (nrecords, count)
+        self.dtype = np.dtype(f'U{width}') if kind == 'a' else np.dtype(dtype)
+
+        # Zero copy 2D view over the bytes of this field in every record
+        self._records = np.lib.stride_tricks.as_strided(memmap[offset:], shape=(nrecords, count * width), strides=(record_length, 1), writeable=False)
+
+    def __getitem__(self, key):
+        return indexing.explicit_indexing_adapter(key, self.shape, indexing.IndexingSupport.OUTER, self._getitem)
+
+    def _getitem(self, key):
+        values = decode_fixed_width(self._records[key[0]], self.width, self.dtype, self.kind)
+        if len(self.shape) == 1:
+            return values[..., 0]
+        return values[(Ellipsis, *key[1:])]
 
 
 class aseg_gdf2_handler(file_handler):
@@ -11,15 +96,7 @@ class aseg_gdf2_handler(file_handler):
     """
     @property
     def columns(self):
-        out = []
-        for key, value in self.metadata.items():
-            test = re.split('es|e|f|i|g|d|a', value['format'])
-            if test[0] != '':
-                for i in range(np.int32(test[0])):
-                    out.append('{}[{}]'.format(key, i))
-            else:
-                out.append(key)
-        return out
+        return self._dfn['columns']
 
     def metadata_template(self, **kwargs):
 
@@ -41,68 +118,168 @@ class aseg_gdf2_handler(file_handler):
         return out
 
     @property
-    def nrecords(self):
-        return self.df.shape[0]
+    def null_values(self):
+        return self._dfn['null_values']
 
     @property
     def numpy_formats(self):
-        out = {}
-        for key, value in self.metadata.items():
-            fmt = value['format']
-            if 'i' in fmt:
-                npfmt = np.int32
-            elif 'f' in fmt:
-                npfmt = np.float64
-            elif 'e'in fmt:
-                npfmt = np.float64
-            elif 'es' in fmt:
-                npfmt = np.float64
-            elif 'd' in fmt:
-                npfmt = np.float64
-            elif 'g' in fmt:
-                npfmt = np.float64
-            elif 'a' in fmt:
-                npfmt = str
-            out[key] = npfmt
-        return out
+        return {key: dtype for key, _, _, _, dtype, _ in self._dfn['layout']}
 
     @property
     def type(self):
         return 'aseg'
 
-    def __col_widths_from_fortran_format(self, first):
-        if first > 0:
-            out = [first]
-        else:
-            out = []
-        for key, value in self.metadata.items():
-            fmt = value['format']
-            if 'i' in fmt:
-                width = fmt.split('i')
-            elif 'f' in fmt:
-                width = fmt.split('f')
-            elif 'e'in fmt:
-                width = fmt.split('e')
-            elif 'es' in fmt:
-                width = fmt.split('es')
-            elif 'd' in fmt:
-                width = fmt.split('d')
-            elif 'g' in fmt:
-                width = fmt.split('g')
-            elif 'a' in fmt:
-                width = fmt.split('a')
-
-            if width[0] == '':
-                width = np.int32(np.float32(width[-1]))
-            else:
-                width = np.int32(width[0]) * np.int32(np.float32(width[-1]))
+    @staticmethod
+    def __numpy_format(fmt):
+        if 'i' in fmt:
+            return np.int32
+        elif 'f' in fmt:
+            return np.float64
+        elif 'e'in fmt:
+            return np.float64
+        elif 'es' in fmt:
+            return np.float64
+        elif 'd' in fmt:
+            return np.float64
+        elif 'g' in fmt:
+            return np.float64
+        elif 'a' in fmt:
+            return str
+
+    def __compile_dfn(self, first_col_width, metadata):
+        """Everything needed to read the data file from the parsed DFN file.
 
-            out.append(width)
+        Parameters
+        ----------
+        first_col_width : int
+            Width of the record type at the start of each record
+        metadata : dict
+            Metadata for each DFN entry, see __parse_dfn_file
 
-        return out
+        Returns
+        -------
+        dict
+            * metadata : metadata for each DFN entry
+            * columns : data file column names, entries with repeats are expanded as key[i]
+            * layout : (key, byte offset, width of a single entry, number of entries, numpy dtype, fortran type) for each DFN entry.
+            * null_values : null value for each DFN entry
+
+        """
+        layout = []
+        columns = []
+        offset = first_col_width
+        for key, value in metadata.items():
+            count, kind, width = re.match(r'(\d*)(es|e|f|i|g|d|a)(\d+)', value['format']).groups()
+            count = np.int32(count) if count != '' else 1
+            width = np.int32(width)
+
+            layout.append((key, offset, width, count, self.__numpy_format(value['format']), kind))
+            offset += count * width
+
+            columns += [f"{key}[{i}]" for i in range(count)] if count > 1 else [key]
+
+        return dict(metadata = metadata,
+                    columns = columns,
+                    layout = layout,
+                    null_values = {key: value['null_value'] for key, value in metadata.items()})
+
+    def __read_dfn(self, filename, cache=True):
+        """Compile the DFN file, re-using a previously parsed copy from the on-disk cache if there is one.
+
+        The cache is keyed by the gspy version, the cache schema, and the path, modification time and contents
+        of the DFN file. It is stored as JSON in the directory given by the GSPY_CACHE_DIR environment variable,
+        by default ~/.cache/gspy, so reading it never runs code.
+
+        Parameters
+        ----------
+        filename : str
+            ASEG GDF2 definition file
+        cache : bool, optional
+            Read and write the on-disk cache, by default True
+
+        Returns
+        -------
+        dict
+
+        """
+        if not cache:
+            return self.__compile_dfn(*self.__parse_dfn_file(filename))
+
+        with open(filename, 'rb') as f:
+            contents = sha256(f.read()).hexdigest()
+
+        key = sha256(f"{__version__}:{_DFN_CACHE_SCHEMA}:{abspath(filename)}:{getmtime(filename)}:{contents}".encode()).hexdigest()
+        cache_file = join(environ.get('GSPY_CACHE_DIR', join(expanduser('~'), '.cache', 'gspy')), 'dfn', f"{key}.json")
+
+        parsed = None
+        if isfile(cache_file):
+            try:
+                with open(cache_file) as f:
+                    parsed = self.__from_json(json.load(f))
+            except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                # A damaged entry is parsed again and overwritten
+                parsed = None
+
+        if parsed is None:
+            parsed = self.__parse_dfn_file(filename)
+
+            # The cache is only an optimization, carry on if it cannot be written.
+            try:
+                makedirs(dirname(cache_file), exist_ok=True)
+                with open(cache_file, 'w') as f:
+                    json.dump(self.__to_json(*parsed), f)
+            except OSError:
+                pass
+
+        return self.__compile_dfn(*parsed)
+
+    @staticmethod
+    def __to_json(first_col_width, metadata):
+        """The parsed DFN file with only JSON types, and the numpy types of the null values"""
+        return {'first_col_width': int(first_col_width),
+                'metadata': {key: {k: v.item() if isinstance(v, np.generic) else v for k, v in md.items()} for key, md in metadata.items()},
+                'null_dtypes': {key: md['null_value'].dtype.name for key, md in metadata.items() if isinstance(md['null_value'], np.generic)}}
+
+    @staticmethod
+    def __from_json(cached):
+        """The parsed DFN file from __to_json"""
+        metadata = cached['metadata']
+        for key, dtype in cached['null_dtypes'].items():
+            metadata[key]['null_value'] = np.dtype(dtype).type(metadata[key]['null_value'])
+        return np.int32(cached['first_col_width']), metadata
+
+    def __project(self, usecols):
+        """Only keep the DFN entries that are needed.
+
+        Parameters
+        ----------
+        usecols : set of str
+            Needed column and entry names.
+
+        Returns
+        -------
+        dict
+            Compiled DFN with only the needed entries. file_columns still holds every column in the data file.
+
+        """
+        # Single columns of a 2D entry e.g. key[3] need the whole entry
+        wanted = set(usecols) | {self.base_column(column) for column in usecols}
+
+        layout = [entry for entry in self._dfn['layout'] if entry[0] in wanted]
+        keep = [entry[0] for entry in layout]
+
+        columns = []
+        for key, _, _, count, _, _ in layout:
+            columns += [f"{key}[{i}]" for i in range(count)] if count > 1 else [key]
+
+        return dict(metadata = {key: self._dfn['metadata'][key] for key in keep},
+                    columns = columns,
+                    file_columns = self._dfn['columns'],
+                    layout = layout,
+                    null_values = {key: self._dfn['null_values'][key] for key in keep})
 
     @classmethod
-    def read(cls, filename, metadata=None, fixed_format=False, **kwargs):
+    def read(cls, filename, metadata=None, fixed_format=False, chunksize=None, cache_dfn=True, memmap=False, usecols=None, **kwargs):
         """Read the contents of an ASEG-GDF2 file.
 
         First, we parse the definition file then use that with Pandas.
@@ -111,6 +288,17 @@ class aseg_gdf2_handler(file_handler):
         ----------
         filename : str
             Data file.
+        fixed_format : bool, optional
+            Read the data file using the fixed column widths in the definition file.
+        chunksize : int, optional
+            Number of records per block. If given, the data file is not read here, use iter_chunks to read it block by block.
+        cache_dfn : bool, optional
+            Re-use a compiled copy of the definition file from the on-disk cache, by default True.
+        memmap : bool, optional
+            Memory map a fixed width data file instead of reading it. Columns are only decoded when they are indexed,
+            see column_values.
+        usecols : set of str, optional
+            Only read these DFN entries, or columns of these entries. Default is None, all entries.
 
         Returns
         -------
@@ -123,32 +311,164 @@ class aseg_gdf2_handler(file_handler):
         self.md_filename = filename.split('.dat')[0] + ".dfn"
 
         # Open the DFN and parse into a dict.
-        first_col_width, self.metadata = self.__parse_dfn_file(self.md_filename)
+        self._dfn = self.__read_dfn(self.md_filename, cache=cache_dfn)
+        if usecols is not None:
+            self._dfn = self.__project(usecols)
+        self.metadata = self._dfn['metadata']
+        self._fixed_format = fixed_format
+        self._chunksize = chunksize
+        self._memmap = None
+
+        if memmap:
+            assert chunksize is None, ValueError("Cannot use both memmap and chunksize")
+            self.__memory_map()
+        elif chunksize is None:
+            self._df = self.__read_data()
 
-        if fixed_format:
-            widths = self.__col_widths_from_fortran_format(first_col_width)
+        self.combine_metadata(metadata)
 
-            test = read_fwf(self.filename, widths=widths)
+        return self
 
-            if test.values.shape[1] != len(self.columns):
-                test.columns = ['-'] + self.columns
-            else:
-                test.columns = self.columns
+    def iter_chunks(self):
+        """Read the data file in blocks of chunksize records.
 
-            formats = self.numpy_formats
-            tmp = DataFrame()
-            for col in self.columns:
-                tmp[col] = np.asarray(test[col], dtype=formats[col])
+        Only one block of records is held in memory at a time.
 
-            self._df = tmp
+        Yields
+        ------
+        gspy.aseg_gdf_handler
+            This handler with self.df holding the current block of records.
 
-        else:
-            # Open the data file, there is no header
-            self._df = read_csv(self.filename, names=self.columns, dtype=self.numpy_formats, index_col=False, sep=r'\s+')
+        """
+        if self._chunksize is None:
+            yield self
+            return
 
-        self.combine_metadata(metadata)
+        for df in self.__read_data(chunksize=self._chunksize):
+            self._df = df
+            yield self
 
-        return self
+    @property
+    def nrecords(self):
+        if self._memmap is not None:
+            return self._nrecords
+        return self.df.shape[0]
+
+    def column_values(self, columns):
+        """Values of a column or list of columns in the data file.
+
+        When the data file is memory mapped, the values of a single DFN entry are returned as a lazily decoded array.
+
+        Parameters
+        ----------
+        columns : str or list of str
+            Column name, or list of column names.
+
+        Returns
+        -------
+        array_like
+
+        """
+        if self._memmap is None:
+            return super().column_values(columns)
+
+        if isinstance(columns, str):
+            if columns in self._lazy:
+                return self._lazy[columns]
+            return self.column_values([columns])[:, 0]
+
+        # A complete 2D entry e.g. key[0], key[1], ... key[n]
+        key = columns[0].split('[')[0]
+        if (key in self._lazy) and (list(columns) == [f"{key}[{i}]" for i in range(self._lazy[key].shape[-1])]):
+            return self._lazy[key]
+
+        # Otherwise decode the individual columns
+        for col in columns:
+            if not col in self.columns:
+                raise KeyError(col)
+
+        # Each DFN entry is decoded once, however many of its columns are requested
+        decoded = {}
+        out = []
+        for col in columns:
+            match = re.fullmatch(r'(.+)\[(\d+)\]', col)
+            key, i = match.groups() if match else (col, None)
+            if key not in decoded:
+                decoded[key] = np.asarray(self._lazy[key])
+            out.append(decoded[key] if i is None else decoded[key][:, int(i)])
+        return np.stack(out, axis=1)
+
+    def __memory_map(self):
+        """Memory map a fixed width data file and create a lazily decoded array for each DFN entry."""
+        self._memmap = np.memmap(self.filename, dtype=np.uint8, mode='r')
+
+        # Every record has the same number of bytes including the line ending.
+        newline = np.flatnonzero(self._memmap[:2**16] == ord('\n'))
+        assert newline.size > 0, ValueError(f"Could not find a complete record in {self.filename}")
+        record_length = newline[0] + 1
+        line_ending = 2 if self._memmap[newline[0] - 1] == ord('\r') else 1
+
+        _, offset, width, count, _, _ = self._dfn['layout'][-1]
+        assert offset + count * width <= record_length - line_ending, ValueError(f"Records in {self.filename} are shorter than the widths in the DFN file")
+
+        # The last record might not have a line ending
+        self._nrecords = -(-self._memmap.size // record_length)
+        assert self._memmap.size in (self._nrecords * record_length, self._nrecords * record_length - line_ending), ValueError(f"{self.filename} does not have fixed width records")
+
+        self._lazy = {key: indexing.LazilyIndexedArray(aseg_memmap_array(self._memmap, record_length, self._nrecords, *layout))
+                      for key, *layout in self._dfn['layout']}
+
+    def __read_data(self, chunksize=None):
+        """Read the data file, or return an iterator over blocks of the data file if chunksize is given."""
+        if self._fixed_format:
+            if chunksize is None:
+                with open(self.filename, 'rb') as f:
+                    return self.__decode_fixed_width(f.readlines())
+            return self.__iter_fixed_width(chunksize)
+
+        # Open the data file, there is no header
+        names = self._dfn.get('file_columns', self.columns)
+        usecols = self.columns if len(names) > len(self.columns) else None
+        return read_csv(self.filename, names=names, usecols=usecols, dtype=self.numpy_formats, index_col=False, sep=r'\s+', chunksize=chunksize)
+
+    def __iter_fixed_width(self, chunksize):
+        with open(self.filename, 'rb') as f:
+            while True:
+                lines = list(islice(f, chunksize))
+                if len(lines) == 0:
+                    return
+                yield self.__decode_fixed_width(lines)
+
+    def __decode_fixed_width(self, lines):
+        """Decode a block of fixed width records straight into typed arrays using the DFN record layout.
+
+        Parameters
+        ----------
+        lines : list of bytes
+            Records read from the data file.
+
+        Returns
+        -------
+        pandas.DataFrame
+
+        """
+        _, offset, width, count, _, _ = self._dfn['layout'][-1]
+
+        # Records as a 2D byte array, truncating line endings and zero padding short records.
+        records = np.array(lines, dtype=f'S{offset + count * width}')
+        records = records.view(np.uint8).reshape(records.size, -1)
+
+        out = {}
+        for key, offset, width, count, dtype, kind in self._dfn['layout']:
+            values = decode_fixed_width(records[:, offset:offset + count * width], width, dtype, kind)
+
+            if count == 1:
+                out[key] = values[:, 0]
+            else:
+                for i in range(count):
+                    out[f'{key}[{i}]'] = values[:, i]
+
+        return DataFrame(out, copy=False)
 
     def __parse_dfn_file(self, filename):
         """Parses the ASEG GDF2 definition file but includes fixes.
@@ -212,8 +532,7 @@ class aseg_gdf2_handler(file_handler):
         assert not b";" in line, ValueError("Trying to parse {} with multiple semicolons")
 
         # Double check for non-ascii entries and Error out
-        result = chardet.detect(line)
-        assert result['encoding'] == "ascii", ValueError("Non ascii entry(its probably the units), on line \n{}".format(line))
+        assert line.isascii(), ValueError("Non ascii entry(its probably the units), on line \n{}".format(line))
 
         # Decode the line in the DFN to utf-8
         line = line.decode("utf-8")
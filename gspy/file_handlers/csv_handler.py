@@ -1,5 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
 from copy import copy
+from io import BytesIO
 from pathlib import Path
+import numpy as np
 import pandas as pd
 from ..metadata.Metadata import Metadata
 from .file_handler_abc import file_handler
@@ -40,26 +43,162 @@ class csv_handler(file_handler):
         return 'csv'
 
     @classmethod
-    def read(cls, filename, metadata=None, **kwargs):
+    def read(cls, filename, metadata=None, n_threads=None, usecols=None, **kwargs):
+        """Read a csv file
+
+        Parameters
+        ----------
+        filename : str
+            csv file
+        metadata : dict, optional
+            Variable metadata keyed by column name
+        n_threads : int, optional
+            If greater than 1, split the file into byte ranges on line boundaries and parse them concurrently.
+            Fields must not contain quoted line breaks. Default is None, a single pandas.read_csv.
+        usecols : set of str, optional
+            Only parse these columns, or columns of these 2D variables. Default is None, all columns.
+        kwargs : dict
+            Passed to pandas.read_csv
+
+        Returns
+        -------
+        csv_handler
+
+        """
         self = cls()
 
         self.filename = filename
 
         kwargs.pop('system', None)
+        kwargs.pop('chunksize', None)
+
+        if usecols is not None:
+            kwargs['usecols'] = lambda column: self.use_column(column, usecols)
 
         # Read the csv file
-        self.df = pd.read_csv(filename, na_values=['NaN'], **kwargs)
+        if (n_threads or 1) > 1:
+            self.df = self.read_parallel(filename, n_threads, na_values=['NaN'], **kwargs)
+        else:
+            self.df = pd.read_csv(filename, na_values=['NaN'], **kwargs)
 
-        weird = (self.df.map(type) != self.df.iloc[0].apply(type)).any(axis=0)
-        for w in weird.keys():
-            if weird[w]:
-                self.df[w] = pd.to_numeric(self.df[w], errors='coerce')
+        self.coerce_mixed_columns({} if metadata is None else metadata)
 
         self.metadata = {}
         self.combine_metadata(metadata)
 
         return self
 
+    @staticmethod
+    def read_parallel(filename, n_threads, min_bytes=1048576, **kwargs):
+        """Parse a csv file with a thread pool of pandas C parsers, one per byte range of the file.
+
+        The ranges are split on line boundaries after the header. Each range is parsed with the header's column names
+        and the blocks are concatenated. Columns typed differently by different blocks are upcast by pandas.concat,
+        e.g. int and float to float, and object columns are resolved afterwards by coerce_mixed_columns.
+
+        Parameters
+        ----------
+        filename : str
+            csv file
+        n_threads : int
+            Number of threads, and at most the number of byte ranges.
+        min_bytes : int, optional
+            Smallest byte range worth handing to a thread.
+        kwargs : dict
+            Passed to pandas.read_csv. Options that change which lines are records, e.g. header or skiprows, are not supported.
+
+        Returns
+        -------
+        pandas.DataFrame
+
+        """
+        unsupported = [key for key in ('header', 'skiprows', 'skipfooter', 'nrows', 'names', 'iterator', 'comment') if key in kwargs]
+        assert len(unsupported) == 0, ValueError(f"{unsupported} are not supported when reading a csv file with n_threads")
+
+        # pandas parses the header so that duplicate column names are handled as usual
+        usecols = kwargs.pop('usecols', None)
+        columns = pd.read_csv(filename, nrows=0, **kwargs).columns
+
+        with open(filename, 'rb') as f:
+            f.readline()
+            start = f.tell()
+            size = f.seek(0, 2)
+
+            n = int(min(n_threads, max(1, (size - start) // min_bytes)))
+            offsets = [start]
+            for i in range(1, n):
+                f.seek(max(offsets[-1], start + i * (size - start) // n))
+                f.readline()
+                offsets.append(f.tell())
+            offsets.append(size)
+
+        def parse(begin, end):
+            with open(filename, 'rb') as f:
+                f.seek(begin)
+                block = f.read(end - begin)
+            if len(block.strip()) == 0:
+                return None
+            return pd.read_csv(BytesIO(block), header=None, names=columns, usecols=usecols, **kwargs)
+
+        with ThreadPoolExecutor(n) as pool:
+            blocks = list(pool.map(parse, offsets[:-1], offsets[1:]))
+
+        blocks = [block for block in blocks if block is not None]
+        if len(blocks) == 0:
+            return pd.DataFrame(columns=[column for column in columns if usecols is None or (usecols(column) if callable(usecols) else column in usecols)])
+        return pd.concat(blocks, ignore_index=True)
+
+    def coerce_mixed_columns(self, metadata, sample_size=1000):
+        """Convert columns that mix numbers with a non-numeric null value to numeric.
+
+        pandas has already typed every clean column, so only columns left with object or string dtype are checked.
+        Entries equal to the null_value declared in the metadata are treated as missing. A column with a numeric
+        dtype declared in the metadata must then parse completely. Otherwise the column is numeric only if all of its
+        first sample_size non-null entries parse as numbers, and it is left as strings if any entry of the whole column
+        does not, e.g. codes such as 100A. No entry other than the null value ever becomes NaN.
+
+        Parameters
+        ----------
+        metadata : dict
+            Variable metadata keyed by column name, or by the base name of 2D columns e.g. depth for depth[0]
+        sample_size : int, optional
+            Number of non-null entries used to infer the type of a column without a declared dtype.
+
+        Raises
+        ------
+        ValueError
+            If a column declared numeric has entries that are neither numbers nor its null value.
+
+        """
+        for column in self.df.columns:
+            values = self.df[column]
+            if values.dtype.kind in 'iufbmM':
+                continue
+
+            md = metadata.get(column, metadata.get(column.split('[')[0], {}))
+
+            # Entries equal to the declared null value are missing, whatever the type they were declared with
+            present = values.notna()
+            if 'null_value' in md and md['null_value'] != 'not_defined':
+                present &= values.astype(str).str.strip() != str(md['null_value']).strip()
+
+            declared = 'dtype' in md
+            if declared:
+                if np.dtype(md['dtype']).kind not in 'iuf':
+                    continue
+            else:
+                sample = values[present].iloc[:sample_size]
+                if (sample.size == 0) or pd.to_numeric(sample, errors='coerce').isna().any():
+                    continue
+
+            numbers = pd.to_numeric(values.where(present), errors='coerce')
+            lost = present & numbers.isna()
+            if lost.any():
+                assert not declared, ValueError(f"Column {column} is declared {md['dtype']} but has entries that are not numbers, e.g. {values[lost].iloc[0]!r}")
+                continue
+
+            self.df[column] = numbers
+
     def to_file(self, xr_dataset, filename):
 
         tmpdf = xr_dataset.xr_to_dataframe()
@@ -83,6 +83,25 @@ class file_handler(ABC):
     def nrecords(self):
         return self.df.shape[0]
 
+    def column_values(self, columns):
+        """Values of a column or list of columns in the file.
+
+        Parameters
+        ----------
+        columns : str or list of str
+            Column name, or list of column names.
+
+        Returns
+        -------
+        numpy.ndarray
+
+        Raises
+        ------
+        KeyError
+            If a column is not in the file.
+        """
+        return self.df[columns].values
+
     @abstractmethod
     def read(self):
         """Read in datafiles and any accompanying metadata into a DataFrame and dict.
@@ -94,12 +113,67 @@ class file_handler(ABC):
         """
         return None
 
+    def iter_chunks(self):
+        """Iterate over the records in the file in blocks.
+
+        Handlers that read in blocks replace self.df with each block in turn.
+        By default the whole file has already been read, so it is yielded as a single block.
+
+        Yields
+        ------
+        file_handler
+            This handler with self.df holding the current block of records.
+        """
+        yield self
+
     def combine_metadata(self, new, **kwargs):
         self.metadata = Metadata.merge(self.metadata, new, **kwargs)
 
         # for key, item in self.metadata.items():
         #     assert all([x in item for x in ('long_name', 'standard_name', 'null_value', 'units')]), ValueError(f"Variable {key} Must have at least 'long_name', 'standard_name', 'null_value', 'units'")
 
+    @staticmethod
+    def base_column(column):
+        """Name of the variable that a column belongs to
+
+        Columns of 2D variables are formatted as channel[0] or channel_0, and both belong to channel.
+
+        Parameters
+        ----------
+        column : str
+            Column name
+
+        Returns
+        -------
+        str
+
+        """
+        if '[' in column:
+            return column.split('[')[0]
+        if '_' in column:
+            uparts = column.rsplit('_',-1)
+            if uparts[-1].isdigit():
+                return '_'.join(uparts[:-1])
+        return column
+
+    @classmethod
+    def use_column(cls, column, usecols):
+        """Whether a column is needed, either by name or by the name of the variable it belongs to
+
+        Parameters
+        ----------
+        column : str
+            Column name
+        usecols : set of str or None
+            Needed column and variable names. None uses every column.
+
+        Returns
+        -------
+        bool
+
+        """
+        return (usecols is None) or (column in usecols) or (cls.base_column(column) in usecols)
+
     @property
     def column_header_counts(self):
         """Takes the header of a csv and counts repeated entries
@@ -119,14 +193,7 @@ class file_handler(ABC):
         """
         out = {}
         for col in self.columns:
-            if '[' in col:
-                col = col.split('[')[0]
-            elif '_' in col:
-                uparts = col.rsplit('_',-1)
-                ubase = '_'.join(uparts[:-1])
-                ulast = uparts[-1] if len(uparts) > 1 else ''
-                if ulast.isdigit():
-                    col = ubase
+            col = self.base_column(col)
             if col in out:
                 out[col] += 1
             else:
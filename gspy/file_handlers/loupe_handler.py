@@ -1,7 +1,7 @@
 import re
 from copy import copy
+from mmap import mmap, ACCESS_READ
 import numpy as np
-import chardet
 from os.path import isfile
 from .csv_handler import csv_handler
 from pandas import read_csv, read_fwf, DataFrame, concat, Series
@@ -18,7 +18,7 @@ class loupe_handler(csv_handler):
         return 'loupe'
 
     @classmethod
-    def read(cls, filename, metadata=None, **kwargs):
+    def read(cls, filename, metadata=None, usecols=None, **kwargs):
         """Read the contents of a Loupe data and desc file.
 
         First, we parse the definition file then use that with Pandas.
@@ -27,6 +27,9 @@ class loupe_handler(csv_handler):
         ----------
         data_file_name : str
             Data file.
+        usecols : set of str, optional
+            Only read these columns. Component wise columns are named as in the output, e.g. X_CH for CH1, CH2, ...
+            Default is None, all columns.
 
         Returns
         -------
@@ -42,51 +45,50 @@ class loupe_handler(csv_handler):
         # Open the DFN and parse into a dict.
         desc_metadata = self.__parse_desc_file(self.md_filename)
 
-        skiprows = self.__parse_header(self.filename)
+        # Find the column header and the line header rows in one pass over the bytes of the file
+        header, line_rows, n_rows = self.__scan_lines(self.filename)
 
-        # Open the data file, there is no header
-        df = read_csv(self.filename, index_col=False, sep=r'\s+', skiprows=skiprows)
+        # Only parse the needed columns, FID and C are needed to split lines and components.
+        keep = None
+        if usecols is not None:
+            suffixes = {column.split('_', 1)[1] for column in usecols if '_' in column}
+            def keep(column):
+                name = self.__rename(column)
+                return (column in ('FID', 'C')) or self.use_column(name, usecols) or (name in suffixes) or (self.base_column(name) in suffixes)
 
-        i_lines = np.squeeze(np.argwhere(['LINE' in x for x in df['FID'].values]))
-        n_lines = i_lines.size
-        line_length = np.diff(np.hstack([i_lines, len(df)])) - 2
+        # Open the data file, the line header rows are never parsed
+        df = read_csv(self.filename, index_col=False, sep=r'\s+', skiprows=[*range(header), *line_rows], usecols=keep)
 
-        line_number = np.repeat(np.arange(n_lines)+1, line_length+1)
+        # Records between consecutive line headers belong to the same line
+        line_length = np.diff(np.hstack([line_rows, n_rows])) - 1
+        assert line_length.sum() == len(df), ValueError(f"Could not match the records in {self.filename} to its line headers")
+        line_number = np.repeat(np.arange(line_rows.size)+1, line_length)
 
-        i = np.squeeze(np.argwhere(['LINE' not in x for x in df['FID'].values]))
-        df = df.iloc[i]
+        # Components are interleaved record by record, in the order of the first sounding
+        c = df['C'].to_numpy()
+        components = list(dict.fromkeys(c))
+        n_components = len(components)
+        assert c.size % n_components == 0 and np.all(c.reshape(-1, n_components) == components), ValueError(f"Components in {self.filename} are not interleaved record by record")
 
-        n_records = len(df)
-        components = [x for x in np.unique(df['C'])]
+        if 'NCH' in df:
+            del df['NCH']
 
-        del df['NCH']
+        df.rename(columns={col: self.__rename(col) for col in df.columns}, inplace=True)
 
-        renamer = {}
-        for col in df.columns:
-            split = re.findall(r"[^\W\d]+|\d+", col)
-            if len(split) > 1:
-                renamer[col] = f"{split[0]}[{np.int32(split[1])-1}]"
-
-        df.rename(columns=renamer, inplace=True)
-
-        # Entries with only an index dim
-        component_indices = [np.arange(0, n_records, np.size(components)),
-                             np.arange(1, n_records, np.size(components)),
-                             np.arange(2, n_records, np.size(components))]
-
-        index = np.arange(np.size(component_indices[0]))
-        line_number = line_number[component_indices[0]]
+        line_number = line_number[::n_components]
 
         out_df = {}
         for key in df:
+            # Each column as (soundings, components) without copying
+            values = df[key].to_numpy().reshape(-1, n_components)
+
             # Pull out measurements that are the same for each component
-            if np.all(df[key].iloc[:3] == df[key].iloc[0]):
-                out_df[key] = df[key].iloc[component_indices[0]].values
+            if np.all(values == values[:, :1]):
+                out_df[key] = values[:, 0]
             else: # This is component wise data.
+                key_split = key.split('[')[0]
                 for i, c in enumerate(components):
-                    key_split = key.split('[')[0]
-
-                    out_df[f"{c}_{key}"] = df[key].values[component_indices[i]]
+                    out_df[f"{c}_{key}"] = values[:, i]
 
                     if key_split in desc_metadata:
                         desc_metadata[f"{c}_{key_split}"] = copy(desc_metadata[key_split])
@@ -95,6 +97,9 @@ class loupe_handler(csv_handler):
         out_df['line'] = line_number
         #TODO: Parse the units from the desc file too.
 
+        if usecols is not None:
+            out_df = {key: value for key, value in out_df.items() if self.use_column(key, usecols)}
+
         self.df = DataFrame(out_df)
 
         self.metadata = metadata
@@ -103,6 +108,14 @@ class loupe_handler(csv_handler):
 
         return self
 
+    @staticmethod
+    def __rename(column):
+        """Rename numbered columns e.g. CH1 to CH[0]"""
+        split = re.findall(r"[^\W\d]+|\d+", column)
+        if len(split) > 1:
+            return f"{split[0]}[{np.int32(split[1])-1}]"
+        return column
+
     def __parse_desc_file(self, file_name):
         """Parses the ASEG GDF2 definition file but includes fixes.
 
@@ -137,13 +150,44 @@ class loupe_handler(csv_handler):
 
         return desc_md
 
-    def __parse_header(self, filename):
+    @staticmethod
+    def __scan_lines(filename):
+        """Find the rows of the column header and the line headers.
 
-        n_headers_lines = 0
-        with open(filename, 'r') as f:
-            for line in f:
-                n_headers_lines += 1
-                if 'LINE:' in line and n_headers_lines > 2:
-                    break
+        Parameters
+        ----------
+        filename : str
+            Loupe data file
+
+        Returns
+        -------
+        header : int
+            Row of the column header, the row before the first line header.
+        line_rows : numpy.ndarray of int
+            Rows of the line headers.
+        n_rows : int
+            Number of rows in the file.
 
-        return n_headers_lines - 2
+        """
+        with open(filename, 'rb') as f, mmap(f.fileno(), 0, access=ACCESS_READ) as m:
+            buffer = np.frombuffer(m, dtype=np.uint8)
+
+            # Count the newlines between consecutive line headers instead of splitting the whole file
+            line_rows = []
+            row = 0; start = 0
+            for match in re.finditer(rb'\n[ \t]*LINE', m):
+                row += np.count_nonzero(buffer[start:match.start() + 1] == 10)
+                start = match.start() + 1
+                # The first two rows are file headers
+                if row > 1:
+                    line_rows.append(row)
+
+            n_rows = row + np.count_nonzero(buffer[start:] == 10)
+            if buffer.size > 0 and buffer[-1] != 10:
+                n_rows += 1
+            del buffer
+
+        line_rows = np.asarray(line_rows, dtype=np.int64)
+        assert line_rows.size > 0, ValueError(f"Could not find the line headers in {filename}")
+
+        return line_rows[0] - 1, line_rows, n_rows
@@ -1,14 +1,14 @@
 from pprint import pprint
 import re
 import numpy as np
-from pandas import read_csv, Series, concat, Index
+from pandas import read_csv, DataFrame, Series, concat, Index
 from .xyz_handler import xyz_handler
 from ..metadata.Metadata import Metadata
 
 class workbench_handler(xyz_handler):
 
     @classmethod
-    def read(cls, filename, metadata=None, **kwargs):
+    def read(cls, filename, metadata=None, usecols=None, **kwargs):
 
         assert 'system' in kwargs, ValueError("Need to pass a system through when reading workbench data")
 
@@ -16,18 +16,18 @@ class workbench_handler(xyz_handler):
 
         self.filename = filename
 
-        self.__read(metadata, **kwargs)
+        self.__read(metadata, usecols=usecols, **kwargs)
 
         return self
 
-    def __read(self, metadata=None, **kwargs):
+    def __read(self, metadata=None, usecols=None, **kwargs):
         self.metadata, n_header = self.__parse_metadata(self.filename)
 
         system = kwargs['system'].gs.get_system_with_method('electromagnetic')
 
         mapping = {i+1:c_label for i, c_label in enumerate(system.gs.component_labels)}
 
-        self._df = self.read_data(self.filename, header=n_header, mapping=mapping)
+        self._df = self.read_data(self.filename, header=n_header, mapping=mapping, usecols=usecols)
 
         self.combine_metadata(metadata)
 
@@ -56,9 +56,7 @@ class workbench_handler(xyz_handler):
     def read_data(self, filename, **kwargs):
 
         mapping = kwargs.pop('mapping')
-
-        df = read_csv(filename, sep=r',\s+', engine='python', **kwargs)
-        df.columns = Series(df.columns.str.replace(r'[,/ ]+', '',regex=True))
+        usecols = kwargs.pop('usecols', None)
 
         # define column groups
         unique_columns = ['DATE','TIME']
@@ -68,6 +66,23 @@ class workbench_handler(xyz_handler):
                             'TILT_X',  'TILT_X_STD',
                             'TILT_Y',  'TILT_Y_STD']
 
+        # Only parse the needed gate columns, the base and geometry columns are needed to assemble the records.
+        keep = None
+        if usecols is not None:
+            def keep(column):
+                column = re.sub(r'[,/ ]+', '', column)
+                if column in base_columns + geometry_columns + ['CHANNEL_NO']:
+                    return True
+                for key, value in mapping.items():
+                    if (f'Ch{key}' in column) and ('GT' in column):
+                        splt = column.split('GT')
+                        return self.use_column(f"{splt[0].replace(f'Ch{key}', value.upper())}_{np.int32(splt[1])-1}", usecols)
+                return self.use_column(column, usecols)
+
+        # Records are separated by a comma and spaces, so only the header row needs the regex
+        df = self.read_table(filename, kwargs.pop('header'), r',\s+', ',', skipinitialspace=True, usecols=keep, **kwargs)
+        df.columns = Series(df.columns.str.replace(r'[,/ ]+', '',regex=True))
+
         # Create a base dataframe, starting with just bare coords, date, time, etc.
         # dfu = df.drop_duplicates(subset = unique_columns)[base_columns]
         # dfu = dfu.reset_index(drop=True)
@@ -118,6 +133,9 @@ class workbench_handler(xyz_handler):
         for key,df_i in df_dict.items():
             df_avg = concat([df_avg,df_i.filter(like='DBDT',axis=1)],axis=1)
 
+        if usecols is not None:
+            df_avg = df_avg[[column for column in df_avg.columns if self.use_column(column, usecols)]]
+
         return df_avg
 
 class workbench_model_handler(xyz_handler):
@@ -147,6 +165,11 @@ class workbench_model_handler(xyz_handler):
 
         self._df = self.read_data(self.filename, mapping=mapping)
 
+        # The inv, dat and syn files are merged on RECORD so every column is parsed, only the needed ones are kept.
+        usecols = kwargs.get('usecols', None)
+        if usecols is not None:
+            self._df = self._df[[column for column in self._df.columns if self.use_column(column, usecols)]]
+
         self.combine_metadata(metadata)
 
     def read_data(self, filename, **kwargs):
@@ -170,24 +193,26 @@ class workbench_model_handler(xyz_handler):
                         break
 
             # put data into dataframe
-            df = read_csv(file, header=header_row, sep=r"(?<!/)\s+", engine='python')
+            df = self.read_table(file, header_row, r"(?<!/)\s+", r"\s+")
             df.columns = Series(df.columns.str.replace("/ ", ""))
 
             if ft == 'inv':
-                df_combined = df
+                df_inv = df
+                records = Index(df['RECORD'])
+                columns = {column: df[column].to_numpy() for column in df.columns}
 
             elif (ft == 'dat') | (ft == 'syn'):
 
                 if ft == 'dat':
                     # figure out which columns are which segment and whether dual moment or single
                     dat = df.filter(like='DATA_')
-                    flg = dat.copy(deep=True)
+                    flg = dat.to_numpy(copy=True)
                     flg[flg==9999] = 0
                     flg[flg>0] = 1
-                    xprod = np.matmul(flg.T, flg).head(1)
-                    #plt.pcolormesh(xprod)
-                    colset1 = xprod.columns[xprod.any()]
-                    colset2 = xprod.columns[~xprod.any()]
+                    # Only the first row of flg.T @ flg is needed, the gates that share soundings with the first gate
+                    xprod = flg[:, 0] @ flg
+                    colset1 = dat.columns[xprod != 0]
+                    colset2 = dat.columns[xprod == 0]
 
                     single_moment = np.array_equal(colset1, colset2)
 
@@ -199,34 +224,46 @@ class workbench_model_handler(xyz_handler):
                     elif ft == 'syn':
                         prefix_dat = component + '_syn_'
 
-                    # grab correct columns to merge
-                    if single_moment:
-                        component_data = df[df['SEGMENTS']==segment][colset1.insert(0,Index(['RECORD']))]
-                        if ft == 'dat':
-                            colset1std = colset1.str.replace('DATA','DATASTD')
-                            component_std = df[df['SEGMENTS']==segment][colset1std.insert(0,Index(['RECORD']))]
-                        colset=colset1
-                    elif (segment == 1) | (segment == 3): #dual moment convention LM
-                        component_data = df[df['SEGMENTS']==segment][colset1.insert(0,Index(['RECORD']))]
-                        if ft == 'dat':
-                            colset1std = colset1.str.replace('DATA','DATASTD')
-                            component_std = df[df['SEGMENTS']==segment][colset1std.insert(0,Index(['RECORD']))]
-                        colset=colset1
-                    elif (segment == 2) | (segment == 4): #dual moment convention HM
-                        component_data = df[df['SEGMENTS']==segment][colset2.insert(0,Index(['RECORD']))]
-                        if ft == 'dat':
-                            colset2std = colset2.str.replace('DATA','DATASTD')
-                            component_std = df[df['SEGMENTS']==segment][colset2std.insert(0,Index(['RECORD']))]
-                        colset=colset2
-
-                    # merge into combined dataframe
-                    for i, col in enumerate(colset):
-                        datcol = f"{prefix_dat}{i+1}"
-                        stdcol = f"{prefix_std}{i+1}"
-                        df_combined = df_combined.merge(component_data[['RECORD',col]], how='left', on='RECORD')
-                        df_combined = df_combined.rename(columns={col: datcol})
-                        if ft == 'dat':
-                            df_combined = df_combined.merge(component_std[['RECORD',col.replace('DATA','DATASTD')]], how='left', on='RECORD')
-                            df_combined = df_combined.rename(columns={col.replace('DATA','DATASTD'): datcol.replace('data','datastd')})
+                    # grab correct columns
+                    if single_moment | (segment == 1) | (segment == 3): # dual moment convention LM
+                        colset = colset1
+                    elif (segment == 2) | (segment == 4): # dual moment convention HM
+                        colset = colset2
+
+                    # Gate matrices of this segment with one row per inv RECORD
+                    segment_df = df[df['SEGMENTS']==segment]
+                    component_data = self.__gate_matrix(records, segment_df, colset)
+                    if ft == 'dat':
+                        component_std = self.__gate_matrix(records, segment_df, colset.str.replace('DATA','DATASTD'))
 
-        return df_combined
\ No newline at end of file
+                    for i in range(colset.size):
+                        columns[f"{prefix_dat}{i+1}"] = component_data[:, i]
+                        if ft == 'dat':
+                            columns[f"{prefix_std}{i+1}"] = component_std[:, i]
+
+        # One DataFrame from all the columns, with the gate columns sharing the preallocated matrices
+        return DataFrame(columns, index=df_inv.index)
+
+    @staticmethod
+    def __gate_matrix(records, df, columns):
+        """Gate values of one segment aligned to the records of the inv file.
+
+        Parameters
+        ----------
+        records : pandas.Index
+            RECORD of each row of the inv file
+        df : pandas.DataFrame
+            Rows of the dat or syn file for one segment
+        columns : pandas.Index
+            Gate columns of the segment
+
+        Returns
+        -------
+        numpy.ndarray
+            Gate values with shape (records, columns). Records missing from the segment are NaN.
+
+        """
+        position = Index(df['RECORD']).get_indexer(records)
+        out = df[columns].to_numpy(dtype=np.float64)[position]
+        out[position < 0] = np.nan
+        return out
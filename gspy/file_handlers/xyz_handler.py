@@ -52,3 +52,32 @@ class xyz_handler(file_handler):
 
 
 
+
+    @staticmethod
+    def read_table(filename, header, header_separator, separator, **kwargs):
+        """Read a table whose header row needs a regex separator but whose records do not.
+
+        Only the header row is tokenized with the regex by the pandas python engine. The records are tokenized
+        with the C engine using a separator it supports natively. Floats are parsed with round_trip precision so
+        the values match the python engine.
+
+        Parameters
+        ----------
+        filename : str
+            xyz file
+        header : int
+            Row of the column names, the records follow it.
+        header_separator : str
+            Regex separator of the header row, e.g. "(?<!/)\\s+" to keep "/ LINE_NO" together.
+        separator : str
+            Separator of the records supported by the C engine, e.g. "," or "\\s+".
+        kwargs : dict
+            Passed to pandas.read_csv when reading the records, e.g. usecols or skipinitialspace.
+
+        Returns
+        -------
+        pandas.DataFrame
+
+        """
+        columns = read_csv(filename, header=header, nrows=0, sep=header_separator, engine='python').columns
+        return read_csv(filename, header=None, skiprows=header+1, names=columns, index_col=False, sep=separator, engine='c', float_precision='round_trip', **kwargs)
@@ -1,16 +1,22 @@
 from copy import deepcopy
 from pprint import pprint
-from numpy import arange, asarray, diff, isnan, mean, median, nanmax, nanmin, ndim, r_, std, zeros, nan, min,max
+from numpy import arange, asarray, diff, isnan, mean, median, ndim, r_, std, zeros, nan, min,max
 from numpy import any as npany
 from numpy import dtype as npdtype
 from xarray import DataArray as xr_DataArray
 from xarray import DataTree as xr_DataTree
 from xarray import register_dataarray_accessor
+from xarray.core.indexing import ExplicitlyIndexed
 from ..metadata.Metadata import Metadata
+from ..options import OPTIONS
+from ..utilities.maths import block_min_max, combine_min_max, min_max
 from pandas import Series
 
 default_metadata = ('standard_name', 'long_name', 'null_value', 'units')
 
+# Placeholder for derived attributes that are computed when writing, see gspy.set_options
+pending = 'pending'
+
 @register_dataarray_accessor("gs")
 class DataArray:
     """Accessor for xarray.DataArray.
@@ -76,7 +82,7 @@ class DataArray:
         attrs = coordinate.attrs.copy()
         attrs['standard_name'] = coordinate.attrs['standard_name'] + '_bounds'
         attrs['long_name'] = coordinate.attrs['long_name'] + ' cell boundaries'
-        attrs['valid_range'] = cls.valid_range(bounds, name, **kwargs)
+        attrs['valid_range'] = pending if OPTIONS['deferred_attributes'] else cls.valid_range(bounds, name, **kwargs)
 
         self = xr_DataArray(bounds,
                             dims=kwargs.pop('dims', None),
@@ -156,14 +162,25 @@ class DataArray:
             if nd:
                 assert "dimensions" in kwargs, ValueError(f"dimensions must be specified for variable {name}")
 
+        # Lazily indexed values, e.g. from a memory mapped file, stay lazy in the DataArray.
+        lazy = isinstance(values, ExplicitlyIndexed)
+
         if nd > 0:
-            if not isinstance(values[0], str):
-                kwargs['valid_range'] = cls.valid_range(values, name=name, **kwargs)
+            if lazy:
+                numeric = values.dtype.kind in 'iuf'
+            else:
+                numeric = not isinstance(values[0], str)
+
+            if numeric:
+                if OPTIONS['deferred_attributes']:
+                    kwargs['valid_range'] = pending
+                else:
+                    kwargs['valid_range'] = cls.valid_range(asarray(values) if lazy else values, name=name, **kwargs)
 
         kwargs['grid_mapping'] = kwargs.pop('grid_mapping', 'spatial_ref')
 
         if 'dtype' in kwargs:
-            values = values.astype(kwargs['dtype'])
+            values = (asarray(values) if lazy else values).astype(kwargs['dtype'])
 
         if isinstance(values, int) or isinstance(values, float):
             values = [values]
@@ -238,21 +255,73 @@ class DataArray:
         -------
         array_like
             [nanmin(values), nanmax(values)]
+
+        See Also
+        --------
+        gspy.utilities.maths.min_max : Single pass, null aware reduction used to compute the range.
         """
 
         nv = kwargs.get('null_value', 'not_defined')
 
         if isinstance(nv, str):
-            values = asarray(values, dtype=kwargs.get('dtype', "float64"))
-            valid_range = asarray([nanmin(values), nanmax(values)], dtype=kwargs.get('dtype', None))
+            valid_range = asarray(min_max(values), dtype=kwargs.get('dtype', "float64"))
         else:
             assert not isinstance(nv, str), ValueError((f"Numerical null_value defined as a string in metadata file for variable {kwargs['standard_name']}.\n"
                                                        "Please make it a number. If this number is in scientific notation please use the following format x.xe+10 or x.xe-10."))
-            tmp = values[values != nv]
-            valid_range = asarray([nanmin(tmp), nanmax(tmp)], dtype=kwargs.get('dtype', None))
+            valid_range = asarray(min_max(values, null_value=nv), dtype=kwargs.get('dtype', None))
 
         return valid_range
 
+    @staticmethod
+    def has_pending_attrs(variable):
+        """Whether a variable has derived attributes waiting to be computed
+
+        Parameters
+        ----------
+        variable : xarray.Variable or xarray.DataArray
+
+        Returns
+        -------
+        bool
+
+        """
+        vr = variable.attrs.get('valid_range', None)
+        return isinstance(vr, str) and vr == pending
+
+    @classmethod
+    def compute_pending_attrs(cls, variables):
+        """Compute the pending derived attributes of several variables in one pass.
+
+        Numpy backed variables are reduced directly. Dask backed variables are reduced block by block,
+        and all of their blocks are computed together so that shared inputs are only read once.
+
+        Parameters
+        ----------
+        variables : dict of xarray.Variable
+            Variables whose attrs are updated in place.
+
+        """
+        def metadata(variable):
+            return {key: variable.attrs[key] for key in ('null_value', 'dtype', 'standard_name') if key in variable.attrs}
+
+        lazy = {}
+        for name, variable in variables.items():
+            if variable.chunks is not None and variable.dtype.kind in 'iuf':
+                # Only dask backed variables have chunks
+                from dask import delayed
+                nv = variable.attrs.get('null_value', 'not_defined')
+                lazy[name] = [delayed(block_min_max)(block, None if isinstance(nv, str) else nv) for block in variable.data.to_delayed().ravel()]
+            else:
+                variable.attrs['valid_range'] = cls.valid_range(variable.values, name, **metadata(variable))
+
+        if len(lazy) > 0:
+            from dask import compute
+            results, = compute(lazy)
+            for name, blocks in results.items():
+                variable = variables[name]
+                # The null value was removed by the blocks, the range only needs casting
+                variable.attrs['valid_range'] = cls.valid_range(asarray(combine_min_max(blocks, variable.dtype.kind)), name, **metadata(variable))
+
     @property
     def label(self):
         return f"{self.long_name} [{self.units}]"
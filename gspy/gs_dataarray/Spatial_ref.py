@@ -1,6 +1,5 @@
 import warnings
 
-from ..utilities.CRS import CRS
 from xarray import DataArray, register_dataarray_accessor
 from ..metadata.Metadata import Metadata
 
@@ -35,6 +34,8 @@ class Spatial_ref:
 
     @classmethod
     def from_dict(cls, kwargs):
+        from ..utilities.CRS import CRS
+
         if ("wkid" in kwargs) and (kwargs.get("wkid", "None") != "None" and (kwargs.get("wkid", "None")) != ""):
             val = kwargs["wkid"]
             if 'EPSG' in str(val):
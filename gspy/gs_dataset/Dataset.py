@@ -1,6 +1,6 @@
 import os
 import json
-import matplotlib.pyplot as plt
+import warnings
 
 from pprint import pprint
 import numpy as np
@@ -276,28 +276,56 @@ class Dataset:
         return self.add_variable_from_dict(name, **kwargs)
 
     def add_variable_from_dict(self, name, **kwargs):
+        for key, value in self.variables_from_dict(name, **kwargs).items():
+            self._obj[key] = value
+        return self._obj
+
+    def variables_from_dict(self, name, **kwargs):
+        """Create the variables defined by a dictionary without adding them to the Dataset.
+
+        Allows many variables to be created against the same Dataset and then added in one go.
+
+        Parameters
+        ----------
+        name : str
+            Name of the variable
+        values : array_like
+            Values of the variable
+
+        Returns
+        -------
+        dict
+            xarray.DataArray for each variable. Non-uniform sized lists of arrays create one variable per label.
+
+        See Also
+        --------
+        Dataset.add_variable_from_dict_np : for pertinent keywords
+
+        """
         values = kwargs.pop('values', None)
         if values is None:
-            return self.add_variable_from_dict_np(name, values=values, **kwargs)
+            return dict((self._variable_from_dict_np(name, values=values, **kwargs),))
 
         # Catch scalars
         if not isinstance(values, list):
-            return self.add_variable_from_dict_np(name, values=values, **kwargs)
+            return dict((self._variable_from_dict_np(name, values=values, **kwargs),))
 
         # Catch homogenous shape arrays.
         if same_length_lists(values): # Assume non 1D is list of lists.
-            return self.add_variable_from_dict_np(name, values=values, **kwargs)
+            return dict((self._variable_from_dict_np(name, values=values, **kwargs),))
 
         # Catch non-uniform sized lists of array
         assert 'label' in kwargs, ValueError(f"Need label in metadata for coordinate inhomogenous sized lists {name}")
         dimensions = kwargs.pop('dimensions')[1]
+        out = {}
         for this, label in zip(values, kwargs.pop('label')):
             if 'prefix' in kwargs:
                 label = f"{kwargs['prefix']}_{label}".lower()
 
             kwargs['values'] = this
-            self._obj = self.add_variable_from_dict_np(f"{label}_{name}", dimensions=f"{label}_{dimensions}", **kwargs)
-        return self._obj
+            key, value = self._variable_from_dict_np(f"{label}_{name}", dimensions=f"{label}_{dimensions}", **kwargs)
+            out[key] = value
+        return out
 
     def add_variable_from_dict_np(self, name, **kwargs):
         """Add a variable to the Dataset
@@ -329,6 +357,21 @@ class Dataset:
         ValueError
             If the shape of the values does not match the specified dimensions.
 
+        """
+        name, value = self._variable_from_dict_np(name, **kwargs)
+        self._obj[name] = value
+
+        return self._obj
+
+    def _variable_from_dict_np(self, name, **kwargs):
+        """Create a variable with coords matching its dims.
+
+        Returns
+        -------
+        name : str
+            Name of the variable, including any prefix.
+        xarray.DataArray
+
         """
         values = kwargs['values']
 
@@ -360,9 +403,7 @@ class Dataset:
         if 'label' in kwargs:
             kwargs.pop('label')
 
-        self._obj[name] = DataArray.from_values(name, **kwargs)
-
-        return self._obj
+        return name, DataArray.from_values(name, **kwargs)
 
     def _add_nv(self):
         """Adds a required dimension to the Dataset when bounds need to be specified.
@@ -469,14 +510,15 @@ class Dataset:
             Plotting handle
 
         """
+        import matplotlib.pyplot as plt
+
         ax = kwargs.pop('ax', plt.gca())
 
         x = kwargs.pop('x', 'x')
 
         if x == 'distance':
-            x, y = self._obj['x'].values, self._obj['y'].values
-            x = np.hstack([0.0, np.sqrt(np.cumsum(np.diff(x))**2.0 + np.cumsum(np.diff(y))**2.0)])
-            xlabel = f"Distance ({self._obj['x'].attrs['units']})"
+            x = self.distance_along_line
+            xlabel = f"Distance ({x.attrs['units']})"
         else:
             x = self._obj[x]
             xlabel = f"x\n{self._obj['x'].gs.label}"
@@ -506,6 +548,8 @@ class Dataset:
             Plotting handle
 
         """
+        import matplotlib.pyplot as plt
+
         ax = kwargs.pop('ax', plt.gca())
 
         x = kwargs.pop('x', 'x')
@@ -582,13 +626,40 @@ class Dataset:
         md = Metadata(kwargs).flatten()
         self._obj.attrs.update(md)
 
-    def to_netcdf(self, *args, **kwargs):
+    def compute_pending_attrs(self):
+        """Compute any derived attributes, e.g. valid_range, that were deferred when variables were added.
+
+        The attrs of the Dataset's variables are updated in place so the attributes are only computed once.
+
+        Returns
+        -------
+        xarray.Dataset
+
+        See Also
+        --------
+        gspy.set_options : To defer derived attributes
+
+        """
+        variables = {key: var for key, var in self._obj.variables.items() if DataArray.has_pending_attrs(var)}
+        if len(variables) > 0:
+            DataArray.compute_pending_attrs(variables)
+        return self._obj
+
+    def to_netcdf(self, *args, overviews=0, overview_method='mean', **kwargs):
         """Write the survey to a netcdf file
 
+        Any pending derived attributes are computed before writing.
+
         Parameters
         ----------
         args : list
             Arguments to pass to xarray.Dataset.to_netcdf
+        overviews : int, optional
+            Number of overview levels written for a raster, see Dataset.overview. The raster must be written
+            to a group, e.g. group='raster', and the levels are written to the sibling groups
+            raster_overview_1 ... raster_overview_n. Default is 0.
+        overview_method : str, optional
+            'mean' or 'nearest' decimation of the overview levels. Default is 'mean'.
         kwargs : dict
             Keyword arguments to pass to xarray.Dataset.to_netcdf
 
@@ -600,8 +671,65 @@ class Dataset:
         kwargs["format"] = kwargs.get("format", "NETCDF4")
         kwargs["engine"] = kwargs.get("engine", "h5netcdf")
 
-        self._obj.to_netcdf(*args, **kwargs)
+        self.compute_pending_attrs()
+
+        levels, groups = self.__overviews(overviews, overview_method, kwargs.get('group', None))
+        out = self._obj
+        if len(levels) > 0:
+            out = out.copy()
+            out.attrs['overview_groups'] = groups
+        out.to_netcdf(*args, **kwargs)
+
+        # Overview levels are sibling groups in the same file
+        kwargs.update(mode='a')
+        for level, group in zip(levels, groups):
+            kwargs['group'] = group
+            level.to_netcdf(*args, **kwargs)
+
+    def __overviews(self, n_levels, method, group):
+        """Overview levels of a raster and the groups they are written to"""
+        if (n_levels == 0) or not (('x' in self._obj.dims) and ('y' in self._obj.dims)):
+            return [], []
+
+        # Levels in groups under the root would be children of the raster, with x and y of other sizes
+        group = '' if group is None else group.strip('/')
+        assert group, ValueError("Overview levels are written as sibling groups of the raster, give a group other than the root to write overviews")
+
+        from .Raster import Raster
 
+        return Raster(self._obj).build_overviews(n_levels, method), [f"/{group}_overview_{i+1}" for i in range(n_levels)]
+
+    def overview(self, level):
+        """Read an overview level of a raster
+
+        Overview levels are written next to the raster by Dataset.to_netcdf, Dataset.write_zarr or
+        Container.to_netcdf with overviews > 0. Each level halves the rows and columns of the previous one.
+
+        Parameters
+        ----------
+        level : int
+            Overview level, 0 is the full resolution raster.
+
+        Returns
+        -------
+        xarray.Dataset
+
+        """
+        if level == 0:
+            return self._obj
+
+        groups = np.atleast_1d(self._obj.attrs.get('overview_groups', []))
+        assert 0 < level <= groups.size, ValueError(f"level must be between 0 and {groups.size}")
+
+        source = self._obj.encoding.get('source', None)
+        assert source is not None, ValueError("Overview levels are read from the file the raster was opened from")
+
+        if os.path.isdir(source):
+            from xarray import open_zarr
+            return open_zarr(source, group=str(groups[level-1]))
+
+        from .. import open_dataset
+        return open_dataset(source, group=str(groups[level-1]))
 
     # def write_netcdf(self, filename, group, **kwargs):
     #     """Write to netcdf file
@@ -627,7 +755,7 @@ class Dataset:
 
     #     self._obj.to_netcdf(filename, mode=mode, group=group, **kwargs)
 
-    def write_zarr(self, filename, group, **kwargs):
+    def write_zarr(self, filename, group, overviews=0, overview_method='mean', **kwargs):
         """Write to netcdf file
 
         Parameters
@@ -636,6 +764,10 @@ class Dataset:
             Path to the file
         group : str
             Netcdf group name to write to
+        overviews : int, optional
+            Number of overview levels written for a raster, see Dataset.overview. Default is 0.
+        overview_method : str, optional
+            'mean' or 'nearest' decimation of the overview levels. Default is 'mean'.
 
         """
         mode = 'a' if os.path.isfile(filename) else 'w'
@@ -646,7 +778,15 @@ class Dataset:
                 if 'grid_mapping' in self._obj[var].attrs:
                     del self._obj[var].attrs['grid_mapping']
 
-        self._obj.to_zarr(filename, mode=mode, group=group, **kwargs)
+        levels, groups = self.__overviews(overviews, overview_method, group)
+        out = self._obj
+        if len(levels) > 0:
+            out = out.copy()
+            out.attrs['overview_groups'] = groups
+        out.to_zarr(filename, mode=mode, group=group, **kwargs)
+
+        for level, level_group in zip(levels, groups):
+            level.to_zarr(filename, mode='a', group=level_group, **kwargs)
 
     def write_ncml(self, file, name, indent, no_end=False):
 
@@ -722,14 +862,421 @@ class Dataset:
 
             return ds._obj
 
-    def subset(self, key, value, **kwargs):
-        return self._obj.where(self._obj[key]==value, **kwargs)
+    def subset(self, key=None, value=None, variables=None, drop=None, **predicates):
+        """Records matching every predicate
+
+        The positions of the matching records are computed once from the predicate variables only, and the
+        Dataset is selected with isel, a slice view when the positions are contiguous. Unlike where, no
+        variable is copied to full size or promoted to float.
+
+        Important
+        ---------
+        Only the matching records are returned. Earlier versions returned ``where(ds[key] == value)``, the
+        full size Dataset with NaN in the records that do not match, unless drop=True was given.
+
+        Parameters
+        ----------
+        key : str, optional
+            Variable to compare with value, kept for ``subset('line', 10010)``.
+        value : optional
+            Value of key to select.
+        variables : list of str, optional
+            Only these variables, their coordinates and the spatial_ref are kept. Default is every variable.
+        drop : bool, optional
+            Deprecated and ignored, the records that do not match are always dropped.
+        predicates : dict, optional
+            Variable name and test of its values
+            * scalar: equal to the value
+            * tuple: (low, high) range, edges included, None for an open edge
+            * list or array: any of the values
+            * callable: takes the DataArray and returns a boolean mask
+
+        Returns
+        -------
+        xarray.Dataset
+            Matching records only, with as many records as match.
+
+        Examples
+        --------
+        >>> ds.gs.subset(line=10010, height=(None, 50.0), variables=['dtm', 'height'])
+
+        """
+        if drop is not None:
+            warnings.warn("subset only returns the matching records, drop is ignored and will be removed", DeprecationWarning, stacklevel=2)
+
+        if key is not None:
+            predicates[key] = value
+
+        # Keywords of where, e.g. other, are not predicates
+        unknown = [name for name in predicates if name not in self._obj]
+        assert len(unknown) == 0, ValueError(f"Predicates must be variables of the Dataset, {unknown} are not")
+
+        ds = self._obj
+        if variables is not None:
+            keep = [*([variables] if isinstance(variables, str) else variables), *(['spatial_ref'] if 'spatial_ref' in ds else [])]
+            ds = ds[keep]
+
+        if len(predicates) == 0:
+            return ds
+
+        # A single line number can use the line index
+        if 'line_index' in self._obj and len(predicates) == 1:
+            (name, test), = predicates.items()
+            if name == self._obj['line_index'].attrs['key'] and np.ndim(test) == 0 and not callable(test) and test in self._obj['line_index'].values:
+                out = self.line(test)
+                return out if variables is None else out[keep]
+
+        dims = {self._obj[name].dims for name in predicates}
+        assert len(dims) == 1 and len(next(iter(dims))) == 1, ValueError(f"Predicates must be on variables sharing a single dimension, got {dims}")
+        dim = next(iter(dims))[0]
+
+        mask = np.ones(self._obj.sizes[dim], dtype=bool)
+        for name, test in predicates.items():
+            da = self._obj[name]
+            if callable(test):
+                mask &= np.asarray(test(da), dtype=bool)
+            elif isinstance(test, tuple):
+                low, high = test
+                values = da.values
+                if low is not None:
+                    mask &= values >= low
+                if high is not None:
+                    mask &= values <= high
+            elif np.ndim(test) > 0:
+                mask &= np.isin(da.values, test)
+            else:
+                mask &= da.values == test
+
+        positions = np.flatnonzero(mask)
+        if positions.size > 0 and positions[-1] - positions[0] + 1 == positions.size:
+            return ds.isel({dim: slice(positions[0], positions[-1] + 1)})
+        return ds.isel({dim: positions})
+
+    def interpolate(self, dx, dy, variable, method='idw', x='x', y='y', bounds=None, tile_size=512, buffer=None,
+                    max_distance=None, executor=None, n_workers=None, **kwargs):
+        """Grid a variable of scattered data onto a regular grid
+
+        The grid is north up with pixel edges on multiples of dx and dy, in the spatial_ref of the Dataset.
+        Gridding is done tile by tile, see gspy.utilities.gridding.grid.
+
+        Parameters
+        ----------
+        dx, dy : float
+            Cell size along x and y.
+        variable : str
+            Variable to grid. A variable with a second dimension, e.g. a model with layers, is gridded one
+            slice at a time into a 3D raster.
+        method : str, optional
+            * 'idw' inverse distance weighting of the nearest points found with a KD-tree.
+            * 'natural' linear interpolation over the Delaunay triangulation of the points.
+            * 'minimum_curvature' the smoothest surface through the points.
+            Default is 'idw'.
+        x, y : str, optional
+            Names of the coordinates of the points. Default is 'x' and 'y'.
+        bounds : list of float, optional
+            [xmin, xmax, ymin, ymax] of the grid. Default is the extent of the points.
+        tile_size : int, optional
+            Number of rows and columns of cells gridded together. Default is 512.
+        buffer : int, optional
+            Number of cells around each tile whose points are also used. Default is tile_size // 4.
+        max_distance : float, optional
+            Cells further than this from every point are NaN. Default is None.
+        executor : str or executor, optional
+            'thread', 'process', 'dask' or an object with a submit method, see gspy.utilities.get_executor.
+            Default is None, tiles are gridded one after another.
+        n_workers : int, optional
+            Number of workers when the executor is created here.
+        kwargs : dict
+            Passed to the gridding method, e.g. power, k and radius for 'idw', or tension for 'minimum_curvature'.
+
+        Returns
+        -------
+        xarray.Dataset
+            Raster with x and y dimensions containing the gridded variable.
+
+        See Also
+        --------
+        gspy.utilities.gridding : The gridding methods
+
+        """
+        from ..utilities.gridding import grid
+
+        da = self._obj[variable]
+        index = self._obj[x].dims[0]
+        stack = [dim for dim in da.dims if dim != index]
+        assert index in da.dims, ValueError(f"{variable} must be along the same dimension as {x} and {y}")
+        assert len(stack) < 2, ValueError(f"Can only grid variables with at most one dimension other than {index}")
+
+        px, py = self._obj[x].values, self._obj[y].values
+
+        if bounds is None:
+            bounds = [np.nanmin(px), np.nanmax(px), np.nanmin(py), np.nanmax(py)]
 
-    def interpolate(self, dx, dy, variable, **kwargs):
-        from geobipy import Point
+        # Pixel edges on multiples of the cell size, rows from north to south
+        x0, x1 = np.floor(bounds[0] / dx) * dx, np.ceil(bounds[1] / dx) * dx
+        y0, y1 = np.floor(bounds[2] / dy) * dy, np.ceil(bounds[3] / dy) * dy
+        x_nodes = x0 + dx * (np.arange(max(1, int(np.rint((x1 - x0) / dx)))) + 0.5)
+        y_nodes = y1 - dy * (np.arange(max(1, int(np.rint((y1 - y0) / dy)))) + 0.5)
 
-        pc3d = Point(self['x'], self['y'], None)
-        pc3d.interpolate()
+        values = da.transpose(index, ...).values.astype(np.float64)
+        null_value = da.attrs.get('null_value', 'not_defined')
+        if not isinstance(null_value, str):
+            values[values == null_value] = np.nan
+
+        options = dict(method=method, tile_size=tile_size, buffer=buffer, max_distance=max_distance, executor=executor, n_workers=n_workers, **kwargs)
+        if len(stack) == 0:
+            gridded = grid(px, py, values, x_nodes, y_nodes, **options)
+        else:
+            gridded = np.stack([grid(px, py, values[:, i], x_nodes, y_nodes, **options) for i in range(values.shape[1])])
+
+        # Raster on the spatial ref of the data
+        out = xr_Dataset(attrs={'content': f"{variable} gridded with {method}"})
+        out = out.gs.set_spatial_ref(self.spatial_ref.copy())
+        out['spatial_ref'].attrs['GeoTransform'] = [x0, dx, 0.0, y1, 0.0, -dy]
+
+        for name, coordinate, nodes in (('x', x, x_nodes), ('y', y, y_nodes)):
+            attrs = {key: value for key, value in self._obj[coordinate].attrs.items() if key not in ('standard_name', 'valid_range', 'grid_mapping', 'bounds')}
+            attrs = {'long_name': name, 'units': 'not_defined', 'null_value': 'not_defined', **attrs}
+            out = out.gs.add_coordinate_from_values(name, values=nodes, is_projected=self.is_projected, is_dimension=True, **attrs)
+
+        if len(stack) > 0:
+            coordinate = self._obj[stack[0]].copy() if stack[0] in self._obj.coords else xr_DataArray(np.arange(da.sizes[stack[0]]), dims=stack[0])
+            coordinate.attrs.pop('bounds', None)
+            out = out.assign_coords({stack[0]: coordinate})
+
+        attrs = {key: value for key, value in da.attrs.items() if key not in ('valid_range', 'grid_mapping')}
+        return out.gs.add_variable_from_values(variable, values=gridded, dimensions=[*stack, 'y', 'x'], **attrs)
+
+    def build_spatial_index(self, node_size=64, x='x', y='y'):
+        """Build a packed Hilbert R-tree over the point coordinates for query_bbox and nearest
+
+        The index is stored as the variables spatial_index and spatial_index_bounds, so it is written with
+        the Dataset and used straight away when the file is opened again. A checksum of the coordinates is kept
+        with it, queries refuse an index whose points have since been reordered or changed.
+
+        Important
+        ---------
+        Make sure you call this method into a return variable
+
+                ``ds = ds.gs.build_spatial_index()``
+
+        Parameters
+        ----------
+        node_size : int, optional
+            Number of entries in each node of the tree. Default is 64.
+        x, y : str, optional
+            Names of the coordinates of the points. Default is 'x' and 'y'.
+
+        Returns
+        -------
+        xarray.Dataset
+            Dataset with the spatial index attached.
+
+        See Also
+        --------
+        gspy.utilities.spatial_index.build : The packing of the tree
+
+        """
+        from ..utilities.spatial_index import build, fingerprint
+
+        assert self._obj[x].ndim == 1 and self._obj[x].dims == self._obj[y].dims, ValueError(f"{x} and {y} must share a single dimension")
+        order, bounds, offsets = build(self._obj[x].values, self._obj[y].values, node_size)
+
+        ds = self._obj.drop_vars(['spatial_index', 'spatial_index_bounds'], errors='ignore')
+        ds['spatial_index'] = xr_DataArray(order, dims='spatial_index_point',
+                                           attrs={'standard_name': 'spatial_index',
+                                                  'long_name': f'Positions along {self._obj[x].dims[0]} in Hilbert order',
+                                                  'units': 'not_defined',
+                                                  'null_value': 'not_defined',
+                                                  'x': x,
+                                                  'y': y,
+                                                  'n_points': self._obj[x].size,
+                                                  'fingerprint': np.int64(fingerprint(self._obj[x].values, self._obj[y].values)),
+                                                  'node_size': node_size,
+                                                  'level_offsets': offsets})
+        ds['spatial_index_bounds'] = xr_DataArray(bounds, dims=('spatial_index_node', 'spatial_index_box'),
+                                                  attrs={'standard_name': 'spatial_index_bounds',
+                                                         'long_name': 'xmin, ymin, xmax, ymax of the nodes of the spatial index',
+                                                         'units': self._obj[x].attrs.get('units', 'not_defined'),
+                                                         'null_value': 'not_defined'})
+        return ds
+
+    def __spatial_index(self):
+        """Arrays of the stored spatial index, or of one built in memory if the Dataset has none"""
+        from ..utilities.spatial_index import fingerprint
+
+        # The index built for a one-off query is not kept, the accessor keeps wrapping the same Dataset
+        stored = 'spatial_index' in self._obj
+        ds = self._obj if stored else self.build_spatial_index()
+        attrs = ds['spatial_index'].attrs
+        x, y = self._obj[attrs['x']], self._obj[attrs['y']]
+        assert x.size == attrs['n_points'], ValueError(f"spatial_index was built for {attrs['n_points']} points but {attrs['x']} has {x.size}, call build_spatial_index again")
+        px, py = np.asarray(x.values, dtype=np.float64), np.asarray(y.values, dtype=np.float64)
+
+        # A stored index is checked against the coordinates once for each set of variables, records reordered or
+        # changed after the index was built would otherwise give wrong positions
+        checked = (x.variable, y.variable, ds['spatial_index'].variable)
+        previous = getattr(self, '_checked_spatial_index', (None, None, None))
+        if stored and (previous[0] is not checked[0] or previous[1] is not checked[1] or previous[2] is not checked[2]):
+            assert fingerprint(px, py) == attrs.get('fingerprint'), ValueError(f"{attrs['x']} and {attrs['y']} have changed since spatial_index was built, call build_spatial_index again")
+            self._checked_spatial_index = checked
+
+        return (ds['spatial_index'].values, ds['spatial_index_bounds'].values, np.asarray(attrs['level_offsets']),
+                int(attrs['node_size']), px, py)
+
+    def query_bbox(self, xmin, xmax, ymin, ymax):
+        """Points inside a bounding box
+
+        Uses the spatial index from build_spatial_index, which is built in memory if the Dataset has none.
+
+        Parameters
+        ----------
+        xmin, xmax, ymin, ymax : float
+            Bounding box in the coordinates of the points, edges included.
+
+        Returns
+        -------
+        numpy.ndarray of int
+            Sorted positions of the points along their dimension, e.g. for ``ds.isel(index=ds.gs.query_bbox(...))``
+
+        """
+        from ..utilities.spatial_index import query_bbox
+
+        return query_bbox(*self.__spatial_index(), xmin, xmax, ymin, ymax)
+
+    def nearest(self, points, k=1):
+        """k nearest points to each of a set of points
+
+        Uses the spatial index from build_spatial_index, which is built in memory if the Dataset has none.
+
+        Parameters
+        ----------
+        points : array_like
+            Query points with shape (n, 2) or (2,) in the coordinates of the points.
+        k : int, optional
+            Number of neighbours. Default is 1.
+
+        Returns
+        -------
+        distance : numpy.ndarray
+            Distances with shape (n, k) ordered nearest first, or (n,) if k is 1.
+        index : numpy.ndarray of int
+            Positions of the neighbours along the dimension of the points, with the same shape as distance.
+
+        """
+        from ..utilities.spatial_index import nearest
+
+        return nearest(*self.__spatial_index(), points, k)
+
+    def build_line_index(self, key='line', sort=False):
+        """Build an index of the contiguous runs of records of each line for line and iter_lines
+
+        The index is stored as the variables line_index, the line number of each run, and line_index_bnds,
+        the start and stop positions of each run, ordered by line. It is written with the Dataset.
+
+        Important
+        ---------
+        Make sure you call this method into a return variable
+
+                ``ds = ds.gs.build_line_index()``
+
+        Parameters
+        ----------
+        key : str, optional
+            Name of the variable holding the line numbers. Default is 'line'.
+        sort : bool, optional
+            Reorder the records by line, keeping the order of the records within each line,
+            when a line is split into several runs. Every line is then a single slice. Default is False.
+
+        Returns
+        -------
+        xarray.Dataset
+            Dataset with the line index attached.
+
+        """
+        assert self._obj[key].ndim == 1, ValueError(f"{key} must have a single dimension")
+        dim = self._obj[key].dims[0]
+        ds = self._obj.drop_vars(['line_index', 'line_index_bnds'], errors='ignore')
+
+        lines = ds[key].values
+        starts = r_[0, np.flatnonzero(lines[1:] != lines[:-1]) + 1]
+
+        if sort and np.unique(lines[starts]).size < starts.size:
+            # A spatial index refers to the previous order of the records
+            ds = ds.drop_vars(['spatial_index', 'spatial_index_bounds'], errors='ignore').isel({dim: np.argsort(lines, kind='stable')})
+            lines = ds[key].values
+            starts = r_[0, np.flatnonzero(lines[1:] != lines[:-1]) + 1]
+
+        stops = r_[starts[1:], lines.size]
+        order = np.lexsort((starts, lines[starts]))
+
+        ds['line_index'] = xr_DataArray(lines[starts[order]], dims='line_index_run',
+                                        attrs={'standard_name': 'line_index',
+                                               'long_name': f'{key} of each run of records along {dim}',
+                                               'units': 'not_defined',
+                                               'null_value': 'not_defined',
+                                               'key': key,
+                                               'n_points': lines.size,
+                                               'bounds': 'line_index_bnds'})
+        ds['line_index_bnds'] = xr_DataArray(np.c_[starts[order], stops[order]], dims=('line_index_run', 'nv'),
+                                             attrs={'standard_name': 'line_index_bnds',
+                                                    'long_name': f'Start and stop positions along {dim} of each run of records',
+                                                    'units': 'not_defined',
+                                                    'null_value': 'not_defined'})
+        return ds
+
+    def __line_index(self):
+        """Line numbers and bounds of the stored line index, or of one built in memory if the Dataset has none"""
+        # The index built for a one-off query is not kept, the accessor keeps wrapping the same Dataset
+        ds = self._obj if 'line_index' in self._obj else self.build_line_index()
+        key = ds['line_index'].attrs['key']
+        assert self._obj[key].size == ds['line_index'].attrs['n_points'], ValueError(f"line_index was built for {ds['line_index'].attrs['n_points']} records but {key} has {self._obj[key].size}, call build_line_index again")
+        return self._obj[key].dims[0], ds['line_index'].values, ds['line_index_bnds'].values
+
+    def __line(self, dim, bounds):
+        """Records of the runs with bounds, as a slice view when there is a single run"""
+        ds = self._obj.drop_vars(['line_index', 'line_index_bnds'], errors='ignore')
+        if bounds.shape[0] == 1:
+            return ds.isel({dim: slice(*bounds[0])})
+        return ds.isel({dim: np.concatenate([arange(*run) for run in bounds])})
+
+    def line(self, number):
+        """Records of a line
+
+        Uses the line index from build_line_index, which is built in memory if the Dataset has none.
+        Build it first when extracting many lines.
+
+        Parameters
+        ----------
+        number : int or float
+            Line number
+
+        Returns
+        -------
+        xarray.Dataset
+            Records of the line, selected with isel and without copies when the line is a single run.
+
+        """
+        dim, lines, bounds = self.__line_index()
+        i0, i1 = np.searchsorted(lines, number, side='left'), np.searchsorted(lines, number, side='right')
+        assert i1 > i0, ValueError(f"line {number} is not in the Dataset")
+        return self.__line(dim, bounds[i0:i1])
+
+    def iter_lines(self):
+        """Iterate over the lines in order of line number
+
+        Yields
+        ------
+        number : int or float
+            Line number
+        xarray.Dataset
+            Records of the line, see line.
+
+        """
+        dim, lines, bounds = self.__line_index()
+        edges = r_[0, np.flatnonzero(lines[1:] != lines[:-1]) + 1, lines.size]
+        for i0, i1 in zip(edges[:-1], edges[1:]):
+            yield lines[i0], self.__line(dim, bounds[i0:i1])
 
     def plot_cross_section(self, line_number, variable, hang_from='elevation', **kwargs):
 
@@ -738,8 +1285,7 @@ class Dataset:
         if hang_from is not None:
             keys.append(hang_from)
 
-        subset = self._obj[keys]
-        subset = subset.where(subset.line == line_number, drop=True)
+        subset = self.line(line_number)[keys]
 
         from geobipy import StatArray, RectilinearMesh2D, Model
 
@@ -762,22 +1308,71 @@ class Dataset:
 
         return model.pcolor(**kwargs)
 
+    def add_distance_along_line(self, key='line', x='x', y='y', name='distance'):
+        """Attach the cumulative along-track distance of every record as a coordinate
+
+        The distance restarts from zero at the first record of every line, and is geodesic on the ellipsoid
+        of the spatial_ref when the coordinates are geographic. It is computed in one pass over all records.
+
+        Important
+        ---------
+        Make sure you call this method into a return variable
+
+                ``ds = ds.gs.add_distance_along_line()``
+
+        Parameters
+        ----------
+        key : str, optional
+            Name of the variable holding the line numbers. If it is not in the Dataset all records are one line.
+            Default is 'line'.
+        x, y : str, optional
+            Names of the coordinates of the records. Default is 'x' and 'y'.
+        name : str, optional
+            Name of the coordinate. Default is 'distance'.
+
+        Returns
+        -------
+        xarray.Dataset
+            Dataset with the distance coordinate attached.
+
+        See Also
+        --------
+        gspy.utilities.maths.along_track_distance : The distance calculation
+
+        """
+        from ..utilities.maths import along_track_distance
+
+        geod = None
+        if 'spatial_ref' in self._obj and not self.is_projected:
+            from pyproj import CRS, Geod
+            wkt = self.spatial_ref.attrs.get('crs_wkt')
+            geod = CRS.from_wkt(wkt).get_geod() if wkt else Geod(ellps='WGS84')
+
+        line = self._obj[key].values if key in self._obj else None
+        distance = along_track_distance(self._obj[x].values, self._obj[y].values, line, geod)
+
+        units = 'm' if geod is not None else self._obj[x].attrs.get('units', 'not_defined')
+        return self._obj.assign_coords({name: xr_DataArray(distance, dims=self._obj[x].dims,
+                                                           attrs={'standard_name': 'distance_along_line',
+                                                                  'long_name': 'Cumulative distance along each line',
+                                                                  'units': units,
+                                                                  'null_value': 'not_defined'})})
+
     @property
     def distance_along_line(self):
-        # Check the crs
-        if self.is_projected:
-            out = np.sqrt((self._obj['x'] - self._obj['x'][0])**2.0 + (self._obj['y'] - self._obj['y'][0])**2.0)
-            out.attrs['standard_name'] = 'Distance'
-            out.attrs['units'] = self._obj['x'].attrs['units']
-            return out
+        """Cumulative along-track distance of every record, restarting at every line
 
-        else:
-            # Haversine
-            from ..utilities.maths import haversine_distance
-            out = haversine_distance(self._obj['x'], self._obj['y'], self._obj['x'][0], self._obj['y'][0])
-            out.attrs['standard_name'] = 'Distance'
-            out.attrs['units'] = 'm'
-            return out
+        The distance coordinate from add_distance_along_line is used when the Dataset has one.
+        Otherwise it is computed on every call, attach it with ``ds = ds.gs.add_distance_along_line()`` to reuse it.
+
+        Returns
+        -------
+        xarray.DataArray
+
+        """
+        if 'distance' in self._obj.coords:
+            return self._obj['distance']
+        return self.add_distance_along_line()['distance']
 
     def x_axis(self, axis):
 
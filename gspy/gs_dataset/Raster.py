@@ -1,17 +1,158 @@
 import os
 import json
-from copy import deepcopy
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
 
 import numpy as np
 import xarray as xr
-import rioxarray as rio
+from xarray.backends import BackendArray
+from xarray.core import indexing
 
 from pprint import pprint
 
 from ..metadata.Metadata import Metadata
 from ..metadata.Variable_metadata import Variable_metadata
 from .Dataset import Dataset
-import xarray as xr
+
+@lru_cache(maxsize=None)
+def _warp_grid(src_crs, dst_crs, transform, width, height):
+    """Grid of a raster reprojected to another CRS, planned once for each source CRS and GeoTransform
+
+    Parameters
+    ----------
+    src_crs : rasterio.crs.CRS
+        CRS of the raster
+    dst_crs : rasterio.crs.CRS
+        CRS to reproject to
+    transform : affine.Affine
+        GeoTransform of the raster
+    width, height : int
+        Number of columns and rows of the raster
+
+    Returns
+    -------
+    transform : affine.Affine
+        GeoTransform of the reprojected raster
+    shape : tuple of int
+        Number of rows and columns of the reprojected raster
+
+    """
+    from rasterio.transform import array_bounds
+    from rasterio.warp import calculate_default_transform
+
+    bounds = array_bounds(height, width, transform)
+    transform, width, height = calculate_default_transform(src_crs, dst_crs, width, height, *bounds)
+    return transform, (height, width)
+
+@lru_cache(maxsize=None)
+def _same_crs(wkt, other_wkt):
+    """Whether two CRSs describe the same system, whatever their WKT flavour or authority codes
+
+    Parameters
+    ----------
+    wkt, other_wkt : str
+        WKT of each CRS
+
+    Returns
+    -------
+    bool
+
+    """
+    from pyproj import CRS
+
+    return CRS.from_wkt(wkt).equals(CRS.from_wkt(other_wkt), ignore_axis_order=True)
+
+class tif_stack_array(BackendArray):
+    """Lazily read stack of single band GeoTIFF files with matching grids.
+
+    Only the window of rows and columns that is indexed is read from each file. Files, and strips of rows within
+    them, are decoded in parallel threads straight into an array of the requested dtype, and nodata is replaced
+    with the fill value in the same pass. Wrap in xarray.core.indexing.LazilyIndexedArray to use as the values of an xarray.DataArray.
+
+    Parameters
+    ----------
+    filenames : list of str
+        GeoTIFF files. A single file gives a 2D array, more than one gives a 3D array stacked along the first axis.
+    shape : tuple of int
+        Number of rows and columns in every file.
+    dtype : dtype
+        Data type of the values, the dtype of the files unless nodata is masked with NaN in integer files.
+    nodata : scalar or list of scalar, optional
+        Nodata value of the files, or of each file when they differ. Each file is masked with its own value.
+    fill : scalar, optional
+        Replaces nodata when decoding, e.g. NaN. Default is None, nodata is kept.
+    warp : list of dict, optional
+        rasterio.vrt.WarpedVRT options for each file, or None for files already on the grid.
+        Windows of those files are reprojected onto the grid as they are read. Default is None.
+    n_threads : int, optional
+        Number of threads used to decode. Default is os.cpu_count().
+
+    """
+    def __init__(self, filenames, shape, dtype, nodata=None, fill=None, warp=None, n_threads=None):
+        self.filenames = list(filenames)
+        self.shape = tuple(shape) if len(self.filenames) == 1 else (len(self.filenames), *shape)
+        self.dtype = np.dtype(dtype)
+        self.nodata = list(nodata) if isinstance(nodata, (list, tuple)) else [nodata] * len(self.filenames)
+        self.fill = fill
+        self.warp = [None] * len(self.filenames) if warp is None else list(warp)
+        self.n_threads = n_threads or os.cpu_count()
+
+    def __getitem__(self, key):
+        return indexing.explicit_indexing_adapter(key, self.shape, indexing.IndexingSupport.BASIC, self._getitem)
+
+    def _getitem(self, key):
+        if len(self.filenames) == 1:
+            files, key = np.int64(0), (0, *key)
+        files = np.arange(len(self.filenames))[key[0]]
+
+        # Smallest window of rows and columns covering the indexed ones, then the indices within that window
+        windows, local = [], []
+        for k, n in zip(key[1:], self.shape[-2:]):
+            index = np.arange(n)[k]
+            start = int(index.min()) if index.size > 0 else 0
+            windows.append((start, start + int(np.ptp(index)) + 1 if index.size > 0 else start))
+            local.append(index - start)
+
+        out = np.empty((np.size(files), *(w[1] - w[0] for w in windows)), dtype=self.dtype)
+        if out.size > 0:
+            self.__read(np.atleast_1d(files), windows, out)
+
+        out = out[:, local[0]] if np.ndim(local[0]) == 0 else out[:, local[0], :]
+        out = out[..., local[1]]
+        return out[0] if np.ndim(files) == 0 else out
+
+    def __read(self, files, windows, out):
+        """Read a window of each file into out, in parallel over files and strips of rows"""
+        import rasterio
+        from rasterio.vrt import WarpedVRT
+        from rasterio.windows import Window
+
+        (row0, row1), (col0, col1) = windows
+
+        # Split the rows into strips when there are fewer files than threads
+        n_strips = max(1, min(row1 - row0, -(-self.n_threads // files.size)))
+        edges = np.linspace(row0, row1, n_strips + 1).astype(np.int64)
+
+        def read(task):
+            i, start, stop = task
+            warp = self.warp[files[i]]
+            with rasterio.open(self.filenames[files[i]]) as f, (nullcontext(f) if warp is None else WarpedVRT(f, **warp)) as src:
+                # rasterio casts to the dtype of out if it differs from the file
+                values = src.read(1, window=Window(col0, start, col1 - col0, stop - start), out=out[i, start - row0:stop - row0, :])
+            nodata = self.nodata[files[i]]
+            if (nodata is not None) and (self.fill is not None):
+                values[values == nodata] = self.fill
+
+        tasks = [(i, start, stop) for i in range(files.size) for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+        if (self.n_threads > 1) and (len(tasks) > 1):
+            with ThreadPoolExecutor(min(self.n_threads, len(tasks))) as pool:
+                list(pool.map(read, tasks))
+        else:
+            for task in tasks:
+                read(task)
+
 
 class Raster(Dataset):
     """Class defining a set of gridded data (2D or 3D).
@@ -73,6 +214,16 @@ class Raster(Dataset):
             Json file name, by default None
         spatial_ref : dict, gspy.Spatial_ref, or xarray.DataArray, optional
             Spatial ref object, by default None
+        n_threads : int, optional
+            Number of threads decoding GeoTIFF files when the values are read. Default is os.cpu_count().
+        mask_nodata : bool, optional
+            Mask the nodata value of the GeoTIFF files with NaN. Default is True.
+        keep_integer : bool, optional
+            Keep integer grids in their dtype with nodata as the null_value and _FillValue, instead of masking
+            them as float64. Default is True.
+        resampling : str, optional
+            rasterio.enums.Resampling method used when a GeoTIFF is not in the survey spatial_ref, or not on the
+            grid of the first file of its variable, and is reprojected as it is read. Default is 'nearest'.
 
         """
         tmp = xr.Dataset(attrs={})
@@ -105,45 +256,101 @@ class Raster(Dataset):
 
         for var in var_meta.keys():
             if 'files' in var_meta[var]:
-                self._obj = self.read_raster_using_metadata(var, json_md, directory=json_md['directory'], **var_meta[var])
+                self._obj = self.read_raster_using_metadata(var, json_md, directory=json_md['directory'],
+                                                            n_threads=kwargs.get('n_threads', None),
+                                                            mask_nodata=kwargs.get('mask_nodata', True),
+                                                            keep_integer=kwargs.get('keep_integer', True),
+                                                            resampling=kwargs.get('resampling', 'nearest'),
+                                                            **var_meta[var])
 
         # add global attrs to tabular, skip variables and dimensions
         self.update_attrs(**json_md['dataset_attrs'])
 
         return self._obj
 
-    def read_raster_using_metadata(self, name, json_metadata, directory="", **kwargs):
+    def read_raster_using_metadata(self, name, json_metadata, directory="", n_threads=None, mask_nodata=True, keep_integer=True, resampling='nearest', **kwargs):
+
+        import rioxarray as rio
+        from rasterio.crs import CRS
+        from rasterio.enums import Resampling
 
         files = kwargs.pop('files')
         if not isinstance(files, list):
             files = [files]
 
-        n_files = len(files)
-        values = None
+        filenames = [os.path.join(directory, file) for file in files]
+
+        survey_crs = CRS.from_wkt(self.spatial_ref.attrs['crs_wkt']) if 'crs_wkt' in self.spatial_ref.attrs else None
 
         cached_transform = None
+        warp, plans, nodatas = [], {}, []
+        unknown_crs = False
+
+        # Check the grid of each file in the variables metadata, only the headers are read here.
+        # The grid is the first file's, reprojected if its CRS is not the survey's. Files off that grid are warped
+        # onto it when their values are read, with one set of warp options for each source CRS and GeoTransform.
+        for file, filename in zip(files, filenames):
+            ds = rio.open_rasterio(filename)
+            crs = ds.rio.crs
+            if (crs is None) or (survey_crs is None):
+                if not unknown_crs:
+                    warnings.warn(f"Cannot identify CRS for input [{name}] raster, will assume the data matches the survey spatial_ref", stacklevel=2)
+                unknown_crs = True
+                crs = survey_crs
+            elif _same_crs(crs.to_wkt(), survey_crs.to_wkt()):
+                # Same system written differently, e.g. an EPSG code against the survey's WKT
+                crs = survey_crs
 
-        # Read each file in the variables metadata
-        for i, file in enumerate(files):
-            ds = self.open_rasterio(os.path.join(directory, file))
             if cached_transform is None:
-                cached_transform = ds.rio.transform()
-            else:
-                assert ds.rio.transform() == cached_transform, ValueError(f"raster file {file} has a mismatching GeoTransform")
-
-            shape = ds.shape
-            if n_files > 1:
-                shape = (n_files, *shape) # Create a 3D array instead for more than one file.
-
-            if values is None:
-                if n_files == 1:
-                    values = ds.values
-
+                dtype, nodata = ds.dtype, ds.rio.nodata
+                # Warped files use the first file's nodata, also given to pixels outside their footprint
+                vrt_nodata = nodata if (nodata is not None) or (dtype.kind != 'f') else np.nan
+                first = ds
+                if crs is survey_crs:
+                    cached_transform, shape = ds.rio.transform(), ds.shape[1:]
                 else:
-                    values = np.empty(shape)
+                    cached_transform, shape = _warp_grid(crs, survey_crs, ds.rio.transform(), ds.rio.width, ds.rio.height)
+            else:
+                assert ds.dtype == dtype, ValueError(f"raster file {file} has a mismatching dtype")
+
+            if (crs is survey_crs) and (ds.rio.transform() == cached_transform) and (ds.shape[1:] == shape):
+                warp.append(None)
+                nodatas.append(ds.rio.nodata)
+                continue
+
+            key = (crs, ds.rio.transform(), ds.shape[1:], ds.rio.nodata)
+            if key not in plans:
+                plans[key] = dict(src_crs=crs, crs=survey_crs, transform=cached_transform, width=shape[1], height=shape[0],
+                                  resampling=Resampling[resampling], src_nodata=ds.rio.nodata, nodata=vrt_nodata)
+            warp.append(plans[key])
+            nodatas.append(vrt_nodata)
+
+        if warp[0] is None:
+            ds = first.squeeze().drop_vars('band')
+        else:
+            # Pixel centres of the reprojected grid
+            ds = xr.Dataset(coords={'y': cached_transform.f + cached_transform.e * (np.arange(shape[0]) + 0.5),
+                                    'x': cached_transform.c + cached_transform.a * (np.arange(shape[1]) + 0.5)})
+        # Each file is masked with its own nodata, the fill value is common to all of them
+        nodata = next((value for value in nodatas if value is not None), None)
+
+        fill = None
+        if nodata is not None:
+            if mask_nodata and ((dtype.kind == 'f') or not keep_integer):
+                # Masked with NaN, integer grids become float64 only when asked to
+                fill = np.nan
+                dtype = dtype if dtype.kind == 'f' else np.dtype(np.float64)
+            else:
+                # Values stay in the file's dtype. Nodata becomes the variable's null_value if that fits the dtype,
+                # and is recorded as the CF _FillValue either way.
+                nv = kwargs.get('null_value', 'not_defined')
+                fits = (not isinstance(nv, str)) and ((dtype.kind == 'f') or (float(nv).is_integer() and (np.iinfo(dtype).min <= nv <= np.iinfo(dtype).max)))
+                fill = dtype.type(nv if fits else nodata)
+                kwargs['null_value'] = fill
+                kwargs['_FillValue'] = fill
 
-            if n_files > 1:
-                values[i, :, :] = ds.values
+        # The pixels are only read when the values are used, a 3D array for more than one file.
+        values = indexing.LazilyIndexedArray(tif_stack_array(filenames, shape, dtype, nodata=nodatas, fill=fill, warp=warp, n_threads=n_threads))
 
         # Add the tranform to the spatial ref
         self._obj.spatial_ref.attrs['GeoTransform'] = cached_transform.to_gdal()
@@ -190,57 +397,22 @@ class Raster(Dataset):
         # Add the variable to the dataset
         self._obj = self.add_variable_from_dict(name, values=values, **kwargs)
 
-        # Now handle the spatial ref.  This should be done FIRST
-        raster_spatial_reference = [coord for coord in ds.coords if coord not in ('x', 'y')][0]
-
-        if 'grid_mapping_name' in ds[raster_spatial_reference].attrs.keys():
-            raster_spatial_reference_name = ds[raster_spatial_reference].attrs['grid_mapping_name']
-            if raster_spatial_reference_name != self.spatial_ref.attrs['grid_mapping_name']:
-                raise NotImplementedError(f"Need to reproject input file to match survey spatial ref, for variable {name}")
-        # elif 'crs_wkt' in ds[raster_spatial_reference].attrs.keys():
-        #     raster_spatial_reference_name = ds[raster_spatial_reference].attrs['crs_wkt']
-        #     if raster_spatial_reference_name != self.spatial_ref.attrs['crs_wkt']:
-        #         raise NotImplementedError(f"Need to reproject input file to match survey spatial ref, for variable {name}")
-        else:
-            print(f"WARNING: cannot identify CRS for input [{name}] raster, will assume the data matches the survey spatial_ref!")
-
-        # Reproject if input CRS does not match Survey
-        # if raster_spatial_reference_name != self.spatial_ref.attrs['grid_mapping_name']:
-        #     print('Grid CRS [{}] does not match Survey CRS [{}], reprojecting to Survey CRS'.format(raster_spatial_reference_name, self.spatial_ref.attrs['grid_mapping_name']))
-        #     if self.spatial_ref.attrs['wkid'] != "None":
-        #         target_crs = self.spatial_ref.attrs['wkid']
-        #     else:
-        #         target_crs = self.spatial_ref.attrs['crs_wkt']
-        #     print('Reprojecting ...')
-
-        #     # get fill value from file, if present
-        #     if '_FillValue' in ds.attrs:
-        #         nodata = ds.attrs['_FillValue']
-        #     else:
-        #         nodata = None
-
-        #     # supersede fill value from file with variable metadata value, if present
-        #     if 'null_value' in json_metadata['variables'][name]:
-        #         if json_metadata['variables'][name]['null_value'] != 'not_defined':
-        #             nodata = json_metadata['variables'][name]['null_value']
-
-        #     # reproject, accounting for nodata value if present
-        #     if nodata is None:
-        #         ds = ds.rio.reproject(target_crs)
-        #     else:
-        #         ds = ds.rio.reproject(target_crs, nodata=nodata)
-
         return self._obj
 
-    def open_rasterio(self, filename):
+    def open_rasterio(self, filename, mask_nodata=True, keep_integer=True):
         """Reads GeoTIFF file
 
-        Uses rioxarray to read GeoTIFF file as an xarray Dataset
+        Uses rioxarray to read GeoTIFF file as an xarray Dataset. The values are read lazily, and nodata is masked
+        by xarray's CF decoding when they are.
 
         Parameters
         ----------
         filename : str
             Name of GeoTIFF file
+        mask_nodata : bool, optional
+            Mask nodata with NaN. Default is True.
+        keep_integer : bool, optional
+            Keep integer grids integer with nodata as their _FillValue, instead of masking them as floats. Default is True.
 
         Returns
         -------
@@ -248,15 +420,15 @@ class Raster(Dataset):
             Dataset containing the GeoTIFF variable
 
         """
+        import rioxarray as rio
+
         ds = rio.open_rasterio(filename)
 
-        # clean up
-        ds = ds.squeeze().drop('band')
-        if '_FillValue' in ds.attrs:
-            ds.values[ds.values == ds.attrs['_FillValue']] = np.nan
-            #ds.attrs['null_value'] = ds.attrs['_FillValue']
+        if mask_nodata and (ds.rio.nodata is not None) and ((ds.dtype.kind == 'f') or not keep_integer):
+            ds = rio.open_rasterio(filename, masked=True)
 
-        return ds
+        # clean up
+        return ds.squeeze().drop_vars('band')
 
     def read_var_netcdf(self, filename, key, var_meta):
         """ Reads variable from NetCDF file and adds to Raster xarray
@@ -294,6 +466,8 @@ class Raster(Dataset):
 
         """
 
+        import rioxarray # Registers the rio accessor
+
         bnds_keys = list(self.data_vars.keys())
         check_keys = ['x_bnds', 'y_bnds', 'z_bnds']
         bnds_present = [k in bnds_keys for k in check_keys]
@@ -400,33 +574,169 @@ class Raster(Dataset):
 
         dump_metadata_to_file(out, filename)
 
-    def to_tif(self):
-        """ Export GeoTIFF files from xarray
+    def build_overviews(self, n_levels, method='mean', block_size=512):
+        """Decimated overview levels of the raster variables
+
+        Each level halves the number of rows and columns of the previous one. Levels are built strip by strip,
+        so the full resolution variables are only read a block of rows at a time, e.g. from a lazily opened
+        NetCDF file or a stack of GeoTIFF files.
+
+        Parameters
+        ----------
+        n_levels : int
+            Number of overview levels.
+        method : str, optional
+            'mean' averages each 2x2 block of pixels ignoring NaN, 'nearest' keeps its first pixel.
+            Integer variables always use 'nearest' so classes are not averaged. Default is 'mean'.
+        block_size : int, optional
+            Rows of each level built at a time. Default is 512.
+
+        Returns
+        -------
+        list of xarray.Dataset
+            Overview levels 1 to n_levels with the raster variables and a GeoTransform of the coarser grid.
+
+        """
+        assert method in ('mean', 'nearest'), ValueError("method must be one of ['mean', 'nearest']")
+
+        ds = self._obj
+        variables = [var for var in ds.data_vars if ('bnds' not in var) and ('x' in ds[var].dims) and ('y' in ds[var].dims)]
+        assert len(variables) > 0, ValueError("Raster has no variables with x and y dimensions to build overviews from")
+
+        out = []
+        previous = ds[variables].drop_vars([coord for coord in ds.coords if 'bnds' in coord])
+        for level in range(1, n_levels + 1):
+            ny, nx = -(-previous.sizes['y'] // 2), -(-previous.sizes['x'] // 2)
+
+            data_vars = {}
+            for var in variables:
+                da = previous[var].transpose(..., 'y', 'x')
+                how = method if da.dtype.kind == 'f' else 'nearest'
+                values = np.empty((*da.shape[:-2], ny, nx), dtype=da.dtype)
+                # Strips of an even number of rows become whole rows of the level
+                for start in range(0, da.sizes['y'], 2 * block_size):
+                    strip = da.isel(y=slice(start, start + 2 * block_size)).values
+                    values[..., start // 2:(start + strip.shape[-2] + 1) // 2, :] = self.__decimate(strip, how)
+                data_vars[var] = xr.DataArray(values, dims=da.dims, attrs=da.attrs)
+
+            # Pixel centres of the coarser grid covering the same extent
+            coords = {}
+            for dim, n in (('y', ny), ('x', nx)):
+                x = previous[dim].values
+                dx = x[1] - x[0] if x.size > 1 else 0.0
+                coords[dim] = xr.DataArray(x[0] + dx * (2.0 * np.arange(n) + 0.5), dims=dim,
+                                           attrs={k: v for k, v in previous[dim].attrs.items() if k != 'bounds'})
+
+            current = xr.Dataset(data_vars, coords=coords, attrs=ds.attrs)
+            current = current.assign_coords({coord: previous[coord] for coord in previous.coords if coord not in ('x', 'y')})
+
+            if ('spatial_ref' in previous.coords) and ('GeoTransform' in previous['spatial_ref'].attrs):
+                transform = np.asarray(previous['spatial_ref'].attrs['GeoTransform'], dtype=np.float64)
+                current['spatial_ref'] = previous['spatial_ref'].copy()
+                current['spatial_ref'].attrs['GeoTransform'] = transform * np.r_[1.0, 2.0, 2.0, 1.0, 2.0, 2.0]
+
+            current.attrs['overview_level'] = level
+            out.append(current)
+            previous = current
+
+        return out
+
+    @staticmethod
+    def __decimate(values, method):
+        """Halve the last two axes of values by 2x2 blocks"""
+        if method == 'nearest':
+            return values[..., ::2, ::2]
+
+        ny, nx = values.shape[-2:]
+        if (ny % 2 == 1) or (nx % 2 == 1):
+            values = np.pad(values, [(0, 0)] * (values.ndim - 2) + [(0, ny % 2), (0, nx % 2)], constant_values=np.nan)
+
+        blocks = values.reshape(*values.shape[:-2], values.shape[-2] // 2, 2, values.shape[-1] // 2, 2)
+        with warnings.catch_warnings():
+            # All NaN blocks stay NaN
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            # Summed in float64 so the result does not depend on the memory layout of the strip
+            return np.nanmean(blocks, axis=(-3, -1), dtype=np.float64).astype(values.dtype)
+
+    def to_tif(self, directory='.', n_workers=None, compress='deflate', blocksize=512, overview_resampling='nearest'):
+        """ Export Cloud-Optimized GeoTIFF files from xarray
 
         2D variables are exported directly to GeoTIFF files, one for each variable, following
         the naming convention "{variable}.tif"
 
-        3D variables are sliced along the right most dimension and exported to incremented GeoTIFF
+        3D variables are sliced along the dimension that is not x or y and exported to incremented GeoTIFF
         files following the naming convention "{variable}_{i}.tif".
 
-        """
-        raise Exception("Needs fixing")
+        Files are tiled, compressed and have overviews. Slices are written concurrently, each one is only
+        read from the dataset by the thread writing it, so a lazily opened NetCDF file is never loaded whole.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Directory to write the files to. Default is the current directory.
+        n_workers : int, optional
+            Number of threads writing slices. Default is os.cpu_count().
+        compress : str, optional
+            GDAL compression, e.g. 'deflate', 'lzw', 'zstd'. Default is 'deflate'.
+        blocksize : int, optional
+            Size of the square tiles in pixels. Default is 512.
+        overview_resampling : str, optional
+            Resampling of the overviews, e.g. 'nearest', 'average'. Default is 'nearest'.
+
+        Returns
+        -------
+        list of str
+            Names of the GeoTIFF files
 
-        for var in self.data_vars:
-            # skip bnds variables
-            if 'bnds' not in var:
-                ds = deepcopy(self[var])
+        """
+        import rasterio
+        from rasterio.crs import CRS
+        from rasterio.transform import Affine
 
-                # remove grid_mapping
-                if 'grid_mapping' in ds.attrs.keys():
-                    del ds.attrs['grid_mapping']
+        ds = self._obj
 
-                # set _FillValue
-                ds.attrs['_FillValue'] = ds.attrs['null_value']
+        assert ('x' in ds.dims) and ('y' in ds.dims), ValueError("Raster needs x and y dimensions to export GeoTIFF files")
 
-                # if 3D variable, slice along stack dimension
-                if 'stack' in ds.dims:
-                    for s in ds['stack'].values:
-                        ds.sel(stack=s).rio.to_raster(f"{var}_{s}.tif")
-                else:
-                    ds.rio.to_raster(f"{var}.tif")
+        # Pixel centres to the GeoTransform of the pixel corners, the stored one if there is a single row or column
+        x, y = ds['x'].values, ds['y'].values
+        if (x.size > 1) and (y.size > 1):
+            dx, dy = x[1] - x[0], y[1] - y[0]
+            transform = Affine(dx, 0.0, x[0] - 0.5 * dx, 0.0, dy, y[0] - 0.5 * dy)
+        else:
+            transform = Affine.from_gdal(*self.spatial_ref.attrs['GeoTransform'])
+
+        crs = CRS.from_wkt(self.spatial_ref.attrs['crs_wkt']) if 'crs_wkt' in self.spatial_ref.attrs else None
+
+        tasks = []
+        for var in ds.data_vars:
+            da = ds[var]
+            # skip bnds variables and anything that is not a map
+            if ('bnds' in var) or ('x' not in da.dims) or ('y' not in da.dims):
+                continue
+            stack = [dim for dim in da.dims if dim not in ('x', 'y')]
+            assert len(stack) < 2, ValueError(f"Can only export 2D or 3D variables to GeoTIFF files, {var} has dimensions {da.dims}")
+            if len(stack) == 0:
+                tasks.append((da, os.path.join(directory, f"{var}.tif")))
+            else:
+                tasks += [(da[{stack[0]: i}], os.path.join(directory, f"{var}_{i}.tif")) for i in range(da.sizes[stack[0]])]
+
+        def write(task):
+            da, filename = task
+            values = da.transpose('y', 'x').values
+
+            nodata = da.attrs.get('_FillValue', da.encoding.get('_FillValue', None))
+            if nodata is None:
+                null_value = da.attrs.get('null_value', None)
+                nodata = np.nan if values.dtype.kind == 'f' else (null_value if np.isscalar(null_value) and not isinstance(null_value, str) else None)
+
+            with rasterio.open(filename, 'w', driver='COG', width=values.shape[1], height=values.shape[0], count=1,
+                               dtype=values.dtype, crs=crs, transform=transform, nodata=nodata,
+                               compress=compress, blocksize=blocksize, overview_resampling=overview_resampling, bigtiff='IF_SAFER') as dst:
+                dst.write(values, 1)
+            return filename
+
+        n_workers = min(n_workers or os.cpu_count(), max(1, len(tasks)))
+        if n_workers > 1:
+            with ThreadPoolExecutor(n_workers) as pool:
+                return list(pool.map(write, tasks))
+        return [write(task) for task in tasks]
@@ -1,11 +1,11 @@
 import os
 import json
-import matplotlib.pyplot as plt
 from pprint import pprint
 
+import h5netcdf
 import xarray as xr
 import numpy as np
-from numpy import arange, int32
+from numpy import arange, asarray, int32
 
 from .Dataset import Dataset
 from ..file_handlers import file_handler
@@ -18,6 +18,10 @@ class Tabular(Dataset):
     gspy.Spatial_ref : For Spatial reference instantiation.
 
     """
+    # Records per block when reading into a file. Every block has a fixed cost to build and append, so
+    # blocks should be large, while a block of a hundred columns of float64 still only takes ~80 MB.
+    default_chunksize = 100000
+
     def __init__(self, xarray_obj):
         self._obj = xarray_obj
 
@@ -55,7 +59,7 @@ class Tabular(Dataset):
         return out
 
     @classmethod
-    def read(cls, filename, metadata_file=None, spatial_ref=None, **kwargs):
+    def read(cls, filename, metadata_file=None, spatial_ref=None, chunksize=None, output_filename=None, group=None, usecols=None, **kwargs):
         """Instantiate a Tabular class from tabular data
 
         When reading the metadata and data file, the following are established in order
@@ -63,6 +67,9 @@ class Tabular(Dataset):
         * User defined coordinates
         * Columns are read in and/or combined and added to the Dataset as variables
 
+        If output_filename is given, the data file is read in blocks of chunksize records. Each block is appended
+        to output_filename along the index dimension so that memory depends on the block size and not the file size.
+
         Parameters
         ----------
         filename : str
@@ -71,11 +78,22 @@ class Tabular(Dataset):
             Json file name, by default None
         spatial_ref : dict, gspy.Spatial_ref, or xarray.DataArray, optional
             Spatial ref object, by default None
+        chunksize : int, optional
+            Number of records to read per block. By default None reads the whole file, or blocks of
+            default_chunksize records when output_filename is given and the file is not memory mapped.
+        output_filename : str, optional
+            Netcdf file to write the blocks to. Required if chunksize is given.
+        group : str, optional
+            Netcdf group to write the blocks to, by default None
+        usecols : str or list of str, optional
+            * If None, every column in the data file is read, and each needs metadata.
+            * If 'metadata', only the columns referenced by the metadata are read, see referenced_columns.
+            * If list, only these variables and the coordinates are read. Variables of the metadata that are not listed are skipped.
 
         Returns
         -------
         xarray.Dataset
-            Dataset with all data read in.
+            Dataset with all data read in. If chunksize is given, the Dataset is opened lazily from output_filename.
 
         See Also
         --------
@@ -96,12 +114,130 @@ class Tabular(Dataset):
         else:
             json_md = metadata_file
 
+        # Memory mapped records are not read in blocks
+        if (output_filename is not None) and (chunksize is None) and not kwargs.get('memmap', False):
+            chunksize = cls.default_chunksize
+
+        if chunksize is not None:
+            assert output_filename is not None, ValueError("output_filename must be given when reading in chunks")
+            kwargs['chunksize'] = chunksize
+
+        # Only the needed columns are parsed by the file handler
+        if isinstance(usecols, str) and usecols == 'metadata':
+            kwargs['usecols'] = self.referenced_columns(json_md)
+        elif usecols is not None:
+            # Coordinates are always needed, and only the chosen variables need metadata
+            usecols = set(usecols) | {value.strip() for value in json_md.get('coordinates', {}).values()}
+            if 'variables' in json_md:
+                json_md['variables'] = {key: value for key, value in json_md['variables'].items() if self.file_handler.use_column(key, usecols)}
+            kwargs['usecols'] = usecols | self.referenced_columns(json_md)
+
         # Read in the data using the respective file type handler
         file = self.file_handler.read(filename, metadata=json_md.get('variables', {}), **kwargs)
+        kwargs.pop('usecols', None)
+
+        # Add the user defined coordinates-dimensions from the json file
+        dimensions = json_md.pop('dimensions', None)
+        coordinates = json_md.pop('coordinates', None)
+
+        # Write out a template json file when no variable metadata is found
+        if not 'variables' in json_md:
+            md_template = self.metadata_template(filename, **file.metadata_template(**json_md))
+            raise Exception(file.write_metadata_template())
 
+        if chunksize is None:
+            return self._add_records(file, dimensions, coordinates, json_md, **kwargs)
+
+        empty = self._obj
+        mode = 'a' if os.path.isfile(output_filename) else 'w'
+        offset = 0
+        valid_ranges = {}
+        f = None
+        try:
+            for block in file.iter_chunks():
+                self._obj = empty.copy()
+                self._obj = self._add_records(block, dimensions, coordinates, json_md, offset=offset, **kwargs)
+                self.compute_pending_attrs()
+
+                if f is None:
+                    # As when opening below, netCDF4 does not check every variable for the size of the unlimited dimension
+                    self.to_netcdf(output_filename, mode=mode, group=group, unlimited_dims=['index'], engine='netcdf4')
+                    # The other blocks are appended through one handle
+                    f = h5netcdf.File(output_filename, 'a')
+                else:
+                    self._append_netcdf(f if group is None else f[group], offset)
+
+                # Keep a running valid range over all blocks, a block without valid values has a NaN range
+                for key, var in self._obj.variables.items():
+                    if ('index' in var.dims) and ('valid_range' in var.attrs):
+                        vr = var.attrs['valid_range']
+                        if key in valid_ranges:
+                            vr = asarray([np.fmin(valid_ranges[key][0], vr[0]), np.fmax(valid_ranges[key][1], vr[1])], dtype=vr.dtype)
+                        valid_ranges[key] = vr
+
+                offset += block.nrecords
+
+            g = f if group is None else f[group]
+            for key, vr in valid_ranges.items():
+                g.variables[key].attrs['valid_range'] = vr
+        finally:
+            if f is not None:
+                f.close()
+
+        # h5netcdf checks every variable for the size of an unlimited dimension, netCDF4 reads it from the file
+        out = xr.open_dataset(output_filename, group=group, engine='netcdf4', decode_times=False)
+        # Only the file being appended to needs to grow, copies written later do not
+        out.encoding.pop('unlimited_dims', None)
+        return out
+
+    @staticmethod
+    def referenced_columns(json_md):
+        """Names of the columns and 2D variables in a data file that the metadata refers to.
+
+        These are the variables, the coordinates, and any raw_data_columns combined into new variables.
+
+        Parameters
+        ----------
+        json_md : dict
+            GSPy metadata
+
+        Returns
+        -------
+        set of str
+
+        """
+        variables = json_md.get('variables', {})
+
+        out = set(variables.keys())
+        out.update(value.strip() for value in json_md.get('coordinates', {}).values())
+        for item in variables.values():
+            out.update(item.get('raw_data_columns', []))
+        return out
+
+    def _add_records(self, file, dimensions, coordinates, json_md, offset=0, **kwargs):
+        """Add the records currently held by a file handler to the Dataset.
+
+        Parameters
+        ----------
+        file : gspy.file_handler
+            File handler holding the records
+        dimensions : dict
+            User defined dimensions from the json file
+        coordinates : dict
+            User defined coordinates from the json file
+        json_md : dict
+            Remaining json metadata containing the dataset_attrs
+        offset : int, optional
+            Index of the first record held by the file handler, by default 0
+
+        Returns
+        -------
+        xarray.Dataset
+
+        """
         # Add the index coordinate
         self._obj = self.add_coordinate_from_values('index',
-                                         values=arange(file.nrecords, dtype=int32),
+                                         values=arange(offset, offset + file.nrecords, dtype=int32),
                                          discrete = True,
                                          is_dimension=True,
                                          **{'standard_name' : 'index',
@@ -109,10 +245,6 @@ class Tabular(Dataset):
                                             'units'         : 'not_defined',
                                             'null_value'    : 'not_defined'})
 
-        # Add the user defined coordinates-dimensions from the json file
-        dimensions = json_md.pop('dimensions', None)
-        coordinates = json_md.pop('coordinates', None)
-
         if coordinates is not None:
             if dimensions is not None:
                 for key in list(dimensions.keys()):
@@ -122,11 +254,6 @@ class Tabular(Dataset):
                         # dicts are defined explicitly in the json file.
                         self._obj = self.add_coordinate_from_dict(b.lower(), is_dimension=True, **dimensions[key])
 
-        # Write out a template json file when no variable metadata is found
-        if not 'variables' in json_md:
-            md_template = self.metadata_template(filename, **file.metadata_template(**json_md))
-            raise Exception(file.write_metadata_template())
-
         # Add in the spatio-temporal coordinates
         for key in list(coordinates.keys()):
             coord = coordinates[key].strip()
@@ -136,7 +263,7 @@ class Tabular(Dataset):
 
             # Might need to handle already added coords from the dimensions dict.
             self._obj = self.add_coordinate_from_values(key.lower(),
-                                            values=file.df[coord].values,
+                                            values=file.column_values(coord),
                                             dimensions=["index"],
                                             discrete = discrete,
                                             is_projected = self.is_projected,
@@ -157,35 +284,36 @@ class Tabular(Dataset):
 
 
         # Now we have all dimensions and coordinates defined.
-        # Start adding the data variables
+        # Start creating the data variables, they are added to the Dataset together at the end.
+        variables = {}
+        all_columns = set(file.columns)
         for var in column_counts:
 
             assert var in file.metadata, ValueError(f"Missing metadata for variable {var}")
             var_meta = file.metadata[var]
 
             if not var in coordinates.keys():
-                all_columns = sorted(list(file.df.columns))
 
                 # Use a column from the CSV file and add it as a variable
                 if var in all_columns:
-                    self._obj = self.add_variable_from_dict(var.lower(),
-                                                  values=file.df[var].values,
+                    variables.update(self.variables_from_dict(var.lower(),
+                                                  values=file.column_values(var),
                                                   dimensions = ["index"],
-                                                  **var_meta)
+                                                  **var_meta))
 
                 else: # The CSV column header is a 2D variable with [x] in the column name
                     values = None
                     # check for raw_data_columns to combine
                     if 'raw_data_columns' in var_meta:
-                        values = file.df[var_meta['raw_data_columns']].values
+                        values = file.column_values(var_meta['raw_data_columns'])
 
                     # if variable has multiple columns with [i] increment, to be combined
                     elif (var in column_counts) and (column_counts[var] > 1):
                         try:
-                            values = file.df[[f"{var}[{i}]" for i in range(column_counts[var])]].values
+                            values = file.column_values([f"{var}[{i}]" for i in range(column_counts[var])])
                         except KeyError:
                             try:
-                                values = file.df[[f"{var}_{i}" for i in range(column_counts[var])]].values
+                                values = file.column_values([f"{var}_{i}" for i in range(column_counts[var])])
                             except KeyError:
                                 raise KeyError(f"Column header names for variable '{var}' not found in {var}[0] or {var}_0 format")
 
@@ -216,13 +344,35 @@ class Tabular(Dataset):
 
                     assert all([dim.lower() in self._obj.dims for dim in var_meta['dimensions']]), ValueError(f"Could not match variable dimensions {var_meta['dimensions']} with json dimensions {self._obj.dims}")
 
-                    self._obj = self.add_variable_from_dict(var, values=values, **var_meta)
+                    variables.update(self.variables_from_dict(var, values=values, **var_meta))
+
+        # A single Dataset constructor avoids re-merging the Dataset for every variable.
+        self._obj = xr.Dataset(data_vars={**self._obj.data_vars, **variables}, coords=self._obj.coords, attrs=self._obj.attrs)
 
         # add global attrs to tabular, skip variables and dimensions
         self.update_attrs(**json_md['dataset_attrs'])
 
         return self._obj
 
+    def _append_netcdf(self, group, start):
+        """Append the Dataset to the variables of an open netcdf file along the index dimension.
+
+        Parameters
+        ----------
+        group : h5netcdf.Group
+            Open group of a netcdf file previously written with an unlimited index dimension.
+        start : int
+            Number of records already written. h5netcdf finds the size of an unlimited dimension by
+            checking every variable that uses it, so it is passed instead.
+
+        """
+        group.resize_dimension('index', start + self._obj.sizes['index'])
+
+        for key, var in self._obj.variables.items():
+            if 'index' in var.dims:
+                axis = var.dims.index('index')
+                group.variables[key][(slice(None),)*axis + (slice(start, None),)] = var.values
+
     def get_fortran_format(self, key, default_f32='f10.3', default_f64='g16.6'):
 
         values = self._obj.data_vars[key]
@@ -1,12 +1,15 @@
 
 from os import path, sep
 from copy import copy
+import numpy as np
 from ..metadata.Metadata import Metadata
 from ..gs_dataarray.Spatial_ref import Spatial_ref
 from pprint import pprint
 from ..gs_dataset.System import System
 from ..gs_dataset.Tabular import Tabular
 from ..gs_dataset.Raster import Raster
+from ..options import OPTIONS, set_options
+from ..utilities import get_executor
 
 from xarray import DataArray as xr_DataArray
 from xarray import DataTree, register_datatree_accessor
@@ -187,6 +190,67 @@ class Container:
         self._obj[key] = Container.Data(*args, spatial_ref=self._obj['spatial_ref'], **kwargs)
         return self._obj[key]
 
+    def build(self, manifest, executor=None, n_workers=None):
+        """Read a manifest of datasets concurrently and attach them to the survey
+
+        Each dataset is read as with Container.add. The reads are handed to an executor and the finished
+        datasets are attached in manifest order, so the tree does not depend on which read finishes first.
+
+        Parameters
+        ----------
+        manifest : list of dict
+            One entry per dataset with keys
+            * container : str, name of the container to add the dataset to. It is created if needed.
+            * key : str, name of the dataset in the container.
+            * data_filename : str, optional, tabular data file. Omit for rasters.
+            * metadata_file : str or dict, metadata for the dataset.
+            * system : optional, system passed through to the reader.
+            * container_attrs : dict, optional, metadata used if the container is created.
+            Any other keys are passed to the reader, e.g. usecols.
+        executor : str or executor, optional
+            * None reads the datasets one after another.
+            * 'thread' uses a concurrent.futures.ThreadPoolExecutor.
+            * 'process' uses a concurrent.futures.ProcessPoolExecutor.
+            * 'dask' uses a dask.distributed LocalCluster.
+            * Any object with a submit method returning futures, e.g. an existing executor or dask.distributed.Client.
+            Default is None.
+        n_workers : int, optional
+            Number of workers when the executor is created here. Default is the executor's own default.
+
+        Returns
+        -------
+        xarray.DataTree
+
+        """
+        manifest = [dict(entry) for entry in manifest]
+
+        keys = []
+        for entry in manifest:
+            assert ('container' in entry) and ('key' in entry), ValueError("Each manifest entry needs a container and a key")
+            keys.append((entry['container'], entry['key']))
+            assert not ((entry['container'] in self._obj) and (entry['key'] in self._obj[entry['container']])), KeyError(f"{entry['key']} already exists in container {entry['container']}. Please use a different key.")
+        assert len(set(keys)) == len(keys), ValueError("Manifest entries must have unique container and key pairs")
+
+        # Workers in other processes do not share the options of this one
+        options = dict(OPTIONS)
+        spatial_ref = self._obj['spatial_ref']
+
+        if executor is None:
+            datasets = [_read_data(entry, spatial_ref, options) for entry in manifest]
+        else:
+            pool, shutdown = get_executor(executor, n_workers)
+            try:
+                futures = [pool.submit(_read_data, entry, spatial_ref, options) for entry in manifest]
+                datasets = [future.result() for future in futures]
+            finally:
+                shutdown()
+
+        for entry, dataset in zip(manifest, datasets):
+            container = self.add_container(entry['container'], **entry.get('container_attrs', {}))
+            container[entry['key']] = dataset
+
+        return self._obj
+
     @classmethod
     def Data(cls, data_filename=None, metadata_file=None, spatial_ref=None, **kwargs):
 
@@ -238,13 +302,20 @@ class Container:
 
         return out, kwargs
 
-    def to_netcdf(self, *args, **kwargs):
+    def to_netcdf(self, *args, overviews=0, overview_method='mean', **kwargs):
         """Write the survey to a netcdf file
 
+        Any pending derived attributes in the tree are computed before writing.
+
         Parameters
         ----------
         args : list
             Arguments to pass to xarray.Dataset.to_netcdf
+        overviews : int, optional
+            Number of overview levels written for each raster, as sibling groups "{raster}_overview_{level}".
+            See Container.overview. Default is 0.
+        overview_method : str, optional
+            'mean' or 'nearest' decimation of the overview levels. Default is 'mean'.
         kwargs : dict
             Keyword arguments to pass to xarray.Dataset.to_netcdf
 
@@ -267,17 +338,66 @@ class Container:
         else:
             out = self._obj
 
+        # Compute any deferred attributes across every group before writing
+        for node in out.subtree:
+            node.to_dataset(inherit=False).gs.compute_pending_attrs()
+
+        if overviews > 0:
+            out = self.__add_overviews(out, overviews, overview_method)
+
         out.to_netcdf(*args, **kwargs)
 
+    @staticmethod
+    def __add_overviews(tree, n_levels, method):
+        """Copy of the tree with overview levels next to every raster"""
+        rasters = [node.relative_to(tree) for node in tree.subtree if (node.parent is not None) and ('x' in node.dims) and ('y' in node.dims) and ('x' not in node.parent.dims)]
+        if len(rasters) == 0:
+            return tree
+
+        tree = tree.copy()
+        for path in rasters:
+            node = tree[path]
+            levels = Raster(node.to_dataset(inherit=False)).build_overviews(n_levels, method)
+            groups = [f"{node.name}_overview_{i+1}" for i in range(n_levels)]
+            for level, group in zip(levels, groups):
+                node.parent[group] = DataTree(level)
+            node.attrs['overview_groups'] = [f"{node.parent.path.rstrip('/')}/{group}" for group in groups]
+        return tree
+
+    def overview(self, level):
+        """Overview level of a raster in the tree
+
+        Parameters
+        ----------
+        level : int
+            Overview level, 0 is the full resolution raster.
+
+        Returns
+        -------
+        xarray.DataTree
+
+        """
+        if level == 0:
+            return self._obj
+
+        groups = np.atleast_1d(self._obj.attrs.get('overview_groups', []))
+        assert 0 < level <= groups.size, ValueError(f"level must be between 0 and {groups.size}")
+        return self._obj.root[str(groups[level-1])]
+
     def plot(self, *args, **kwargs):
         self._obj.to_dataset().gs.plot(*args, **kwargs)
 
     def scatter(self, *args, **kwargs):
         self._obj.to_dataset().gs.scatter(*args, **kwargs)
 
-    def subset(self, key, value):
-        out = self._obj.to_dataset()
-        return out.where(out[key]==value)
+    def subset(self, *args, **kwargs):
+        return self._obj.to_dataset().gs.subset(*args, **kwargs)
+
+    def line(self, *args, **kwargs):
+        return self._obj.to_dataset().gs.line(*args, **kwargs)
+
+    def iter_lines(self):
+        return self._obj.to_dataset().gs.iter_lines()
 
     def add_timestamp(self, *args, **kwargs):
         self._obj.to_dataset().gs.add_timestamp(*args, **kwargs)
@@ -332,4 +452,10 @@ class Container:
             if self._obj[this].attrs['method'] == method:
                 sys = self._obj[this].to_dataset()
         assert not sys is None, ValueError(f"Could not find system with method attrs '{method}'")
-        return sys
\ No newline at end of file
+        return sys
+
+def _read_data(entry, spatial_ref, options):
+    """Read one manifest entry of Container.build, at module level so process pools can pickle it"""
+    kwargs = {key: value for key, value in entry.items() if key not in ('container', 'key', 'container_attrs')}
+    with set_options(**options):
+        return Container.Data(spatial_ref=spatial_ref, **kwargs)
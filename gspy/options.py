@@ -0,0 +1,34 @@
+OPTIONS = {'deferred_attributes' : False}
+
+class set_options:
+    """Set gspy options globally or within a context manager
+
+    Options
+    -------
+    deferred_attributes : bool
+        If True, derived CF attributes like valid_range are marked as pending when variables are added,
+        and are computed in one pass when the Dataset or Container is written with gs.to_netcdf.
+        Default is False.
+
+    Examples
+    --------
+    >>> gspy.set_options(deferred_attributes=True)
+
+    or
+
+    >>> with gspy.set_options(deferred_attributes=True):
+    ...     survey.gs.add_container('data').gs.add('tempest', data_filename, metadata_file)
+
+    """
+    def __init__(self, **kwargs):
+        self.old = {}
+        for key, value in kwargs.items():
+            assert key in OPTIONS, ValueError(f"{key} is not a valid option. Valid options are {list(OPTIONS.keys())}")
+            self.old[key] = OPTIONS[key]
+        OPTIONS.update(kwargs)
+
+    def __enter__(self):
+        return
+
+    def __exit__(self, type, value, traceback):
+        OPTIONS.update(self.old)
@@ -21,4 +21,48 @@ def deprecated(func):
             stacklevel=2
         )
         return func(*args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+def get_executor(executor, n_workers=None):
+    """Executor that tasks are submitted to and the function that shuts it down
+
+    Parameters
+    ----------
+    executor : str or executor
+        * 'thread' uses a concurrent.futures.ThreadPoolExecutor.
+        * 'process' uses a concurrent.futures.ProcessPoolExecutor.
+        * 'dask' uses a dask.distributed LocalCluster.
+        * Any object with a submit method returning futures, e.g. an existing executor or dask.distributed.Client.
+    n_workers : int, optional
+        Number of workers when the executor is created here. Default is the executor's own default.
+
+    Returns
+    -------
+    pool : executor
+    shutdown : callable
+
+    """
+    if not isinstance(executor, str):
+        assert hasattr(executor, 'submit'), TypeError("executor must be 'thread', 'process', 'dask' or have a submit method")
+        # The caller owns the executor
+        return executor, lambda: None
+
+    match executor.lower():
+        case 'thread':
+            from concurrent.futures import ThreadPoolExecutor
+            pool = ThreadPoolExecutor(n_workers)
+            return pool, pool.shutdown
+        case 'process':
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(n_workers)
+            return pool, pool.shutdown
+        case 'dask':
+            from dask.distributed import Client, LocalCluster
+            cluster = LocalCluster(n_workers=n_workers)
+            client = Client(cluster)
+            def shutdown():
+                client.close()
+                cluster.close()
+            return client, shutdown
+
+    raise ValueError(f"executor must be 'thread', 'process', 'dask' or have a submit method, not {executor}")
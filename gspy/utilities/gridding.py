@@ -0,0 +1,452 @@
+from collections import deque
+import numpy as np
+
+def idw(x, y, values, xi, yi, power=2.0, k=12, radius=np.inf):
+	"""Inverse distance weighted interpolation of scattered points
+
+	The k nearest points of each node are found with a KD-tree.
+
+	Parameters
+	----------
+	x, y : array_like
+		Coordinates of the points
+	values : array_like
+		Values of the points
+	xi, yi : array_like
+		Coordinates of the nodes
+	power : float, optional
+		Power of the inverse distance weights. Default is 2.
+	k : int, optional
+		Number of nearest points used for each node. Default is 12.
+	radius : float, optional
+		Only points within this distance of a node are used. Default is infinite.
+
+	Returns
+	-------
+	numpy.ndarray
+		Values at the nodes with the shape of xi. NaN where there are no points within the radius.
+
+	"""
+	from scipy.spatial import cKDTree
+
+	xi, yi = np.broadcast_arrays(xi, yi)
+	out = np.full(xi.shape, np.nan)
+	if np.size(x) == 0:
+		return out
+
+	k = min(k, np.size(x))
+	d, i = cKDTree(np.c_[x, y]).query(np.c_[xi.ravel(), yi.ravel()], k=k, distance_upper_bound=radius)
+	d, i = d.reshape(-1, k), i.reshape(-1, k)
+
+	# Missing neighbours have an infinite distance and the index one past the end
+	v = np.append(values, np.nan)[i]
+	found = np.isfinite(d)
+	exact = d[:, 0] == 0.0
+
+	w = np.zeros_like(d)
+	w[found] = 1.0 / np.where(d[found] == 0.0, 1.0, d[found])**power
+	total = w.sum(axis=1)
+
+	with np.errstate(invalid='ignore', divide='ignore'):
+		z = np.sum(w * np.where(found, v, 0.0), axis=1) / total
+	z[total == 0.0] = np.nan
+	z[exact] = v[exact, 0]
+
+	out.ravel()[:] = z
+	return out
+
+def natural_neighbour(x, y, values, xi, yi):
+	"""Interpolation of scattered points over their Delaunay triangulation
+
+	Each node is interpolated linearly from the three natural neighbours of the triangle it falls in.
+	This is continuous across the triangle edges and honours the points exactly, but unlike Sibson's
+	area stealing weights its gradient is not continuous.
+
+	Parameters
+	----------
+	x, y : array_like
+		Coordinates of the points
+	values : array_like
+		Values of the points
+	xi, yi : array_like
+		Coordinates of the nodes
+
+	Returns
+	-------
+	numpy.ndarray
+		Values at the nodes with the shape of xi. NaN outside the convex hull of the points.
+
+	"""
+	from scipy.interpolate import LinearNDInterpolator
+	from scipy.spatial import QhullError
+
+	xi, yi = np.broadcast_arrays(xi, yi)
+	try:
+		return LinearNDInterpolator(np.c_[x, y], values)(xi, yi)
+	except (QhullError, ValueError):
+		# Fewer than three points, or all of them on a line
+		return np.full(xi.shape, np.nan)
+
+def minimum_curvature(x, y, values, x_nodes, y_nodes, tension=0.25, max_iterations=250, tolerance=1e-5, coarse=None):
+	"""Minimum curvature gridding of scattered points (Briggs, 1974)
+
+	Points are assigned to their nearest node, and the remaining nodes are relaxed towards the solution of the
+	biharmonic equation, blended with Laplace's equation by the tension. The grid is solved coarse to fine, each
+	level starting from the interpolated solution of the level with half as many nodes, or from coarse once the
+	next level would be as coarse as it.
+
+	Parameters
+	----------
+	x, y : array_like
+		Coordinates of the points
+	values : array_like
+		Values of the points
+	x_nodes, y_nodes : array_like
+		Regularly spaced coordinates of the columns and rows of the grid
+	tension : float, optional
+		Between 0, minimum curvature, and 1, harmonic. Default is 0.25.
+	max_iterations : int, optional
+		Maximum number of relaxation sweeps on each level. Default is 250.
+	tolerance : float, optional
+		Sweeps stop when no node changes by more than this fraction of the range of the values. Default is 1e-5.
+	coarse : tuple, optional
+		x_nodes, y_nodes and values of a solution on a coarser grid over these nodes, usually solved over a larger
+		area. Levels finer than it start from it instead of solving the coarser levels from these points only.
+		Default is None.
+
+	Returns
+	-------
+	numpy.ndarray
+		Values with shape (y_nodes.size, x_nodes.size)
+
+	"""
+	from scipy.ndimage import map_coordinates
+
+	x_nodes, y_nodes = np.asarray(x_nodes), np.asarray(y_nodes)
+	ny, nx = y_nodes.size, x_nodes.size
+
+	if (np.size(x) == 0) and (coarse is None):
+		return np.full((ny, nx), np.nan)
+
+	dx = x_nodes[1] - x_nodes[0] if nx > 1 else 1.0
+	dy = y_nodes[1] - y_nodes[0] if ny > 1 else 1.0
+
+	# Start from the given coarse solution, a coarser solution, or from inverse distance weighting on the coarsest level
+	if (coarse is not None) and ((min(nx, ny) <= 16) or (2.0 * abs(dx) >= 0.999 * abs(coarse[0][1] - coarse[0][0]))):
+		cx, cy, cu = coarse
+		rows, cols = np.meshgrid((y_nodes - cy[0]) / (cy[1] - cy[0]), (x_nodes - cx[0]) / (cx[1] - cx[0]), indexing='ij')
+		u = map_coordinates(cu, [rows, cols], order=1, mode='nearest')
+	elif min(nx, ny) > 16:
+		u = minimum_curvature(x, y, values, x_nodes[::2], y_nodes[::2], tension, max_iterations, tolerance, coarse)
+		rows, cols = np.meshgrid(0.5 * np.arange(ny), 0.5 * np.arange(nx), indexing='ij')
+		u = map_coordinates(u, [rows, cols], order=1, mode='nearest')
+	else:
+		u = idw(x, y, values, *np.meshgrid(x_nodes, y_nodes), k=8)
+
+	# Nodes nearest to the points hold the mean of their values
+	col = np.rint((np.asarray(x) - x_nodes[0]) / dx).astype(np.int64)
+	row = np.rint((np.asarray(y) - y_nodes[0]) / dy).astype(np.int64)
+	inside = (col >= 0) & (col < nx) & (row >= 0) & (row < ny)
+	node = row[inside] * nx + col[inside]
+	count = np.bincount(node, minlength=nx * ny)
+	fixed = count > 0
+	z = np.bincount(node, weights=np.asarray(values)[inside], minlength=nx * ny)[fixed] / count[fixed]
+	fixed = fixed.reshape(ny, nx)
+	u[fixed] = z
+
+	if (ny < 3) or (nx < 3) or fixed.all():
+		return u
+
+	# Nodes around a tile of a larger grid hold the coarse solution, only the edges of the grid reflect
+	frame = None
+	if coarse is not None:
+		cx, cy, cu = coarse
+		rows = (np.r_[y_nodes[0] - 2.0 * dy, y_nodes[0] - dy, y_nodes, y_nodes[-1] + dy, y_nodes[-1] + 2.0 * dy] - cy[0]) / (cy[1] - cy[0])
+		cols = (np.r_[x_nodes[0] - 2.0 * dx, x_nodes[0] - dx, x_nodes, x_nodes[-1] + dx, x_nodes[-1] + 2.0 * dx] - cx[0]) / (cx[1] - cx[0])
+		frame = np.ones((ny + 4, nx + 4), dtype=bool)
+		frame[2:-2, 2:-2] = False
+		frame &= ((rows >= -1e-9) & (rows <= cu.shape[0] - 1 + 1e-9))[:, None] & ((cols >= -1e-9) & (cols <= cu.shape[1] - 1 + 1e-9))[None, :]
+		r, c = np.nonzero(frame)
+		held = map_coordinates(cu, [rows[r], cols[c]], order=1, mode='nearest')
+
+	tolerance = tolerance * max(np.ptp(values) if np.size(values) > 0 else np.ptp(coarse[2]), np.finfo(np.float64).tiny)
+	for _ in range(max_iterations):
+		p = np.pad(u, 2, mode='reflect')
+		if frame is not None:
+			p[frame] = held
+		adjacent = p[1:-3, 2:-2] + p[3:-1, 2:-2] + p[2:-2, 1:-3] + p[2:-2, 3:-1]
+		diagonal = p[1:-3, 1:-3] + p[1:-3, 3:-1] + p[3:-1, 1:-3] + p[3:-1, 3:-1]
+		second = p[:-4, 2:-2] + p[4:, 2:-2] + p[2:-2, :-4] + p[2:-2, 4:]
+		target = (1.0 - tension) * (8.0 * adjacent - 2.0 * diagonal - second) / 20.0 + tension * 0.25 * adjacent
+
+		# Damped Jacobi sweep, undamped sweeps of the biharmonic stencil diverge
+		change = 0.5 * (target - u)
+		change[fixed] = 0.0
+		u += change
+		if np.abs(change).max() < tolerance:
+			break
+
+	return u
+
+def grid_tile(method, x, y, values, x_nodes, y_nodes, max_distance=None, **kwargs):
+	"""Grid scattered points onto one tile of nodes
+
+	Parameters
+	----------
+	method : str
+		'idw', 'natural' or 'minimum_curvature'
+	x, y : array_like
+		Coordinates of the points
+	values : array_like
+		Values of the points
+	x_nodes, y_nodes : array_like
+		Coordinates of the columns and rows of the tile
+	max_distance : float, optional
+		Nodes further than this from every point are NaN. Default is None.
+	kwargs : dict
+		Passed to the gridding method
+
+	Returns
+	-------
+	numpy.ndarray
+		Values with shape (y_nodes.size, x_nodes.size)
+
+	"""
+	xi, yi = np.meshgrid(x_nodes, y_nodes)
+
+	match method:
+		case 'idw':
+			out = idw(x, y, values, xi, yi, **kwargs)
+		case 'natural':
+			out = natural_neighbour(x, y, values, xi, yi)
+		case 'minimum_curvature':
+			out = minimum_curvature(x, y, values, x_nodes, y_nodes, **kwargs)
+		case _:
+			raise ValueError(f"method must be one of ['idw', 'natural', 'minimum_curvature'], not {method}")
+
+	if (max_distance is not None) and (np.size(x) == 0):
+		out[:] = np.nan
+	elif max_distance is not None:
+		from scipy.spatial import cKDTree
+		d, _ = cKDTree(np.c_[x, y]).query(np.c_[xi.ravel(), yi.ravel()], distance_upper_bound=max_distance)
+		out.ravel()[~np.isfinite(d)] = np.nan
+
+	return out
+
+def natural_tile(interpolator, x_nodes, y_nodes, tree=None, max_distance=None):
+	"""Evaluate a triangulation of all the points on one tile of nodes
+
+	Parameters
+	----------
+	interpolator : scipy.interpolate.LinearNDInterpolator or None
+		Interpolator over the Delaunay triangulation of the points. None if they could not be triangulated.
+	x_nodes, y_nodes : array_like
+		Coordinates of the columns and rows of the tile
+	tree : scipy.spatial.cKDTree, optional
+		KD-tree of the points, needed with max_distance
+	max_distance : float, optional
+		Nodes further than this from every point are NaN. Default is None.
+
+	Returns
+	-------
+	numpy.ndarray
+		Values with shape (y_nodes.size, x_nodes.size)
+
+	"""
+	xi, yi = np.meshgrid(x_nodes, y_nodes)
+	if interpolator is None:
+		return np.full(xi.shape, np.nan)
+
+	out = interpolator(xi, yi)
+	if max_distance is not None:
+		d, _ = tree.query(np.c_[xi.ravel(), yi.ravel()], distance_upper_bound=max_distance)
+		out.ravel()[~np.isfinite(d)] = np.nan
+	return out
+
+def grid(x, y, values, x_nodes, y_nodes, method='idw', tile_size=512, buffer=None, max_distance=None, executor=None, n_workers=None, **kwargs):
+	"""Grid scattered points tile by tile
+
+	The grid is split into square tiles of nodes. Each tile is gridded from the points that fall within it or
+	within a buffer of nodes around it, so tiles are independent and only hold their own points. Tiles can be
+	handed to an executor, a few at a time per worker so memory stays bounded. For 'idw' a tile matches the
+	untiled grid wherever the neighbours of its nodes are within the buffer.
+
+	The triangles covering a tile can have corners far outside any buffer where lines are sparse, so for
+	'natural' the points are triangulated once and only the evaluation is tiled. The result does not depend
+	on tile_size or buffer.
+
+	A minimum curvature solution is global, a tile solved from its own points drifts away from its neighbours
+	where lines are sparse. For 'minimum_curvature' the levels coarser than a tile are solved once over the
+	whole grid, each tile only refines them, and tiles are feathered into their neighbours across their
+	buffers. The result is close to the untiled grid, without seams between tiles.
+
+	Parameters
+	----------
+	x, y : array_like
+		Coordinates of the points
+	values : array_like
+		Values of the points. NaN are ignored.
+	x_nodes, y_nodes : array_like
+		Regularly spaced coordinates of the columns and rows of the grid
+	method : str, optional
+		'idw', 'natural' or 'minimum_curvature'. Default is 'idw'.
+	tile_size : int, optional
+		Number of rows and columns of nodes in a tile. Default is 512.
+	buffer : int, optional
+		Number of nodes around a tile whose points are also used, at most tile_size. Default is tile_size // 4.
+		Not used by 'natural'.
+	max_distance : float, optional
+		Nodes further than this from every point are NaN. Default is None.
+	executor : str or executor, optional
+		See gspy.utilities.get_executor. Default is None, tiles are gridded one after another.
+	n_workers : int, optional
+		Number of workers when the executor is created here.
+	kwargs : dict
+		Passed to the gridding method, see idw and minimum_curvature.
+
+	Returns
+	-------
+	numpy.ndarray
+		Values with shape (y_nodes.size, x_nodes.size)
+
+	"""
+	x_nodes, y_nodes = np.asarray(x_nodes, dtype=np.float64), np.asarray(y_nodes, dtype=np.float64)
+	ny, nx = y_nodes.size, x_nodes.size
+	assert (nx > 1) and (ny > 1), ValueError("The grid needs at least two rows and two columns")
+
+	buffer = tile_size // 4 if buffer is None else buffer
+	assert 0 <= buffer <= tile_size, ValueError("buffer must be between 0 and tile_size")
+
+	x, y, values = np.ravel(x), np.ravel(y), np.ravel(values)
+	keep = np.isfinite(x) & np.isfinite(y) & np.isfinite(values)
+	x, y, values = x[keep], y[keep], values[keep]
+	n_tiles = (-(-ny // tile_size), -(-nx // tile_size))
+
+	def windows():
+		for i in range(n_tiles[0]):
+			for j in range(n_tiles[1]):
+				yield i, j, (i * tile_size, min((i + 1) * tile_size, ny)), (j * tile_size, min((j + 1) * tile_size, nx))
+
+	if method == 'natural':
+		from scipy.interpolate import LinearNDInterpolator
+		from scipy.spatial import cKDTree, QhullError
+
+		try:
+			interpolator = LinearNDInterpolator(np.c_[x, y], values)
+		except (QhullError, ValueError):
+			# Fewer than three points, or all of them on a line
+			interpolator = None
+		tree = cKDTree(np.c_[x, y]) if (max_distance is not None) and (x.size > 0) else None
+
+		def tasks():
+			for _, _, (r0, r1), (c0, c1) in windows():
+				yield ((slice(r0, r1), slice(c0, c1)), (slice(None), slice(None))), natural_tile, (interpolator, x_nodes[c0:c1], y_nodes[r0:r1], tree, max_distance), {}
+
+		return _run(tasks(), (ny, nx), executor, n_workers)
+
+	# Row and column of the node nearest to each point, and the tile they fall in
+	dx, dy = x_nodes[1] - x_nodes[0], y_nodes[1] - y_nodes[0]
+	col = np.floor((x - x_nodes[0]) / dx + 0.5).astype(np.int64)
+	row = np.floor((y - y_nodes[0]) / dy + 0.5).astype(np.int64)
+	near = (col >= -buffer) & (col < nx + buffer) & (row >= -buffer) & (row < ny + buffer)
+	x, y, values, col, row = x[near], y[near], values[near], col[near], row[near]
+
+	# Points just outside the grid are in the ring of tiles around it
+	tile = (np.floor_divide(row, tile_size) + 1) * (n_tiles[1] + 2) + np.floor_divide(col, tile_size) + 1
+	order = np.argsort(tile, kind='stable')
+	x, y, values, col, row, tile = x[order], y[order], values[order], col[order], row[order], tile[order]
+	edges = np.searchsorted(tile, np.arange((n_tiles[0] + 2) * (n_tiles[1] + 2) + 1))
+
+	# Levels of a minimum curvature solution coarser than a tile are solved over the whole grid
+	blend = (method == 'minimum_curvature') and (max(n_tiles) > 1)
+	if blend:
+		# At least two coarse nodes along each side, so the coarse grid has a spacing
+		step = min(2**int(np.ceil(np.log2(max(nx, ny) / tile_size))), 2**int(np.log2(min(nx, ny) - 1)))
+		coarse = minimum_curvature(x, y, values, x_nodes[::step], y_nodes[::step], **kwargs)
+		width = max(min(buffer, tile_size // 2), 0.5)
+
+	def tasks():
+		for i, j, (r0, r1), (c0, c1) in windows():
+			b0, b1 = max(r0 - buffer, 0), min(r1 + buffer, ny)
+			a0, a1 = max(c0 - buffer, 0), min(c1 + buffer, nx)
+			if blend:
+				# Tiles start on nodes of the coarse grid, so their levels line up with it
+				b0, a0 = b0 - b0 % step, a0 - a0 % step
+
+			# Points of this tile and its neighbours that are within the buffer
+			index = np.concatenate([np.arange(edges[k], edges[k + 1]) for a in range(i, i + 3) for k in range(a * (n_tiles[1] + 2) + j, a * (n_tiles[1] + 2) + j + 3)])
+			index = index[(row[index] >= min(r0 - buffer, b0)) & (row[index] < r1 + buffer) & (col[index] >= min(c0 - buffer, a0)) & (col[index] < c1 + buffer)]
+			if (index.size == 0) and not blend:
+				continue
+
+			if blend:
+				k0, l0 = max(min(b0 // step - 2, coarse.shape[0] - 2), 0), max(min(a0 // step - 2, coarse.shape[1] - 2), 0)
+				k1, l1 = min(-(-b1 // step) + 2, coarse.shape[0]), min(-(-a1 // step) + 2, coarse.shape[1])
+				window = (slice(b0, b1), slice(a0, a1)), np.outer(_feather(b0, b1, r0, r1, ny, width), _feather(a0, a1, c0, c1, nx, width))
+				tile_kwargs = dict(kwargs, coarse=(x_nodes[::step][l0:l1], y_nodes[::step][k0:k1], coarse[k0:k1, l0:l1]))
+				yield window, grid_tile, (method, x[index], y[index], values[index], x_nodes[a0:a1], y_nodes[b0:b1], max_distance), tile_kwargs
+			else:
+				window = (slice(r0, r1), slice(c0, c1)), (slice(r0 - b0, r1 - b0), slice(c0 - a0, c1 - a0))
+				yield window, grid_tile, (method, x[index], y[index], values[index], x_nodes[a0:a1], y_nodes[b0:b1], max_distance), kwargs
+
+	return _run(tasks(), (ny, nx), executor, n_workers, blend)
+
+def _feather(start, stop, lo, hi, n, width):
+	"""Weights of nodes start to stop of a tile whose own nodes are lo to hi, ramping across edges shared with other tiles
+
+	The ramps of two neighbouring tiles sum to one over the width nodes either side of their shared edge.
+	"""
+	i = np.arange(start, stop) + 0.5
+	w = np.ones(i.size)
+	if lo > 0:
+		w = np.minimum(w, (i - (lo - width)) / (2.0 * width))
+	if hi < n:
+		w = np.minimum(w, ((hi + width) - i) / (2.0 * width))
+	return np.clip(w, 0.0, 1.0)
+
+def _run(tasks, shape, executor=None, n_workers=None, blend=False):
+	"""Fill a grid with the results of tile tasks, one after another or on an executor
+
+	With blend, the window of a task is its nodes and their weights, and overlapping tiles are averaged.
+	"""
+	from . import get_executor
+
+	out = np.full(shape, np.nan)
+	if blend:
+		total, weight = np.zeros(shape), np.zeros(shape)
+
+	def place(window, result):
+		if blend:
+			target, w = window
+			w = np.where(np.isnan(result), 0.0, w)
+			total[target] += w * np.where(w > 0.0, result, 0.0)
+			weight[target] += w
+		else:
+			target, source = window
+			out[target] = result[source]
+
+	if executor is None:
+		for window, function, args, kwargs in tasks:
+			place(window, function(*args, **kwargs))
+	else:
+		pool, shutdown = get_executor(executor, n_workers)
+		try:
+			# Only a few tiles per worker are in flight, so the points of every tile are not held at once
+			limit = 2 * (n_workers or getattr(pool, '_max_workers', None) or 4)
+			pending = deque()
+			for window, function, args, kwargs in tasks:
+				pending.append((window, pool.submit(function, *args, **kwargs)))
+				if len(pending) >= limit:
+					window, future = pending.popleft()
+					place(window, future.result())
+			while pending:
+				window, future = pending.popleft()
+				place(window, future.result())
+		finally:
+			shutdown()
+
+	if blend:
+		covered = weight > 0.0
+		out[covered] = total[covered] / weight[covered]
+
+	return out
@@ -1,6 +1,160 @@
-from numpy import sin, cos, sqrt, atan2, radians
+from concurrent.futures import ThreadPoolExecutor
+from os import cpu_count
+from numpy import sin, cos, sqrt, atan2, radians, arange, asarray, atleast_1d, cumsum, diff, fmax, fmin, hypot, iinfo, inf, isfinite, maximum, nan, nanmin, nanmax, r_, where
+
 def haversine_distance(lon0, lat0, lon1, lat1):
 	dlon = radians(lon1) - radians(lon0)
 	dlat = radians(lat1) - radians(lat0)
 	a = sin(dlat / 2)**2 + cos(radians(lat0)) * cos(radians(lat1)) * sin(dlon / 2)**2
 	return 6373000.0 * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+def along_track_distance(x, y, line=None, geod=None):
+	"""Cumulative distance along consecutive points, restarting from zero at the first point of every line
+
+	Parameters
+	----------
+	x, y : array_like
+		Coordinates of the points in acquisition order.
+	line : array_like, optional
+		Line number of each point. Default is None, all points are one line.
+	geod : pyproj.Geod, optional
+		Ellipsoid to measure geodesic distances on when x, y are longitude and latitude in degrees.
+		Default is None, x and y are projected and distances are planar.
+
+	Returns
+	-------
+	numpy.ndarray
+		Distance of each point from the start of its line. Steps from or to a point without coordinates are zero.
+
+	"""
+	x, y = asarray(x, dtype='float64'), asarray(y, dtype='float64')
+	if x.size == 0:
+		return x
+
+	if geod is None:
+		step = hypot(diff(x), diff(y))
+	else:
+		step = geod.inv(x[:-1], y[:-1], x[1:], y[1:])[2]
+	step = where(isfinite(step), step, 0.0)
+
+	distance = r_[0.0, cumsum(step)]
+	if line is not None:
+		line = asarray(line)
+		# Subtract the distance at the start of the line of each point
+		start = r_[True, line[1:] != line[:-1]]
+		distance -= distance[maximum.accumulate(where(start, arange(x.size), 0))]
+	return distance
+
+def _chunk_min_max(chunk, null_value, lowest, highest):
+	# fmin/fmax skip NaNs. The null value can only change the result if it is the minimum or maximum itself,
+	# in which case it is swapped for the opposite extreme in a temporary the size of the chunk.
+	mn, mx = fmin.reduce(chunk, axis=None), fmax.reduce(chunk, axis=None)
+	if mn != mn:
+		return mn, mx, False
+	if null_value is None or (mn != null_value and mx != null_value):
+		return mn, mx, True
+	if mn == null_value and mx == null_value:
+		return mn, mx, False
+	if mn == null_value:
+		mn = fmin.reduce(where(chunk == null_value, highest, chunk), axis=None)
+	else:
+		mx = fmax.reduce(where(chunk == null_value, lowest, chunk), axis=None)
+	return mn, mx, True
+
+def _extremes(dtype):
+	if dtype.kind == 'f':
+		return dtype.type(-inf), dtype.type(inf)
+	info = iinfo(dtype)
+	return dtype.type(info.min), dtype.type(info.max)
+
+def block_min_max(values, null_value=None):
+	"""Minimum and maximum of a single block of values, skipping NaNs and an optional null value
+
+	Parameters
+	----------
+	values : array_like
+		Numerical array
+	null_value : scalar, optional
+		Entries equal to this value are ignored.
+
+	Returns
+	-------
+	minimum, maximum : scalar
+	valid : bool
+		Whether the block had any valid entries.
+
+	"""
+	values = atleast_1d(asarray(values))
+	return _chunk_min_max(values, null_value, *_extremes(values.dtype))
+
+def combine_min_max(results, kind='f'):
+	"""Combine the block_min_max of several blocks
+
+	Parameters
+	----------
+	results : list of tuple
+		(minimum, maximum, valid) of each block
+	kind : str, optional
+		numpy dtype kind of the values.
+
+	Returns
+	-------
+	minimum, maximum : scalar
+		NaN for floating point values without valid entries.
+
+	"""
+	results = [r for r in results if r[2]]
+	if len(results) == 0:
+		assert kind == 'f', ValueError("No valid values to compute a minimum and maximum from")
+		return nan, nan
+
+	return min(r[0] for r in results), max(r[1] for r in results)
+
+def min_max(values, null_value=None, chunk_size=1048576, n_threads=None):
+	"""Minimum and maximum of an array, skipping NaNs and an optional null value
+
+	The array is reduced in blocks of rows along its first axis without making a masked copy of it.
+	Blocks are spread over a thread pool when there are more than one.
+
+	Parameters
+	----------
+	values : array_like
+		Numerical array
+	null_value : scalar, optional
+		Entries equal to this value are ignored.
+	chunk_size : int, optional
+		Approximate number of entries reduced per block.
+	n_threads : int, optional
+		Number of threads. Defaults to the number of cpus.
+
+	Returns
+	-------
+	minimum, maximum : scalar
+		NaN for floating point arrays without valid entries.
+
+	Raises
+	------
+	Exception
+		If an integer array has no valid entries.
+
+	"""
+	values = atleast_1d(asarray(values))
+
+	if values.dtype.kind not in 'iuf':
+		return nanmin(values), nanmax(values)
+
+	lowest, highest = _extremes(values.dtype)
+
+	row_size = max(1, values[0].size)
+	rows = max(1, chunk_size // row_size)
+	chunks = [values[i:i+rows] for i in range(0, values.shape[0], rows)]
+
+	n_threads = min(len(chunks), n_threads or cpu_count() or 1)
+
+	if n_threads == 1:
+		results = [_chunk_min_max(chunk, null_value, lowest, highest) for chunk in chunks]
+	else:
+		with ThreadPoolExecutor(n_threads) as pool:
+			results = list(pool.map(lambda chunk: _chunk_min_max(chunk, null_value, lowest, highest), chunks))
+
+	return combine_min_max(results, values.dtype.kind)
@@ -0,0 +1,238 @@
+from zlib import crc32
+
+import numpy as np
+
+def hilbert(x, y):
+	"""Position along a Hilbert curve of points on a 65536 x 65536 grid
+
+	Parameters
+	----------
+	x, y : array_like of int
+		Column and row of each point, between 0 and 65535.
+
+	Returns
+	-------
+	numpy.ndarray of uint32
+
+	"""
+	x, y = np.asarray(x, dtype=np.uint32), np.asarray(y, dtype=np.uint32)
+	mask = np.uint32(0xFFFF)
+
+	a = x ^ y
+	b = mask ^ a
+	c = mask ^ (x | y)
+	d = x & (y ^ mask)
+
+	A = a | (b >> 1)
+	B = (a >> 1) ^ a
+	C = ((c >> 1) ^ (b & (d >> 1))) ^ c
+	D = ((a & (c >> 1)) ^ (d >> 1)) ^ d
+
+	a, b, c, d = A, B, C, D
+	A = (a & (a >> 2)) ^ (b & (b >> 2))
+	B = (a & (b >> 2)) ^ (b & ((a ^ b) >> 2))
+	C = C ^ ((a & (c >> 2)) ^ (b & (d >> 2)))
+	D = D ^ ((b & (c >> 2)) ^ ((a ^ b) & (d >> 2)))
+
+	a, b, c, d = A, B, C, D
+	A = (a & (a >> 4)) ^ (b & (b >> 4))
+	B = (a & (b >> 4)) ^ (b & ((a ^ b) >> 4))
+	C = C ^ ((a & (c >> 4)) ^ (b & (d >> 4)))
+	D = D ^ ((b & (c >> 4)) ^ ((a ^ b) & (d >> 4)))
+
+	a, b, c, d = A, B, C, D
+	C = C ^ ((a & (c >> 8)) ^ (b & (d >> 8)))
+	D = D ^ ((b & (c >> 8)) ^ ((a ^ b) & (d >> 8)))
+
+	a = C ^ (C >> 1)
+	b = D ^ (D >> 1)
+
+	i0 = x ^ y
+	i1 = b | (mask ^ (i0 | a))
+
+	def spread(i):
+		i = (i | (i << 8)) & np.uint32(0x00FF00FF)
+		i = (i | (i << 4)) & np.uint32(0x0F0F0F0F)
+		i = (i | (i << 2)) & np.uint32(0x33333333)
+		return (i | (i << 1)) & np.uint32(0x55555555)
+
+	return (spread(i1) << 1) | spread(i0)
+
+def fingerprint(x, y):
+	"""Checksum of the coordinates of the points, in order
+
+	An index is only valid for the points it was built from. Reordering or changing them changes the checksum.
+
+	Parameters
+	----------
+	x, y : array_like
+		Coordinates of the points
+
+	Returns
+	-------
+	int
+
+	"""
+	x, y = np.ascontiguousarray(x, dtype=np.float64), np.ascontiguousarray(y, dtype=np.float64)
+	return crc32(y.data, crc32(x.data))
+
+def build(x, y, node_size=64):
+	"""Packed Hilbert R-tree of points
+
+	Points are sorted along a Hilbert curve and packed into leaves of node_size points. Every level above
+	packs node_size consecutive nodes of the level below, so the children of node i are nodes
+	i * node_size to (i + 1) * node_size - 1 of the level below and the tree is only arrays.
+
+	Parameters
+	----------
+	x, y : array_like
+		Coordinates of the points. Points with NaN coordinates are left out of the tree.
+	node_size : int, optional
+		Number of entries in each node. Default is 64.
+
+	Returns
+	-------
+	order : numpy.ndarray of int64
+		Positions of the points in Hilbert order.
+	bounds : numpy.ndarray
+		[xmin, ymin, xmax, ymax] of every node, the leaves first and the root last.
+	offsets : numpy.ndarray of int64
+		Row of bounds where each level starts, from the leaves up, and the number of nodes.
+
+	"""
+	x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+	order = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+	assert order.size > 0, ValueError("Need at least one point with finite coordinates to build a spatial index")
+
+	px, py = x[order], y[order]
+	x0, y0 = px.min(), py.min()
+	width, height = max(px.max() - x0, np.finfo(np.float64).tiny), max(py.max() - y0, np.finfo(np.float64).tiny)
+	h = hilbert(np.floor(65535.0 * (px - x0) / width), np.floor(65535.0 * (py - y0) / height))
+	sort = np.argsort(h, kind='stable')
+	order, px, py = order[sort], px[sort], py[sort]
+
+	# Leaves
+	starts = np.arange(0, order.size, node_size)
+	levels = [np.c_[np.minimum.reduceat(px, starts), np.minimum.reduceat(py, starts), np.maximum.reduceat(px, starts), np.maximum.reduceat(py, starts)]]
+
+	# Nodes above pack consecutive nodes of the level below
+	while levels[-1].shape[0] > 1:
+		below = levels[-1]
+		starts = np.arange(0, below.shape[0], node_size)
+		levels.append(np.c_[np.minimum.reduceat(below[:, 0], starts), np.minimum.reduceat(below[:, 1], starts),
+							np.maximum.reduceat(below[:, 2], starts), np.maximum.reduceat(below[:, 3], starts)])
+
+	offsets = np.cumsum([0] + [level.shape[0] for level in levels])
+	return order, np.vstack(levels), offsets
+
+def _children(nodes, node_size, n_below):
+	"""Nodes of the level below that are children of nodes"""
+	if nodes.size == 0:
+		return nodes
+	starts = nodes * node_size
+	counts = np.minimum(node_size, n_below - starts)
+	# Concatenated ranges start:start+count without a python loop
+	return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+def _search(bounds, offsets, node_size, n_points, keep):
+	"""Positions in Hilbert order of the leaves whose boxes pass keep at every level"""
+	n_levels = offsets.size - 1
+	nodes = np.arange(offsets[-1] - offsets[-2])
+	for level in range(n_levels - 1, -1, -1):
+		nodes = nodes[keep(bounds[offsets[level] + nodes])]
+		below = n_points if level == 0 else offsets[level] - offsets[level - 1]
+		nodes = _children(nodes, node_size, below)
+	return nodes
+
+def _mindist(boxes, px, py):
+	"""Squared distance from a point to each box"""
+	dx = np.maximum(np.maximum(boxes[:, 0] - px, px - boxes[:, 2]), 0.0)
+	dy = np.maximum(np.maximum(boxes[:, 1] - py, py - boxes[:, 3]), 0.0)
+	return dx * dx + dy * dy
+
+def query_bbox(order, bounds, offsets, node_size, x, y, xmin, xmax, ymin, ymax):
+	"""Points inside a bounding box
+
+	Parameters
+	----------
+	order, bounds, offsets : numpy.ndarray
+		Spatial index from build
+	node_size : int
+		Number of entries in each node of the index
+	x, y : numpy.ndarray
+		Coordinates of the points the index was built from
+	xmin, xmax, ymin, ymax : float
+		Bounding box, edges included
+
+	Returns
+	-------
+	numpy.ndarray of int64
+		Sorted positions of the points
+
+	"""
+	def keep(boxes):
+		return (boxes[:, 0] <= xmax) & (boxes[:, 2] >= xmin) & (boxes[:, 1] <= ymax) & (boxes[:, 3] >= ymin)
+
+	index = order[_search(bounds, offsets, node_size, order.size, keep)]
+	inside = (x[index] >= xmin) & (x[index] <= xmax) & (y[index] >= ymin) & (y[index] <= ymax)
+	return np.sort(index[inside])
+
+def nearest(order, bounds, offsets, node_size, x, y, points, k=1):
+	"""k nearest points to each of a set of points
+
+	For each query, the points of the leaf the query descends to, and of its neighbours along the Hilbert curve,
+	give an upper bound on the distance to the k-th nearest point. Only leaves closer than that are searched.
+
+	Parameters
+	----------
+	order, bounds, offsets : numpy.ndarray
+		Spatial index from build
+	node_size : int
+		Number of entries in each node of the index
+	x, y : numpy.ndarray
+		Coordinates of the points the index was built from
+	points : array_like
+		Query points with shape (n, 2) or (2,)
+	k : int, optional
+		Number of neighbours. Default is 1.
+
+	Returns
+	-------
+	distance : numpy.ndarray
+		Distances with shape (n, k) ordered nearest first, or (n,) if k is 1.
+	index : numpy.ndarray of int64
+		Positions of the neighbours with the same shape as distance.
+
+	"""
+	points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+	assert points.shape[1] == 2, ValueError("points must have shape (n, 2)")
+	k = min(k, order.size)
+
+	n_leaves = offsets[1]
+	n_levels = offsets.size - 1
+	span = -(-k // node_size)
+
+	distance = np.empty((points.shape[0], k))
+	index = np.empty((points.shape[0], k), dtype=np.int64)
+	for i, (px, py) in enumerate(points):
+		# Descend to the closest leaf, one node per level
+		node = 0
+		for level in range(n_levels - 1, 0, -1):
+			children = _children(np.r_[node], node_size, offsets[level] - offsets[level - 1])
+			node = children[np.argmin(_mindist(bounds[offsets[level - 1] + children], px, py))]
+
+		# Enough points around it along the curve bound the k-th distance
+		leaves = np.arange(max(node - span, 0), min(node + span + 1, n_leaves))
+		candidates = order[_children(leaves, node_size, order.size)]
+		d2 = (x[candidates] - px)**2 + (y[candidates] - py)**2
+		radius = np.partition(d2, k - 1)[k - 1]
+
+		candidates = order[_search(bounds, offsets, node_size, order.size, lambda boxes: _mindist(boxes, px, py) <= radius)]
+		d2 = (x[candidates] - px)**2 + (y[candidates] - py)**2
+		nearest = np.argpartition(d2, k - 1)[:k] if d2.size > k else np.arange(d2.size)
+		nearest = nearest[np.lexsort((candidates[nearest], d2[nearest]))]
+		distance[i], index[i] = np.sqrt(d2[nearest]), candidates[nearest]
+
+	if k == 1:
+		return distance[:, 0], index[:, 0]
+	return distance, index
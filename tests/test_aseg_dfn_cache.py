@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+import gspy.file_handlers.aseg_gdf_handler as aseg
+from gspy.file_handlers.aseg_gdf_handler import aseg_gdf2_handler
+
+DFN = """DEFN   ST=RECD,RT=COMM;RT:A0;COMMENTS:A80
+DEFN  0 ST=RECD,RT=;Line:I10:NULL=-99999999,NAME=Line Number
+DEFN  1 ST=RECD,RT=;Fiducial:i8:NULL=-9999999,NAME=Fiducial Number
+DEFN  2 ST=RECD,RT=;Height:f8.2:UNIT=m:NULL=-999.99,NAME=Height
+DEFN  3 ST=RECD,RT=;Gates:3f8.2:UNIT=pV:NAME=Gates
+DEFN  4 ST=RECD,RT=;END DEFN
+"""
+DAT = """    100001       1   50.00    1.00    2.00    3.00
+    100001       2 -999.99    1.50    2.50    3.50
+"""
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    monkeypatch.setenv('GSPY_CACHE_DIR', str(tmp_path / 'cache'))
+    (tmp_path / 'survey.dfn').write_text(DFN)
+    (tmp_path / 'survey.dat').write_text(DAT)
+    return str(tmp_path / 'survey.dat')
+
+
+def cached_files(tmp_path):
+    return sorted((tmp_path / 'cache' / 'dfn').glob('*'))
+
+
+def assert_same_dfn(a, b):
+    assert a['columns'] == b['columns']
+    assert a['layout'] == b['layout']
+    assert a['metadata'] == b['metadata']
+    for key, value in a['null_values'].items():
+        assert type(b['null_values'][key]) is type(value), key
+        assert b['null_values'][key] == value, key
+
+
+def test_cache_is_json_and_matches_parsing(data_file, tmp_path):
+    parsed = aseg_gdf2_handler.read(data_file, metadata={}, cache_dfn=False)._dfn
+    assert cached_files(tmp_path) == []
+
+    first = aseg_gdf2_handler.read(data_file, metadata={})._dfn
+    files = cached_files(tmp_path)
+    assert [f.suffix for f in files] == ['.json']
+
+    second = aseg_gdf2_handler.read(data_file, metadata={})._dfn
+    assert cached_files(tmp_path) == files
+    assert_same_dfn(parsed, first)
+    assert_same_dfn(parsed, second)
+
+    # I10 in upper case is parsed with a float null value, the cache keeps it
+    assert type(second['null_values']['Line']) is np.float64
+    assert type(second['null_values']['Fiducial']) is np.int32
+    assert second['null_values']['Gates'] == 'not_defined'
+
+
+def test_damaged_cache_is_parsed_again(data_file, tmp_path):
+    aseg_gdf2_handler.read(data_file, metadata={})
+    cache_file, = cached_files(tmp_path)
+    cache_file.write_text('{"metadata": ')
+
+    dfn = aseg_gdf2_handler.read(data_file, metadata={})._dfn
+    assert_same_dfn(aseg_gdf2_handler.read(data_file, metadata={}, cache_dfn=False)._dfn, dfn)
+
+
+def test_cache_key_has_version_and_schema(data_file, tmp_path, monkeypatch):
+    aseg_gdf2_handler.read(data_file, metadata={})
+    monkeypatch.setattr(aseg, '__version__', 'other')
+    aseg_gdf2_handler.read(data_file, metadata={})
+    monkeypatch.setattr(aseg, '_DFN_CACHE_SCHEMA', aseg._DFN_CACHE_SCHEMA + 1)
+    aseg_gdf2_handler.read(data_file, metadata={})
+    assert len(cached_files(tmp_path)) == 3
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gspy.file_handlers.csv_handler import csv_handler
+
+
+def read(tmp_path, text, metadata=None):
+    filename = tmp_path / "data.csv"
+    filename.write_text(text)
+    return csv_handler.read(str(filename), metadata={} if metadata is None else metadata).df
+
+
+def test_null_value_column_is_numeric(tmp_path):
+    df = read(tmp_path, "a,b\n1,x\n*,y\n3,z\n", {'a': {'null_value': '*'}})
+    assert df['a'].dtype.kind == 'f'
+    np.testing.assert_array_equal(df['a'].values, [1.0, np.nan, 3.0])
+    assert df['b'].dtype.kind not in 'iuf'
+
+
+def test_declared_dtype_with_null_value(tmp_path):
+    df = read(tmp_path, "a\n1.5\n-\n2.5\n", {'a': {'null_value': '-', 'dtype': 'float64'}})
+    np.testing.assert_array_equal(df['a'].values, [1.5, np.nan, 2.5])
+
+
+def test_suffixed_codes_stay_strings(tmp_path):
+    df = read(tmp_path, "b\n100\n100A\n200\n")
+    assert list(df['b']) == ['100', '100A', '200']
+
+
+def test_codes_past_the_sample_stay_strings(tmp_path):
+    text = "b\n" + "\n".join(str(i) for i in range(20)) + "\n20A\n"
+    filename = tmp_path / "data.csv"
+    filename.write_text(text)
+    handler = csv_handler()
+    handler.df = pd.read_csv(filename)
+    handler.coerce_mixed_columns({}, sample_size=5)
+    assert handler.df['b'].iloc[-1] == '20A'
+
+
+def test_declared_numeric_with_codes_raises(tmp_path):
+    with pytest.raises(AssertionError):
+        read(tmp_path, "b\n100\n100A\n", {'b': {'dtype': 'int32'}})
@@ -0,0 +1,34 @@
+import threading
+from types import ModuleType
+
+import gspy.file_handlers as file_handlers
+from gspy.file_handlers import file_handler, get_handler
+
+
+def test_handler_names_are_classes_after_their_modules_are_imported():
+    from gspy.file_handlers.csv_handler import csv_handler
+    from gspy.file_handlers.workbench_handler import workbench_model_handler
+
+    from gspy.file_handlers import csv_handler as by_name
+    assert by_name is csv_handler
+    assert file_handlers.workbench_model_handler is workbench_model_handler
+    assert file_handlers.workbench_handler is get_handler('workbench')
+
+
+def test_concurrent_lookups_only_see_classes():
+    names = ['aseg_gdf2_handler', 'csv_handler', 'loupe_handler', 'xyz_handler', 'workbench_handler', 'workbench_model_handler']
+    found = []
+
+    def lookup():
+        for _ in range(50):
+            found.extend(getattr(file_handlers, name) for name in names)
+            found.append(file_handler('data.csv'))
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(found) == 8 * 50 * (len(names) + 1)
+    assert not any(isinstance(handler, ModuleType) for handler in found)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from gspy.utilities.gridding import grid
+
+
+def make_lines(n_lines=11, n_points=400):
+    """East-west lines 2 km apart over a 20 km square, with an anomaly between lines"""
+    rng = np.random.default_rng(0)
+    x = np.tile(np.linspace(0.0, 20000.0, n_points), n_lines) + rng.normal(0.0, 5.0, n_lines * n_points)
+    y = np.repeat(np.linspace(0.0, 20000.0, n_lines), n_points) + rng.normal(0.0, 20.0, n_lines * n_points)
+    values = 100.0 * np.exp(-((x - 7000.0)**2 + (y - 12000.0)**2) / 3000.0**2) + 0.002 * x
+    x_nodes = np.arange(0.0, 20000.0, 100.0) + 50.0
+    y_nodes = np.arange(20000.0, 0.0, -100.0) - 50.0
+    return x, y, values, x_nodes, y_nodes
+
+
+def test_natural_does_not_depend_on_tiles():
+    x, y, values, x_nodes, y_nodes = make_lines()
+    tiled = grid(x, y, values, x_nodes, y_nodes, method='natural', tile_size=50, max_distance=1500.0)
+    untiled = grid(x, y, values, x_nodes, y_nodes, method='natural', tile_size=1000, max_distance=1500.0)
+    np.testing.assert_array_equal(tiled, untiled)
+
+
+def test_idw_does_not_depend_on_tiles_within_the_buffer():
+    x, y, values, x_nodes, y_nodes = make_lines(n_lines=101, n_points=200)
+    # Every neighbour within the radius is within the buffer of 12 nodes
+    tiled = grid(x, y, values, x_nodes, y_nodes, method='idw', tile_size=50, radius=1000.0)
+    untiled = grid(x, y, values, x_nodes, y_nodes, method='idw', tile_size=1000, radius=1000.0)
+    np.testing.assert_allclose(tiled, untiled, rtol=1e-12)
+
+
+@pytest.mark.parametrize('executor', [None, 'thread'])
+def test_minimum_curvature_tiles_have_no_seams(executor):
+    x, y, values, x_nodes, y_nodes = make_lines()
+    tile_size = 50
+    tiled = grid(x, y, values, x_nodes, y_nodes, method='minimum_curvature', tile_size=tile_size, executor=executor, n_workers=2)
+    untiled = grid(x, y, values, x_nodes, y_nodes, method='minimum_curvature', tile_size=1000)
+
+    spread = np.ptp(untiled)
+    assert np.isfinite(tiled).all()
+    assert np.abs(tiled - untiled).max() < 0.01 * spread
+
+    # The step across an edge between tiles is no larger than the same step of the untiled grid
+    for edge in range(tile_size, x_nodes.size, tile_size):
+        assert np.abs(tiled[:, edge] - tiled[:, edge - 1]).max() <= 1.1 * np.abs(untiled[:, edge] - untiled[:, edge - 1]).max() + 0.001 * spread
+    for edge in range(tile_size, y_nodes.size, tile_size):
+        assert np.abs(tiled[edge] - tiled[edge - 1]).max() <= 1.1 * np.abs(untiled[edge] - untiled[edge - 1]).max() + 0.001 * spread
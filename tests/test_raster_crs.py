@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+rasterio = pytest.importorskip('rasterio')
+from rasterio.crs import CRS
+from rasterio.transform import from_origin
+
+from gspy.gs_dataset.Raster import Raster
+
+
+UTM = from_origin(500000.0, 4400000.0, 100.0, 100.0)
+GEOGRAPHIC = from_origin(-105.0, 40.0, 0.001, 0.001)
+
+
+def write_tif(filename, crs, transform):
+    values = np.arange(20.0, dtype=np.float32).reshape(4, 5)
+    with rasterio.open(filename, 'w', driver='GTiff', width=5, height=4, count=1, dtype='float32', crs=crs, transform=transform, nodata=-9999.0) as f:
+        f.write(values, 1)
+
+
+def read(tmp_path, wkid='32613'):
+    axis = dict(units='meter', null_value='not_defined')
+    metadata = {'directory': str(tmp_path),
+                'spatial_ref': {'wkid': wkid, 'authority': 'EPSG'},
+                'dataset_attrs': {'content': 'test raster', 'type': 'data', 'structure': 'raster'},
+                'coordinates': {'x': 'easting', 'y': 'northing'},
+                'dimensions': {'x': 'easting', 'y': 'northing'},
+                'variables': {'values': dict(standard_name='values', long_name='Values', units='none', null_value=-9999.0, files='a.tif', dimensions=['x', 'y']),
+                              'easting': dict(standard_name='easting', long_name='Easting', axis='x', **axis),
+                              'northing': dict(standard_name='northing', long_name='Northing', axis='y', **axis)}}
+    return Raster.read(metadata)
+
+
+@pytest.mark.parametrize('wkid, crs, transform', [('32613', CRS.from_epsg(32613), UTM),
+                                                    ('32613', CRS.from_proj4('+proj=utm +zone=13 +datum=WGS84 +units=m +no_defs'), UTM),
+                                                    ('4326', CRS.from_user_input('OGC:CRS84'), GEOGRAPHIC)])
+def test_same_crs_is_not_reprojected(tmp_path, wkid, crs, transform, capsys):
+    write_tif(tmp_path / 'a.tif', crs, transform)
+
+    ds = read(tmp_path, wkid)
+    np.testing.assert_allclose(ds['x'].values, transform.c + transform.a * (np.arange(5) + 0.5))
+    np.testing.assert_allclose(ds['y'].values, transform.f + transform.e * (np.arange(4) + 0.5))
+    np.testing.assert_array_equal(ds['values'].values, np.arange(20.0).reshape(4, 5))
+    assert capsys.readouterr().out == ''
+
+
+def test_other_crs_is_reprojected_silently(tmp_path, capsys):
+    write_tif(tmp_path / 'a.tif', CRS.from_epsg(4326), GEOGRAPHIC)
+
+    ds = read(tmp_path)
+    assert 400000.0 < ds['x'].values.min() < 600000.0
+    assert np.isfinite(ds['values'].values).any()
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+import gspy
+
+
+def make_dataset(n=5000):
+    rng = np.random.default_rng(0)
+    ds = xr.Dataset({'line': ('index', np.repeat(np.arange(n // 100), 100)[rng.permutation(n)])},
+                    coords={'x': ('index', rng.uniform(0.0, 1000.0, n)), 'y': ('index', rng.uniform(0.0, 1000.0, n))})
+    return ds
+
+
+def test_query_bbox_matches_brute_force():
+    ds = make_dataset().gs.build_spatial_index(node_size=16)
+    x, y = ds['x'].values, ds['y'].values
+    index = ds.gs.query_bbox(100.0, 350.0, 500.0, 900.0)
+    expected = np.flatnonzero((x >= 100.0) & (x <= 350.0) & (y >= 500.0) & (y <= 900.0))
+    np.testing.assert_array_equal(index, expected)
+
+
+def test_nearest_matches_brute_force():
+    ds = make_dataset().gs.build_spatial_index(node_size=16)
+    x, y = ds['x'].values, ds['y'].values
+    points = np.random.default_rng(1).uniform(-100.0, 1100.0, (50, 2))
+    distance, index = ds.gs.nearest(points, k=3)
+    d = np.hypot(x[None, :] - points[:, :1], y[None, :] - points[:, 1:])
+    np.testing.assert_allclose(distance, np.sort(d, axis=1)[:, :3])
+
+
+def test_stale_index_after_reorder_raises():
+    ds = make_dataset().gs.build_spatial_index()
+    reordered = ds.isel(index=slice(None, None, -1))
+    with pytest.raises(AssertionError, match="build_spatial_index"):
+        reordered.gs.query_bbox(0.0, 100.0, 0.0, 100.0)
+
+    rebuilt = reordered.gs.build_spatial_index()
+    x, y = rebuilt['x'].values, rebuilt['y'].values
+    expected = np.flatnonzero((x <= 100.0) & (y <= 100.0))
+    np.testing.assert_array_equal(rebuilt.gs.query_bbox(0.0, 100.0, 0.0, 100.0), expected)
+
+
+def test_index_survives_netcdf_roundtrip(tmp_path):
+    ds = make_dataset().gs.build_spatial_index()
+    ds.to_netcdf(tmp_path / "index.nc")
+    with xr.open_dataset(tmp_path / "index.nc") as loaded:
+        np.testing.assert_array_equal(loaded.gs.query_bbox(0.0, 500.0, 0.0, 500.0), ds.gs.query_bbox(0.0, 500.0, 0.0, 500.0))
+
+
+def test_sorted_line_index_drops_spatial_index():
+    ds = make_dataset().gs.build_spatial_index().gs.build_line_index(sort=True)
+    assert 'spatial_index' not in ds and 'spatial_index_bounds' not in ds
+    x, y = ds['x'].values, ds['y'].values
+    expected = np.flatnonzero((x <= 250.0) & (y >= 750.0))
+    np.testing.assert_array_equal(ds.gs.query_bbox(0.0, 250.0, 750.0, 1000.0), expected)
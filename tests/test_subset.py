@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+import gspy
+
+
+def make_dataset():
+    rng = np.random.default_rng(0)
+    n = 1000
+    return xr.Dataset({'line': ('index', np.repeat([10, 20, 30, 40], n // 4)),
+                       'height': ('index', rng.uniform(0.0, 100.0, n)),
+                       'flag': ('index', rng.integers(0, 3, n, dtype=np.int32))},
+                      coords={'x': ('index', rng.uniform(0.0, 1.0, n)), 'y': ('index', rng.uniform(0.0, 1.0, n))})
+
+
+def expected(ds, mask):
+    return ds.isel(index=np.flatnonzero(mask))
+
+
+def test_key_value_is_equality():
+    ds = make_dataset()
+    xr.testing.assert_identical(ds.gs.subset('line', 20), expected(ds, ds['line'].values == 20))
+
+
+def test_predicates():
+    ds = make_dataset()
+    h, flag, line = ds['height'].values, ds['flag'].values, ds['line'].values
+
+    xr.testing.assert_identical(ds.gs.subset(height=(25.0, 50.0)), expected(ds, (h >= 25.0) & (h <= 50.0)))
+    xr.testing.assert_identical(ds.gs.subset(height=(None, 50.0)), expected(ds, h <= 50.0))
+    xr.testing.assert_identical(ds.gs.subset(height=(25.0, None)), expected(ds, h >= 25.0))
+    xr.testing.assert_identical(ds.gs.subset(line=[10, 40]), expected(ds, np.isin(line, [10, 40])))
+    xr.testing.assert_identical(ds.gs.subset(flag=lambda da: da % 2 == 0), expected(ds, flag % 2 == 0))
+    xr.testing.assert_identical(ds.gs.subset(line=30, flag=1, height=(None, 10.0)),
+                                expected(ds, (line == 30) & (flag == 1) & (h <= 10.0)))
+
+
+def test_keeps_dtypes_and_variables():
+    ds = make_dataset()
+    out = ds.gs.subset(line=10, variables=['flag'])
+    assert list(out.data_vars) == ['flag']
+    assert out['flag'].dtype == np.int32
+    assert out.sizes['index'] == 250
+
+
+def test_uses_line_index():
+    ds = make_dataset()
+    indexed = ds.gs.build_line_index()
+    xr.testing.assert_identical(indexed.gs.subset('line', 30), expected(ds, ds['line'].values == 30))
+
+
+def test_no_match():
+    assert make_dataset().gs.subset(line=50).sizes['index'] == 0
+
+
+def test_drop_is_deprecated():
+    ds = make_dataset()
+    with pytest.warns(DeprecationWarning):
+        out = ds.gs.subset('line', 20, drop=True)
+    xr.testing.assert_identical(out, ds.gs.subset('line', 20))
+
+
+def test_unknown_keyword_is_refused():
+    with pytest.raises(AssertionError, match="other"):
+        make_dataset().gs.subset('line', 20, other=0.0)
@@ -0,0 +1,61 @@
+import shutil
+from os.path import join
+
+import numpy as np
+import pytest
+import xarray as xr
+
+import gspy
+from gspy.gs_dataset.Tabular import Tabular
+from gspy.gs_datatree.Container import Container
+from gspy.metadata.Metadata import Metadata
+
+DATA = join(gspy.__path__[0], '..', 'examples', 'data_files', 'tempest_aseg', 'data')
+
+# Columns of TMI in the fixed width records of Tempest.dat, and its null value
+TMI = slice(195, 206)
+TMI_NULL = '-99999.999'
+
+
+@pytest.fixture
+def tempest(tmp_path):
+    """Tempest data whose TMI is null in every one of the first 250 records"""
+    shutil.copy(join(DATA, 'Tempest.dfn'), tmp_path / 'Tempest.dfn')
+    with open(join(DATA, 'Tempest.dat')) as f:
+        lines = f.readlines()
+    for i in range(250):
+        lines[i] = lines[i][:TMI.start] + TMI_NULL.rjust(TMI.stop - TMI.start) + lines[i][TMI.stop:]
+    (tmp_path / 'Tempest.dat').write_text(''.join(lines))
+    return str(tmp_path / 'Tempest.dat')
+
+
+def read(filename, **kwargs):
+    spatial_ref = gspy.Survey.from_dict(join(DATA, 'Tempest_survey_md.yml'))['spatial_ref']
+    metadata = Metadata.read(join(DATA, 'Tempest_data_md.yml'))
+    tree, _ = Container.Systems(**{key: metadata.pop(key) for key in list(metadata) if 'system' in key})
+    system = {key: value.to_dataset() for key, value in tree.children.items()}
+    return Tabular.read(filename, metadata_file=metadata, spatial_ref=spatial_ref, system=system, **kwargs)
+
+
+def test_chunked_matches_unchunked(tempest, tmp_path):
+    whole = read(tempest)
+    with read(tempest, chunksize=100, output_filename=str(tmp_path / 'chunked.nc')) as chunked:
+        chunked = chunked.load()
+
+    assert set(chunked.variables) == set(whole.variables)
+    for key, var in whole.variables.items():
+        np.testing.assert_array_equal(chunked[key].values, var.values, err_msg=key)
+        assert chunked[key].attrs.keys() == var.attrs.keys(), key
+        if 'valid_range' in var.attrs:
+            np.testing.assert_array_equal(chunked[key].attrs['valid_range'], var.attrs['valid_range'], err_msg=key)
+
+    # The first blocks have no valid TMI, their NaN range must not hide the others
+    assert (whole['tmi'].values[:250] == float(TMI_NULL)).all()
+    assert np.isfinite(chunked['tmi'].attrs['valid_range']).all()
+
+
+def test_output_filename_reads_in_blocks(tempest, tmp_path, monkeypatch):
+    monkeypatch.setattr(Tabular, 'default_chunksize', 500)
+    with read(tempest, output_filename=str(tmp_path / 'blocks.nc')) as blocks:
+        assert blocks.sizes['index'] == read(tempest).sizes['index']
+        assert 'unlimited_dims' not in blocks.encoding